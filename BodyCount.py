@@ -41,6 +41,7 @@ except:
 
 
 from . import commands
+from .lib import export_lib
 
 def run(context):
     try:
@@ -59,5 +60,8 @@ def stop(context):
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.stop()
 
+        # Cancel the running exports. The worker quits Excel itself, on its own thread.
+        export_lib.stop_export_worker()
+
     except:
         futil.handle_error('stop')
\ No newline at end of file
@@ -0,0 +1,3 @@
+# Pure-Python stand-in for the parts of the Fusion 360 API used by BodyCount, so the
+# libraries can be run and timed without Fusion. Only importable when the fakes folder
+# is put on sys.path, see bench/loader.py.
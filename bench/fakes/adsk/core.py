@@ -0,0 +1,226 @@
+import enum
+
+
+class LogLevels(enum.IntEnum):
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+class LogTypes(enum.IntEnum):
+    ConsoleLogType = 0
+    FileLogType = 1
+
+
+class DialogResults(enum.IntEnum):
+    DialogError = -1
+    DialogOK = 0
+    DialogCancel = 1
+    DialogNo = 2
+    DialogYes = 3
+
+
+class MessageBoxButtonTypes(enum.IntEnum):
+    OKButtonType = 0
+    OKCancelButtonType = 1
+    RetryCancelButtonType = 2
+    YesNoButtonType = 3
+    YesNoCancelButtonType = 4
+
+
+class DropDownStyles(enum.IntEnum):
+    LabeledIconDropDownStyle = 0
+    CheckBoxDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+
+class TablePresentationStyles(enum.IntEnum):
+    nameValueTablePresentationStyle = 0
+    itemBorderTablePresentationStyle = 1
+    transparentBackgroundTablePresentationStyle = 2
+
+
+class Base:
+    @classmethod
+    def cast(cls, obj):
+        return obj
+
+
+class Color(Base):
+    def __init__(self, red: int, green: int, blue: int, opacity: int):
+        self.red = red
+        self.green = green
+        self.blue = blue
+        self.opacity = opacity
+
+    @staticmethod
+    def create(red: int, green: int, blue: int, opacity: int) -> "Color":
+        return Color(red, green, blue, opacity)
+
+
+class Point3D(Base):
+    def __init__(self, x: float = 0, y: float = 0, z: float = 0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def create(x: float = 0, y: float = 0, z: float = 0) -> "Point3D":
+        return Point3D(x, y, z)
+
+    def asArray(self) -> list[float]:
+        return [self.x, self.y, self.z]
+
+
+class Vector3D(Point3D):
+    @staticmethod
+    def create(x: float = 0, y: float = 0, z: float = 0) -> "Vector3D":
+        return Vector3D(x, y, z)
+
+
+class Matrix3D(Base):
+    def __init__(self, values: list[float] | None = None):
+        self._values = values or [
+            1, 0, 0, 0,
+            0, 1, 0, 0,
+            0, 0, 1, 0,
+            0, 0, 0, 1,
+        ]
+
+    @staticmethod
+    def create() -> "Matrix3D":
+        return Matrix3D()
+
+    def asArray(self) -> list[float]:
+        return list(self._values)
+
+    def setWithArray(self, values: list[float]) -> bool:
+        self._values = list(values)
+        return True
+
+    @property
+    def translation(self) -> Vector3D:
+        return Vector3D(self._values[3], self._values[7], self._values[11])
+
+    @translation.setter
+    def translation(self, vector: Vector3D):
+        self._values[3], self._values[7], self._values[11] = vector.x, vector.y, vector.z
+
+    def transformBy(self, other: "Matrix3D") -> bool:
+        a, b = other._values, self._values
+        self._values = [
+            sum(a[row*4 + k] * b[k*4 + col] for k in range(4))
+            for row in range(4) for col in range(4)
+        ]
+        return True
+
+
+class BoundingBox3D(Base):
+    def __init__(self, minPoint: Point3D, maxPoint: Point3D):
+        self.minPoint = minPoint
+        self.maxPoint = maxPoint
+
+    @staticmethod
+    def create(minPoint: Point3D, maxPoint: Point3D) -> "BoundingBox3D":
+        return BoundingBox3D(minPoint, maxPoint)
+
+
+class OrientedBoundingBox3D(Base):
+    def __init__(self, centerPoint: Point3D, lengthDirection: Vector3D, widthDirection: Vector3D,
+                 length: float, width: float, height: float):
+        self.centerPoint = centerPoint
+        self.lengthDirection = lengthDirection
+        self.widthDirection = widthDirection
+        self.heightDirection = Vector3D(
+            lengthDirection.y*widthDirection.z - lengthDirection.z*widthDirection.y,
+            lengthDirection.z*widthDirection.x - lengthDirection.x*widthDirection.z,
+            lengthDirection.x*widthDirection.y - lengthDirection.y*widthDirection.x,
+        )
+        self.length = length
+        self.width = width
+        self.height = height
+
+
+class Attribute(Base):
+    def __init__(self, groupName: str, name: str, value: str):
+        self.groupName = groupName
+        self.name = name
+        self.value = value
+
+    def deleteMe(self) -> bool:
+        return True
+
+
+class Attributes(Base):
+    def __init__(self):
+        self._attributes: dict[tuple[str, str], Attribute] = {}
+
+    def add(self, groupName: str, name: str, value: str) -> Attribute:
+        attribute = Attribute(groupName, name, value)
+        self._attributes[(groupName, name)] = attribute
+        return attribute
+
+    def itemByName(self, groupName: str, name: str) -> Attribute | None:
+        return self._attributes.get((groupName, name))
+
+    @property
+    def count(self) -> int:
+        return len(self._attributes)
+
+
+class _Anything:
+    """Accepts any attribute access or call, for UI objects the libraries only poke at."""
+
+    def __getattr__(self, name: str):
+        return _Anything()
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def __bool__(self) -> bool:
+        return False
+
+
+class UserInterface(_Anything):
+    def messageBox(self, text: str, title: str = "", buttons: int = 0, icon: int = 0) -> DialogResults:
+        return DialogResults.DialogOK
+
+
+class Application(Base):
+    _instance: "Application | None" = None
+
+    def __init__(self):
+        self.userInterface = UserInterface()
+        self.activeProduct = None
+        self.logged: list[str] = []
+
+    @staticmethod
+    def get() -> "Application":
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    @property
+    def activeDocument(self):
+        return self.activeProduct.parentDocument if self.activeProduct else None
+
+    def log(self, message: str, level: LogLevels = LogLevels.InfoLogLevel, type: LogTypes = LogTypes.ConsoleLogType):
+        self.logged.append(message)
+
+
+# Every other adsk.core name, e.g. event and command input types, is only used in type
+# annotations and casts by the libraries, so a bare class is enough.
+_placeholders: dict[str, type] = {}
+
+def __getattr__(name: str) -> type:
+    if name.startswith('__'):
+        raise AttributeError(name)
+    if name not in _placeholders:
+        _placeholders[name] = type(name, (Base,), {})
+    return _placeholders[name]
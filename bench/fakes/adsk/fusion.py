@@ -0,0 +1,553 @@
+import itertools
+
+from . import core
+
+_tokens = itertools.count()
+
+
+class _Collection(list):
+    """Fusion collections can be iterated, indexed with item() and support count."""
+
+    @property
+    def count(self) -> int:
+        return len(self)
+
+    def item(self, index: int):
+        return self[index]
+
+
+class Material(core.Base):
+    def __init__(self, name: str):
+        self.name = name
+
+
+class TriangleMesh(core.Base):
+    def __init__(self, coordinates: list[float], indices: list[int]):
+        self.nodeCoordinatesAsFloat = coordinates
+        self.nodeCoordinatesAsDouble = coordinates
+        self.nodeIndices = indices
+
+    @property
+    def nodeCount(self) -> int:
+        return len(self.nodeCoordinatesAsFloat) // 3
+
+    @property
+    def triangleCount(self) -> int:
+        return len(self.nodeIndices) // 3
+
+
+TriangleMeshQualityOptions = type("TriangleMeshQualityOptions", (), {
+    "LowQualityTriangleMesh": 8,
+    "NormalQualityTriangleMesh": 11,
+    "HighQualityTriangleMesh": 13,
+    "VeryHighQualityTriangleMesh": 15,
+})
+
+
+def _box(center: tuple[float, float, float], size: float, subdivisions: int = 1) -> TriangleMesh:
+    """Tessellates a cube, with each face split into subdivisions x subdivisions quads."""
+    coordinates: list[float] = []
+    indices: list[int] = []
+    n = subdivisions
+    for axis in range(3):
+        for side in (-1, 1):
+            start = len(coordinates) // 3
+            for i in range(n + 1):
+                for j in range(n + 1):
+                    point = [0.0, 0.0, 0.0]
+                    point[axis] = side * size / 2
+                    point[(axis + 1) % 3] = (i / n - 0.5) * size
+                    point[(axis + 2) % 3] = (j / n - 0.5) * size
+                    coordinates += [c + p for c, p in zip(center, point)]
+            for i in range(n):
+                for j in range(n):
+                    a = start + i * (n + 1) + j
+                    indices += [a, a + 1, a + n + 1, a + 1, a + n + 2, a + n + 1]
+    return TriangleMesh(coordinates, indices)
+
+
+class TriangleMeshCalculator(core.Base):
+    def __init__(self, body: "BRepBody"):
+        self._body = body
+        self.surfaceTolerance = 0.0
+        self._quality = TriangleMeshQualityOptions.NormalQualityTriangleMesh
+
+    def setQuality(self, quality: int) -> bool:
+        self._quality = quality
+        return True
+
+    def calculate(self) -> TriangleMesh:
+        subdivisions = max(1, (self._quality - 7) // 2)
+        return _box(self._body._center(), self._body._size(), subdivisions)
+
+
+class _DisplayMeshes(core.Base):
+    def __init__(self, body: "BRepBody"):
+        self._body = body
+
+    @property
+    def bestMesh(self) -> TriangleMesh:
+        return _box(self._body._center(), self._body._size(), self._body._native_body()._subdivisions)
+
+    @property
+    def count(self) -> int:
+        return 1
+
+
+class MeshManager(core.Base):
+    def __init__(self, body: "BRepBody"):
+        self.displayMeshes = _DisplayMeshes(body)
+        self._body = body
+
+    def createMeshCalculator(self) -> TriangleMeshCalculator:
+        return TriangleMeshCalculator(self._body)
+
+
+def _context_offset(context: "Occurrence | None") -> tuple[float, float, float]:
+    x = y = z = 0.0
+    while context is not None:
+        translation = context._native_occurrence()._translation
+        x, y, z = x + translation[0], y + translation[1], z + translation[2]
+        context = context._context
+    return (x, y, z)
+
+
+# Light bulbs turned on or off in a single instance of a component, by proxy entityToken
+_light_bulb_overrides: dict[str, bool] = {}
+
+
+def _is_light_bulb_on(obj: "BRepBody | Occurrence", native: "BRepBody | Occurrence") -> bool:
+    if _light_bulb_overrides and obj._context is not None:
+        if (value := _light_bulb_overrides.get(obj.entityToken)) is not None:
+            return value
+    return native._is_light_bulb_on
+
+
+def _set_light_bulb(obj: "BRepBody | Occurrence", native: "BRepBody | Occurrence", value: bool):
+    if obj._context is None:
+        native._is_light_bulb_on = value
+        native._parent._revision += 1
+    else:
+        _light_bulb_overrides[obj.entityToken] = value
+        # Overrides are kept by the component the path starts in
+        context = obj._context
+        while context._context is not None:
+            context = context._context
+        context._native_occurrence()._parent._revision += 1
+
+
+def _is_context_visible(context: "Occurrence | None") -> bool:
+    while context is not None:
+        native = context._native_occurrence()
+        if not _is_light_bulb_on(context, native) or not native._parent.isOccurrencesFolderLightBulbOn:
+            return False
+        context = context._context
+    return True
+
+
+class BRepBody(core.Base):
+    """A body. Bodies created on a component are native, the ones returned by
+    Occurrence.bRepBodies are proxies in the context of that occurrence."""
+
+    def __init__(self, name: str, material: str, parent: "Component", isLightBulbOn: bool = True,
+                 subdivisions: int = 1, native: "BRepBody | None" = None,
+                 context: "Occurrence | None" = None):
+        self._name = name
+        self._material = material
+        self._parent = parent
+        self._subdivisions = subdivisions
+        self._native = native
+        self._context = context
+        self._token = native._token if native else f"body{next(_tokens)}"
+        self._revision = 0
+        self._is_light_bulb_on = isLightBulbOn
+
+    def _native_body(self) -> "BRepBody":
+        return self._native or self
+
+    def _center(self) -> tuple[float, float, float]:
+        native = self._native_body()
+        offset = _context_offset(self._context)
+        position = int(native._token[4:])
+        return (offset[0] + position % 97, offset[1] + position % 89, offset[2])
+
+    def _size(self) -> float:
+        return 0.5
+
+    @property
+    def name(self) -> str:
+        return self._native_body()._name
+
+    @name.setter
+    def name(self, name: str):
+        native = self._native_body()
+        native._name = name
+        native._revision += 1
+        native._parent._revision += 1
+
+    @property
+    def material(self) -> Material:
+        return Material(self._native_body()._material)
+
+    @material.setter
+    def material(self, material: Material):
+        native = self._native_body()
+        native._material = material.name
+        native._revision += 1
+        native._parent._revision += 1
+
+    @property
+    def isLightBulbOn(self) -> bool:
+        return _is_light_bulb_on(self, self._native_body())
+
+    @isLightBulbOn.setter
+    def isLightBulbOn(self, value: bool):
+        _set_light_bulb(self, self._native_body(), value)
+
+    @property
+    def isVisible(self) -> bool:
+        native = self._native_body()
+        return (
+            _is_light_bulb_on(self, native) and
+            native._parent.isBodiesFolderLightBulbOn and
+            _is_context_visible(self._context)
+        )
+
+    @property
+    def entityToken(self) -> str:
+        if self._context is None:
+            return self._token
+        return f"{self._token}@{self._context.fullPathName}"
+
+    @property
+    def revisionId(self) -> str:
+        return f"{self._token}r{self._native_body()._revision}"
+
+    @property
+    def meshManager(self) -> MeshManager:
+        return MeshManager(self)
+
+    @property
+    def boundingBox(self) -> core.BoundingBox3D:
+        center, size = self._center(), self._size()
+        return core.BoundingBox3D(
+            core.Point3D(*(c - size/2 for c in center)),
+            core.Point3D(*(c + size/2 for c in center)),
+        )
+
+    @property
+    def orientedMinimumBoundingBox(self) -> core.OrientedBoundingBox3D:
+        size = self._size()
+        return core.OrientedBoundingBox3D(
+            core.Point3D(*self._center()),
+            core.Vector3D(1, 0, 0), core.Vector3D(0, 1, 0),
+            size, size, size,
+        )
+
+    @property
+    def assemblyContext(self) -> "Occurrence | None":
+        return self._context
+
+    @property
+    def nativeObject(self) -> "BRepBody | None":
+        return self._native
+
+    @property
+    def parentComponent(self) -> "Component":
+        return self._native_body()._parent
+
+
+class Occurrence(core.Base):
+    """An occurrence of a component. Occurrences created on a component are native, the ones
+    returned by Occurrence.childOccurrences are proxies in the context of that occurrence."""
+
+    def __init__(self, name: str, component: "Component", parent: "Component", isLightBulbOn: bool = True,
+                 translation: tuple[float, float, float] = (0, 0, 0),
+                 native: "Occurrence | None" = None, context: "Occurrence | None" = None):
+        self._name = name
+        self._component = component
+        self._parent = parent
+        self._translation = translation
+        self._native = native
+        self._context = context
+        self._token = native._token if native else f"occ{next(_tokens)}"
+        self._is_light_bulb_on = isLightBulbOn
+
+    def _native_occurrence(self) -> "Occurrence":
+        return self._native or self
+
+    @property
+    def name(self) -> str:
+        return self._native_occurrence()._name
+
+    @name.setter
+    def name(self, name: str):
+        native = self._native_occurrence()
+        native._name = name
+        native._parent._revision += 1
+
+    @property
+    def component(self) -> "Component":
+        return self._native_occurrence()._component
+
+    @property
+    def isLightBulbOn(self) -> bool:
+        return _is_light_bulb_on(self, self._native_occurrence())
+
+    @isLightBulbOn.setter
+    def isLightBulbOn(self, value: bool):
+        _set_light_bulb(self, self._native_occurrence(), value)
+
+    @property
+    def isVisible(self) -> bool:
+        return _is_context_visible(self)
+
+    @property
+    def fullPathName(self) -> str:
+        names = []
+        occ = self
+        while occ is not None:
+            names.append(occ.name)
+            occ = occ._context
+        return "+".join(reversed(names))
+
+    @property
+    def entityToken(self) -> str:
+        if self._context is None:
+            return self._token
+        return f"{self._token}@{self._context.fullPathName}"
+
+    @property
+    def childOccurrences(self) -> _Collection:
+        return _Collection(
+            Occurrence(None, None, None, native=occ, context=self)
+            for occ in self.component._occurrences
+        )
+
+    @property
+    def bRepBodies(self) -> _Collection:
+        return _Collection(
+            BRepBody(None, None, None, native=body, context=self)
+            for body in self.component._bodies
+        )
+
+    @property
+    def transform2(self) -> core.Matrix3D:
+        matrix = core.Matrix3D()
+        matrix.translation = core.Vector3D(*_context_offset(self))
+        return matrix
+
+    @property
+    def boundingBox(self) -> core.BoundingBox3D:
+        boxes = [body.boundingBox for body in _all_bodies(self)]
+        if not boxes:
+            offset = _context_offset(self)
+            return core.BoundingBox3D(core.Point3D(*offset), core.Point3D(*offset))
+        return core.BoundingBox3D(
+            core.Point3D(*(min(getattr(b.minPoint, a) for b in boxes) for a in "xyz")),
+            core.Point3D(*(max(getattr(b.maxPoint, a) for b in boxes) for a in "xyz")),
+        )
+
+    @property
+    def assemblyContext(self) -> "Occurrence | None":
+        return self._context
+
+    @property
+    def nativeObject(self) -> "Occurrence | None":
+        return self._native
+
+    def deleteMe(self) -> bool:
+        native = self._native_occurrence()
+        native._parent._occurrences.remove(native)
+        native._parent._revision += 1
+        return True
+
+
+def _all_bodies(occ: Occurrence):
+    stack = [occ]
+    while stack:
+        occ = stack.pop()
+        yield from occ.bRepBodies
+        stack.extend(occ.childOccurrences)
+
+
+class CustomGraphicsCoordinates(core.Base):
+    def __init__(self, coordinates: list[float]):
+        self.coordinates = list(coordinates)
+
+    @staticmethod
+    def create(coordinates: list[float]) -> "CustomGraphicsCoordinates":
+        return CustomGraphicsCoordinates(coordinates)
+
+    @property
+    def coordinateCount(self) -> int:
+        return len(self.coordinates) // 3
+
+
+class CustomGraphicsShowThroughColorEffect(core.Base):
+    def __init__(self, color: core.Color, opacity: float):
+        self.color = color
+        self.opacity = opacity
+
+    @staticmethod
+    def create(color: core.Color, opacity: float) -> "CustomGraphicsShowThroughColorEffect":
+        return CustomGraphicsShowThroughColorEffect(color, opacity)
+
+
+class CustomGraphicsMesh(core.Base):
+    def __init__(self, group: "CustomGraphicsGroup", coordinates: CustomGraphicsCoordinates, indices: list[int]):
+        self._group = group
+        self.coordinates = coordinates
+        self.vertexIndexList = list(indices)
+        self.color = None
+
+    def deleteMe(self) -> bool:
+        self._group._entities.remove(self)
+        return True
+
+
+class CustomGraphicsGroup(core.Base):
+    def __init__(self, groups: "CustomGraphicsGroups"):
+        self._groups = groups
+        self._entities: list[CustomGraphicsMesh] = []
+        self.isSelectable = True
+        self.isVisible = True
+
+    def addMesh(self, coordinates: CustomGraphicsCoordinates, vertexIndexList: list[int],
+                normalVectors: list[float], normalIndexList: list[int]) -> CustomGraphicsMesh:
+        mesh = CustomGraphicsMesh(self, coordinates, vertexIndexList)
+        self._entities.append(mesh)
+        return mesh
+
+    @property
+    def count(self) -> int:
+        return len(self._entities)
+
+    def deleteMe(self) -> bool:
+        self._groups._groups.remove(self)
+        return True
+
+
+class CustomGraphicsGroups(core.Base):
+    def __init__(self):
+        self._groups: list[CustomGraphicsGroup] = []
+
+    def add(self) -> CustomGraphicsGroup:
+        group = CustomGraphicsGroup(self)
+        self._groups.append(group)
+        return group
+
+    @property
+    def count(self) -> int:
+        return len(self._groups)
+
+    def item(self, index: int) -> CustomGraphicsGroup:
+        return self._groups[index]
+
+
+class Component(core.Base):
+    def __init__(self, name: str):
+        self.name = name
+        self._occurrences: list[Occurrence] = []
+        self._bodies: list[BRepBody] = []
+        self._token = f"comp{next(_tokens)}"
+        self._revision = 0
+        self.isBodiesFolderLightBulbOn = True
+        self.isOccurrencesFolderLightBulbOn = True
+        self.customGraphicsGroups = CustomGraphicsGroups()
+        self.attributes = core.Attributes()
+
+    @property
+    def entityToken(self) -> str:
+        return self._token
+
+    @property
+    def id(self) -> str:
+        return self._token
+
+    @property
+    def revisionId(self) -> str:
+        return f"{self._token}r{self._revision}"
+
+    @property
+    def occurrences(self) -> _Collection:
+        return _Collection(self._occurrences)
+
+    @property
+    def bRepBodies(self) -> _Collection:
+        return _Collection(self._bodies)
+
+    def add_body(self, name: str, material: str, isLightBulbOn: bool = True, subdivisions: int = 1) -> BRepBody:
+        """Not in the Fusion API, creates a native body directly in the component."""
+        body = BRepBody(name, material, self, isLightBulbOn, subdivisions)
+        self._bodies.append(body)
+        self._revision += 1
+        return body
+
+    def add_occurrence(self, name: str, component: "Component", isLightBulbOn: bool = True,
+                       translation: tuple[float, float, float] = (0, 0, 0)) -> Occurrence:
+        """Not in the Fusion API, creates a native occurrence of `component` in this component."""
+        occ = Occurrence(name, component, self, isLightBulbOn, translation)
+        self._occurrences.append(occ)
+        self._revision += 1
+        return occ
+
+
+class DataFile(core.Base):
+    def __init__(self, name: str):
+        self.name = name
+        self.id = f"urn:fake:{name}"
+        self.versionNumber = 1
+
+
+class Document(core.Base):
+    def __init__(self, name: str, design: "Design"):
+        self.name = name
+        self.creationId = f"doc{next(_tokens)}"
+        self.dataFile = DataFile(name)
+        self.isModified = False
+        self.isSaved = True
+        self.design = design
+
+    @property
+    def products(self) -> _Collection:
+        return _Collection([self.design])
+
+    def close(self, saveChanges: bool) -> bool:
+        return True
+
+
+class Timeline(core.Base):
+    def __init__(self):
+        self.count = 0
+        self.markerPosition = 0
+
+
+class Design(core.Base):
+    def __init__(self, rootComponent: Component, name: str = "Untitled"):
+        self.rootComponent = rootComponent
+        self.attributes = core.Attributes()
+        self.timeline = Timeline()
+        self.parentDocument = Document(name, self)
+
+    @property
+    def allComponents(self) -> _Collection:
+        seen: dict[str, Component] = {}
+        stack = [self.rootComponent]
+        while stack:
+            component = stack.pop()
+            if component.entityToken in seen:
+                continue
+            seen[component.entityToken] = component
+            stack.extend(occ.component for occ in component._occurrences)
+        return _Collection(seen.values())
+
+
+_placeholders: dict[str, type] = {}
+
+def __getattr__(name: str) -> type:
+    if name.startswith('__'):
+        raise AttributeError(name)
+    if name not in _placeholders:
+        _placeholders[name] = type(name, (core.Base,), {})
+    return _placeholders[name]
@@ -0,0 +1,2 @@
+# excel_lib only uses exceltypes for type annotations.
+Application = Workbook = Worksheet = ListObject = Range = object
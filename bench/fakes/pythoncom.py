@@ -0,0 +1,10 @@
+def CoInitialize():
+    pass
+
+
+def CoUninitialize():
+    pass
+
+
+class com_error(Exception):
+    pass
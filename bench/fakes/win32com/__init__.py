@@ -0,0 +1 @@
+# Stand-in for pywin32, see client.py
@@ -0,0 +1,201 @@
+"""In-memory stand-in for the Excel COM objects used by excel_lib.
+
+Only models what excel_lib touches: a LinkFusion sheet with the IndividualParts and
+ModulesParts tables, ranges of cells and resizing tables. Cells are kept in a dict, so
+writes cost roughly what building the values does, not what Excel would take.
+"""
+
+TABLES = {
+    "IndividualParts": ["Name", "Count", "Material"],
+    "ModulesParts": ["Category", "Id", "Module", "Name", "Count"],
+}
+SHEET_NAME = "LinkFusion"
+
+XL_SHIFT_UP = -4162
+XL_SHIFT_DOWN = -4121
+XL_CALCULATION_AUTOMATIC = -4105
+
+
+class Range:
+    def __init__(self, sheet: "Worksheet", row: int, col: int, n_rows: int = 1, n_cols: int = 1):
+        self._sheet = sheet
+        self.Row = row
+        self.Column = col
+        self._n_rows = n_rows
+        self._n_cols = n_cols
+
+    @property
+    def Rows(self) -> "_Count":
+        return _Count(self._n_rows)
+
+    @property
+    def Columns(self) -> "_Count":
+        return _Count(self._n_cols)
+
+    @property
+    def Count(self) -> int:
+        return self._n_rows * self._n_cols
+
+    def Cells(self, row: int, col: int) -> "Range":
+        return Range(self._sheet, self.Row + row - 1, self.Column + col - 1)
+
+    def Offset(self, row: int, col: int) -> "Range":
+        # pywin32 exposes Offset as a parameterized property with 1-based arguments,
+        # so Offset(1, 1) is the range itself.
+        return Range(self._sheet, self.Row + row - 1, self.Column + col - 1, self._n_rows, self._n_cols)
+
+    def Resize(self, n_rows: int, n_cols: int) -> "Range":
+        return Range(self._sheet, self.Row, self.Column, n_rows, n_cols)
+
+    @property
+    def Value(self):
+        cells = self._sheet._cells
+        rows = tuple(
+            tuple(cells.get((row, col)) for col in range(self.Column, self.Column + self._n_cols))
+            for row in range(self.Row, self.Row + self._n_rows)
+        )
+        return rows[0][0] if self.Count == 1 else rows
+
+    @Value.setter
+    def Value(self, values):
+        cells = self._sheet._cells
+        if not isinstance(values, (list, tuple)):
+            values = [[values] * self._n_cols] * self._n_rows
+        for i, row in enumerate(values[:self._n_rows]):
+            for j, value in enumerate(row[:self._n_cols]):
+                cells[(self.Row + i, self.Column + j)] = value
+
+    def Clear(self):
+        cells = self._sheet._cells
+        for row in range(self.Row, self.Row + self._n_rows):
+            for col in range(self.Column, self.Column + self._n_cols):
+                cells.pop((row, col), None)
+
+    def Insert(self, Shift: int):
+        assert Shift == XL_SHIFT_DOWN, Shift
+        self._sheet._shift_rows(self, self._n_rows)
+
+    def Delete(self, Shift: int):
+        assert Shift == XL_SHIFT_UP, Shift
+        self.Clear()
+        self._sheet._shift_rows(self, -self._n_rows)
+
+
+class _Count:
+    def __init__(self, count: int):
+        self.Count = count
+
+
+class ListObject:
+    def __init__(self, sheet: "Worksheet", name: str, col: int, headers: list[str]):
+        self._sheet = sheet
+        self.Name = name
+        self._range = Range(sheet, 1, col, 2, len(headers))
+        Range(sheet, 1, col, 1, len(headers)).Value = [headers]
+
+    @property
+    def Range(self) -> Range:
+        return self._range
+
+    @property
+    def HeaderRowRange(self) -> Range:
+        return self._range.Resize(1, self._range._n_cols)
+
+    @property
+    def DataBodyRange(self) -> "Range | None":
+        if self._range._n_rows == 1:
+            return None
+        return Range(self._sheet, self._range.Row + 1, self._range.Column,
+                     self._range._n_rows - 1, self._range._n_cols)
+
+    def Resize(self, range: Range):
+        self._range = range
+
+
+class Worksheet:
+    def __init__(self, application: "Application", name: str):
+        self.Application = application
+        self.Name = name
+        self._cells: dict[tuple[int, int], object] = {}
+        self._tables: dict[str, ListObject] = {}
+        col = 1
+        for table_name, headers in TABLES.items():
+            self._tables[table_name] = ListObject(self, table_name, col, headers)
+            col += len(headers) + 1
+
+    def ListObjects(self, name: str) -> ListObject:
+        return self._tables[name]
+
+    def Range(self, start: Range, end: Range) -> Range:
+        return Range(self, start.Row, start.Column, end.Row - start.Row + 1, end.Column - start.Column + 1)
+
+    def _shift_rows(self, cells: Range, n_rows: int):
+        """Moves the cells in the columns of `cells`, from its first row down, by `n_rows`,
+        growing or shrinking the tables `cells` is in."""
+        first_col, last_col = cells.Column, cells.Column + cells._n_cols - 1
+        moved = {
+            (row, col): value for (row, col), value in self._cells.items()
+            if row >= cells.Row and first_col <= col <= last_col
+        }
+        for position in moved:
+            del self._cells[position]
+        for (row, col), value in moved.items():
+            self._cells[(row + n_rows, col)] = value
+
+        for table in self._tables.values():
+            table_range = table.Range
+            if (table_range.Column == first_col and table_range._n_cols == cells._n_cols
+                    and table_range.Row < cells.Row < table_range.Row + table_range._n_rows):
+                table.Resize(table_range.Resize(table_range._n_rows + n_rows, table_range._n_cols))
+
+
+class Workbook:
+    def __init__(self, application: "Application", path: str):
+        self.Application = application
+        self.FullName = path
+        self._sheets = {SHEET_NAME: Worksheet(application, SHEET_NAME)}
+        self.saved_to: list[str] = []
+
+    def Sheets(self, name: str) -> Worksheet:
+        return self._sheets[name]
+
+    def SaveAs(self, path: str, ConflictResolution: int = 1):
+        self.saved_to.append(path)
+
+    def Close(self, SaveChanges: bool = False):
+        self.Application.Workbooks._open.remove(self)
+
+
+class Workbooks:
+    def __init__(self, application: "Application"):
+        self._application = application
+        self._open: list[Workbook] = []
+
+    def Open(self, path: str, ReadOnly: bool = False, Editable: bool = True) -> Workbook:
+        workbook = Workbook(self._application, path)
+        self._open.append(workbook)
+        return workbook
+
+    @property
+    def Count(self) -> int:
+        return len(self._open)
+
+
+class Application:
+    def __init__(self):
+        self.Visible = False
+        self.DisplayAlerts = True
+        self.Calculation = XL_CALCULATION_AUTOMATIC
+        self.Workbooks = Workbooks(self)
+        self.is_running = True
+
+    def Quit(self):
+        self.is_running = False
+
+
+def Dispatch(prog_id: str) -> Application:
+    assert prog_id == "Excel.Application", prog_id
+    return Application()
+
+
+DispatchEx = Dispatch
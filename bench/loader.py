@@ -0,0 +1,36 @@
+import importlib
+import sys
+import types
+
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FAKES_PATH = Path(__file__).resolve().parent/'fakes'
+PACKAGE_NAME = 'BodyCount'
+
+
+def load_addin() -> types.ModuleType:
+    """Makes the add-in importable as the `BodyCount` package outside Fusion 360.
+
+    The fakes in bench/fakes are only used for the modules that can't be imported, so the
+    benchmarks run against the real adsk and pywin32 when they are available. BodyCount.py
+    itself is not run, since it installs packages and starts the commands.
+
+    @return The `BodyCount` package.
+    """
+    for module_name in ('adsk', 'win32com', 'pythoncom', 'exceltypes'):
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            # Drop whatever was partly imported, e.g. exceltypes fails on anything but Windows
+            for name in [name for name in sys.modules if name.split('.')[0] == module_name]:
+                del sys.modules[name]
+            if str(FAKES_PATH) not in sys.path:
+                sys.path.insert(0, str(FAKES_PATH))
+
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [str(REPO_ROOT)]
+        sys.modules[PACKAGE_NAME] = package
+
+    return sys.modules[PACKAGE_NAME]
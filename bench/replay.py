@@ -0,0 +1,80 @@
+"""Rebuilds designs recorded with the Record Design command on the adsk stand-in."""
+import adsk.fusion
+import math
+
+from BodyCount.lib import counting_lib
+
+from .synthetic import SyntheticDesign
+
+
+def build_design(fixture: dict) -> SyntheticDesign:
+    """Builds a design from a fixture, see counting_lib.record_design.
+
+    @param fixture The loaded fixture.
+
+    @return The design, with the same components, bodies and light bulbs as the recorded one.
+    """
+    recorded_components = fixture["components"]
+    components = [adsk.fusion.Component(recorded["name"]) for recorded in recorded_components]
+
+    for component, recorded in zip(components, recorded_components):
+        component.isBodiesFolderLightBulbOn = recorded["bodies_folder"]
+        component.isOccurrencesFolderLightBulbOn = recorded["occurrences_folder"]
+        for name, material, is_light_bulb_on, *triangles in recorded["bodies"]:
+            # The stand-in meshes bodies as boxes with 12 * subdivisions^2 triangles
+            subdivisions = max(1, round(math.sqrt(triangles[0] / 12))) if triangles else 1
+            component.add_body(name, material, is_light_bulb_on, subdivisions)
+        for i, (name, component_index, is_light_bulb_on) in enumerate(recorded["occurrences"]):
+            component.add_occurrence(name, components[component_index], is_light_bulb_on, (i, 0, 0))
+
+    root = components[fixture["root"]]
+    design = adsk.fusion.Design(root, fixture["name"])
+
+    for path, is_light_bulb_on in fixture["occurrence_overrides"].items():
+        _find_occurrence(root, path).isLightBulbOn = is_light_bulb_on
+    for path, is_light_bulb_on in fixture["body_overrides"].items():
+        occ_path, index = path.rsplit("/", 1)
+        _find_occurrence(root, occ_path).bRepBodies[int(index)].isLightBulbOn = is_light_bulb_on
+
+    n_bodies, n_occurrences = _count_instances(recorded_components, fixture["root"])
+    return SyntheticDesign(design, n_bodies, n_occurrences, len(components))
+
+
+def module_materials(fixture: dict, modules: list[counting_lib.Module]) -> dict[str, tuple[str, str]]:
+    """The recorded (steel/brass, wood) material of each category, with a default for the
+    categories that had none selected when the design was recorded."""
+    materials = {category: tuple(materials) for category, materials in fixture["module_materials"].items()}
+    for module in modules:
+        materials.setdefault(module.category, ("Steel", "Oak"))
+    return materials
+
+
+def _find_occurrence(root: adsk.fusion.Component, path: str) -> adsk.fusion.Occurrence:
+    occurrences = root.occurrences
+    occ = None
+    for name in path.split("+"):
+        occ = next(occ for occ in occurrences if occ.name == name)
+        occurrences = occ.childOccurrences
+    return occ
+
+
+def _count_instances(components: list[dict], root: int) -> tuple[int, int]:
+    """Counts the bodies and occurrences in every instance of the components under root."""
+    totals: dict[int, tuple[int, int]] = {}
+    stack = [(root, False)]
+    while stack:
+        index, is_expanded = stack.pop()
+        if index in totals:
+            continue
+        children = [child for _, child, _ in components[index]["occurrences"]]
+        if not is_expanded:
+            stack.append((index, True))
+            stack.extend((child, False) for child in children if child not in totals)
+            continue
+        n_bodies = len(components[index]["bodies"])
+        n_occurrences = len(children)
+        for child in children:
+            n_bodies += totals[child][0]
+            n_occurrences += totals[child][1]
+        totals[index] = (n_bodies, n_occurrences)
+    return totals[root]
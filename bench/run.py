@@ -0,0 +1,275 @@
+"""Times each stage of the counting pipeline on synthetic kitchen designs.
+
+Run from the add-in folder:
+
+    python -m bench.run --sizes 1k,10k,100k,1M --json bench_output.json
+
+or on designs recorded with the Record Design command:
+
+    python -m bench.run --sizes 0 --fixture customer.json.gz
+
+Every stage is run `--repeat` times and the fastest run is reported, then run once more
+with tracemalloc to measure its peak memory, since tracing slows everything down.
+"""
+import argparse
+import gc
+import importlib
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from collections.abc import Callable
+
+from .loader import load_addin, FAKES_PATH
+
+load_addin()
+
+import adsk.core
+
+from BodyCount import config
+from BodyCount.lib import counting_lib, custom_graphics_lib, excel_lib, export_lib
+
+# The package exports the human_sort function under the same name as the module
+human_sort_module = importlib.import_module("BodyCount.lib.counting_lib.human_sort")
+
+from . import synthetic, replay, xlsx_template
+
+DEFAULT_SIZES = "1k,10k,100k"
+SIZE_SUFFIXES = {"k": 1_000, "M": 1_000_000}
+
+
+@dataclass
+class StageResult:
+    design: str
+    stage: str
+    seconds: float
+    peak_bytes: int | None
+
+
+def parse_sizes(sizes: str) -> list[int]:
+    """Parses a comma separated list of sizes like "1k,10k,1M"."""
+    result = []
+    for size in sizes.split(","):
+        size = size.strip()
+        if not size or size == "0":
+            continue
+        if size[-1] in SIZE_SUFFIXES:
+            result.append(int(float(size[:-1]) * SIZE_SUFFIXES[size[-1]]))
+        else:
+            result.append(int(size))
+    return result
+
+
+def clear_caches():
+    """Clears the name and sort key caches, so every run starts cold like a new Fusion session."""
+    counting_lib.classify_name.cache_clear()
+    human_sort_module._string_key.cache_clear()
+
+
+def measure(design: str, stage: str, fn: Callable, repeat: int, trace_memory: bool, results: list[StageResult]):
+    """Runs `fn` and records how long its fastest run took and its peak memory.
+
+    @return The result of the last run of `fn`.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        clear_caches()
+        gc.collect()
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if trace_memory:
+        clear_caches()
+        gc.collect()
+        tracemalloc.start()
+        value = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    results.append(StageResult(design, stage, best, peak))
+    print(f"{design:>9} {stage:<28} {best:>9.3f} s {_format_bytes(peak):>10}", flush=True)
+    return value
+
+
+def _format_bytes(n: int | None) -> str:
+    return "-" if n is None else f"{n / 2**20:.1f} MiB"
+
+
+def run_design(
+    label: str,
+    generate: Callable[[], synthetic.SyntheticDesign],
+    module_materials: Callable[[list[counting_lib.Module]], dict[str, tuple[str, str]]],
+    steel_brass_numbers: list[tuple[int, int]],
+    args: argparse.Namespace,
+    results: list[StageResult],
+):
+    """Times every stage of the pipeline on the design built by `generate`."""
+    app = adsk.core.Application.get()
+
+    def run(stage: str, fn: Callable):
+        return measure(label, stage, fn, args.repeat, not args.no_memory, results)
+
+    synthetic_design = run("generate", generate)
+    design = synthetic_design.design
+    root = design.rootComponent
+    app.activeProduct = design
+
+    snapshot = run("snapshot", lambda: counting_lib.DesignSnapshot(root))
+    modules = run("collect_modules_under", lambda: counting_lib.collect_modules_under(root, snapshot))
+    run("snapshot+modules", lambda: counting_lib.collect_modules_under(root))
+    run("modules per component", lambda: counting_lib.collect_modules_under(root, None, counting_lib.ComponentCounter()))
+    run("categories", lambda: counting_lib.collect_categories_under(root))
+
+    def highlight_groups(level_of_detail: str | None = custom_graphics_lib.LOD_FULL):
+        graphics = custom_graphics_lib.SelectionGraphics(adsk.core.Color.create(255, 0, 0, 100))
+        graphics.level_of_detail = level_of_detail
+        for occ in root.occurrences:
+            graphics.add_occ(occ)
+        level_of_detail = graphics.show()
+        graphics.deleteMe()
+        return level_of_detail
+
+    def highlight_groups_cold():
+        custom_graphics_lib.get_mesh_cache().clear()
+        highlight_groups()
+    run("selection graphics cold", highlight_groups_cold)
+    run("selection graphics warm", highlight_groups)
+    level_of_detail = run("selection graphics auto", lambda: highlight_groups(None))
+    print(f"{'':>9} picked level of detail: {level_of_detail}")
+
+    # A body renamed in one module between two counts
+    module_cache = counting_lib.ModuleCache()
+    counting_lib.collect_modules_under(root, None, None, module_cache)
+    first_group = next(occ for occ in root.occurrences if occ.name.startswith("G_"))
+    edited_body = next(counting_lib.traverse_brepbodies(first_group.childOccurrences.item(0)))
+    original_name = edited_body.name
+
+    def recount_after_edit():
+        edited_body.name = original_name if edited_body.name != original_name else f"{original_name} edited"
+        return counting_lib.collect_modules_under(root, None, None, module_cache)
+    run("recount after edit", recount_after_edit)
+    print(f"{'':>9} recounted {module_cache.n_counted} of {module_cache.n_counted + module_cache.n_reused} modules")
+    edited_body.name = original_name
+
+    run("save cached modules", lambda: counting_lib.save_cached_modules(design, modules))
+    run("load cached modules", lambda: counting_lib.load_cached_modules(design))
+
+    # collect_bodies renames detail parts in place, so each run gets its own copy
+    materials = module_materials(modules)
+
+    def collect_bodies():
+        return counting_lib.collect_bodies(
+            [
+                excel_lib.Module(module.category, module.name, [
+                    excel_lib.Body(body.name, body.count, body.material) for body in module.bodies
+                ])
+                for module in modules
+            ],
+            materials,
+            steel_brass_numbers,
+        )
+    bodies = run("collect_bodies", collect_bodies)
+
+    def write_excel(backend: str, excel_path: str):
+        config.EXCEL_BACKEND = backend
+        workbook = excel_lib.open_excel_doc(excel_path)
+        try:
+            excel_lib.write_bodies_to_table(workbook, bodies)
+            excel_lib.write_modules_to_table(workbook, modules)
+            excel_lib.save(workbook, excel_path)
+        finally:
+            excel_lib.close(workbook)
+
+    if args.excel is not None or _is_fake_excel():
+        com_path = args.excel or str(Path(tempfile.gettempdir())/"bodycount_bench_com.xlsx")
+        Path(com_path).touch()
+        def write_com_cold():
+            excel_lib.shutdown()
+            write_excel("com", com_path)
+        run("excel com cold", write_com_cold)
+        # Exports after the first reuse the Excel instance, see config.EXCEL_KEEP_ALIVE, and
+        # the workbook if config.EXCEL_KEEP_WORKBOOKS_OPEN is set
+        run("excel com warm", lambda: write_excel("com", com_path))
+        excel_lib.shutdown()
+
+    xlsx_path = str(Path(tempfile.gettempdir())/"bodycount_bench.xlsx")
+    def write_xlsx():
+        xlsx_template.write_template(xlsx_path)
+        write_excel("xlsx", xlsx_path)
+    run("excel xlsx", write_xlsx)
+
+    # The flat file sinks write next to this path, see export_lib.table_path
+    export_path = str(Path(tempfile.gettempdir())/"bodycount_bench")
+    for exporter in export_lib.EXPORTERS.values():
+        if isinstance(exporter, export_lib.ExcelExporter):
+            continue
+        run(f"export {exporter.name.lower()}", lambda: exporter.export(export_path, bodies, modules, _BenchContext()))
+
+    print(
+        f"{label:>9} {synthetic_design.n_bodies} bodies, {synthetic_design.n_occurrences} occurrences, "
+        f"{synthetic_design.n_components} components, {len(modules)} modules, {len(bodies)} unique bodies",
+        flush=True,
+    )
+
+
+class _BenchContext(export_lib.ExportContext):
+    def step(self, message: str):
+        pass
+
+    def wait_until_closed(self, path: str):
+        pass
+
+
+def _is_fake_excel() -> bool:
+    import win32com
+    return Path(win32com.__file__).is_relative_to(FAKES_PATH)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Design sizes in bodies (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (default: 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs")
+    parser.add_argument("--fixture", action="append", default=[], help="Also run on this recorded design")
+    parser.add_argument("--excel", help="Excel file to write to, required with real Excel")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    print(f"{'design':>9} {'stage':<28} {'time':>11} {'peak':>10}")
+    results: list[StageResult] = []
+    for size in parse_sizes(args.sizes):
+        run_design(
+            str(size),
+            lambda: synthetic.generate_kitchen(size, args.seed),
+            lambda modules: synthetic.module_materials(),
+            synthetic.STEEL_BRASS_NUMBERS,
+            args, results,
+        )
+    for fixture_path in args.fixture:
+        fixture = counting_lib.load_fixture(fixture_path)
+        run_design(
+            Path(fixture_path).name.split(".")[0],
+            lambda: replay.build_design(fixture),
+            lambda modules: replay.module_materials(fixture, modules),
+            [tuple(numbers) for numbers in fixture["steel_brass_numbers"]],
+            args, results,
+        )
+
+    if sys.platform != "win32":
+        import resource
+        print(f"max rss: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10:.1f} MiB")
+
+    if args.json:
+        with open(args.json, "w") as fd:
+            json.dump([asdict(result) for result in results], fd, indent=4)
+
+
+if __name__ == "__main__":
+    main()
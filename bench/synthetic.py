@@ -0,0 +1,173 @@
+"""Generator of synthetic kitchen designs for the benchmarks.
+
+The designs follow the structure BodyCount expects: `G_` groups under the root, modules
+in the groups, and hardware and FSA assemblies in the modules. Module designs and hardware
+are reused many times like in real kitchens, and a few percent of everything is hidden.
+"""
+import random
+
+import adsk.fusion
+
+from dataclasses import dataclass
+
+CATEGORIES = ["Kitchen", "Island", "Pantry", "Wardrobe", "Bathroom", "Hallway", "Laundry", "Office"]
+WOOD_MATERIALS = ["Oak", "Walnut", "Ash", "Birch plywood"]
+STEEL_BRASS_NUMBERS = [(1, 2), (3, 4), (5, 6), (7, 8), (11, 12), (21, 22), (31, 32)]
+
+WOOD_PARTS = ["1.Side", "2.Back", "3.Shelf", "4.Bottom", "5.Top", "6.Front", "7.Plinth", "8.Rail",
+              "12.Door", "14.Drawer front", "15.Drawer side", "16.Divider"]
+DETAIL_PARTS = ["Steel hinge", "Brass hinge", "Steel handle", "Brass knob", "Steel rail",
+                "Brass escutcheon", "Steel shelf pin"]
+FSA_PARTS = ["9.Drawer runner", "9.Soft close", "9.Lift system", "9.Waste bin pull-out"]
+OTHER_PARTS = ["Glass pane", "LED strip", "Sink", "Worktop"]
+IGNORED_PARTS = ["Body1", "Body23", "delete old side", "Delete"]
+HARDWARE_PARTS = ["Screw 4x30", "Dowel 8x35", "Cam lock", "Runner half", "Damper"]
+MATERIALS = ["Steel", "Brass", "Aluminum", "Glass", "Paint/Enamel Glossy (White)"]
+
+HIDDEN_RATIO = 0.03
+MODULE_TYPES_PER_BODY = 1 / 500
+MIN_MODULE_TYPES = 10
+MAX_MODULE_TYPES = 400
+
+
+@dataclass
+class SyntheticDesign:
+    design: adsk.fusion.Design
+    # Bodies visited by a full walk of the design, including hidden ones
+    n_bodies: int
+    n_occurrences: int
+    n_components: int
+
+
+class _Generator:
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+        self.n_components = 0
+
+    def component(self, name: str) -> adsk.fusion.Component:
+        self.n_components += 1
+        return adsk.fusion.Component(name)
+
+    def is_shown(self) -> bool:
+        return self.random.random() >= HIDDEN_RATIO
+
+    def prefixed(self, name: str) -> str:
+        # Parts copied from other projects keep a "97.<project>" prefix
+        if self.random.random() < 0.05:
+            return f"97.{self.random.randint(100, 999)} {name}"
+        return name
+
+    def detail_name(self) -> str:
+        number = self.random.choice(STEEL_BRASS_NUMBERS)[self.random.randint(0, 1)]
+        if self.random.random() < 0.2:
+            number = self.random.randint(40, 60)
+        return f"10.{number} {self.random.choice(DETAIL_PARTS)}"
+
+    def hardware(self, n: int) -> list[tuple[adsk.fusion.Component, int]]:
+        """Creates small assemblies of hardware, as (component, bodies per instance)."""
+        parts = []
+        for i in range(n):
+            name = self.random.choice([self.detail_name(), self.random.choice(FSA_PARTS)])
+            component = self.component(f"{self.prefixed(name)} v{self.random.randint(1, 9)}")
+            n_bodies = self.random.randint(1, 6)
+            for j in range(n_bodies):
+                component.add_body(
+                    self.random.choice(HARDWARE_PARTS + IGNORED_PARTS[:1]),
+                    self.random.choice(MATERIALS),
+                    self.is_shown(),
+                )
+            parts.append((component, n_bodies))
+        return parts
+
+    def module(self, index: int, hardware: list[tuple[adsk.fusion.Component, int]]) -> tuple[adsk.fusion.Component, int]:
+        """Creates a module design, returns it with its number of bodies per instance."""
+        width = self.random.choice([30, 40, 45, 60, 80, 90, 120])
+        kind = self.random.choice(["Base cabinet", "Wall cabinet", "Tall cabinet", "Drawer unit", "Corner unit"])
+        component = self.component(f"{kind} {width}x{self.random.choice([72, 90, 210])} #{index}")
+
+        n_bodies = 0
+        for j in range(self.random.randint(8, 30)):
+            name = self.random.choice(WOOD_PARTS * 4 + OTHER_PARTS + IGNORED_PARTS)
+            if self.random.random() < 0.1:
+                name = self.detail_name()
+            component.add_body(self.prefixed(name), self.random.choice(WOOD_MATERIALS), self.is_shown())
+            n_bodies += 1
+
+        for j in range(self.random.randint(2, 12)):
+            part, part_bodies = self.random.choice(hardware)
+            component.add_occurrence(
+                f"{part.name}:{j + 1}",
+                part,
+                self.is_shown(),
+                (self.random.random() * width, 0, 0),
+            )
+            n_bodies += part_bodies
+
+        return component, n_bodies
+
+
+def generate_kitchen(n_bodies: int, seed: int = 0) -> SyntheticDesign:
+    """Generates a design with about `n_bodies` bodies, counted over every occurrence.
+
+    @param n_bodies The number of bodies to generate, the result has slightly more.
+    @param seed Seed for the random generator, the same seed gives the same design.
+
+    @return The generated design.
+    """
+    generator = _Generator(seed)
+    rand = generator.random
+
+    n_module_types = min(MAX_MODULE_TYPES, max(MIN_MODULE_TYPES, int(n_bodies * MODULE_TYPES_PER_BODY)))
+    hardware = generator.hardware(max(20, n_module_types // 4))
+    module_types = [generator.module(i, hardware) for i in range(n_module_types)]
+
+    root = generator.component("Kitchen project")
+    n_groups = min(len(CATEGORIES) * 3, max(1, n_bodies // 2000))
+    groups = []
+    for i in range(n_groups):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        group = generator.component(f"G_{category}")
+        root.add_occurrence(f"G_{category}:{i + 1}", group, True, (i * 500, 0, 0))
+        groups.append(group)
+
+    total_bodies = 0
+    n_occurrences = n_groups
+    instances: dict[str, int] = {}
+    while total_bodies < n_bodies:
+        group = rand.choice(groups)
+        module, module_bodies = rand.choice(module_types)
+        instances[module.name] = instances.get(module.name, 0) + 1
+        group.add_occurrence(
+            f"{module.name}:{instances[module.name]}",
+            module,
+            generator.is_shown(),
+            (rand.random() * 400, rand.random() * 300, 0),
+        )
+        total_bodies += module_bodies
+        n_occurrences += 1 + len(module._occurrences)
+
+    # Imported models that were never put into a group
+    for i in range(max(1, n_groups // 4)):
+        loose = generator.component(f"Imported model {i + 1} v2")
+        for j in range(10):
+            loose.add_body(f"Body{j + 1}", "Steel")
+        root.add_occurrence(f"Imported model {i + 1} v2:1", loose)
+        total_bodies += 10
+        n_occurrences += 1
+    root.add_body("Floor reference", "Paint/Enamel Glossy (White)")
+    total_bodies += 1
+
+    return SyntheticDesign(
+        design=adsk.fusion.Design(root, f"Synthetic kitchen {n_bodies}"),
+        n_bodies=total_bodies,
+        n_occurrences=n_occurrences,
+        n_components=generator.n_components,
+    )
+
+
+def module_materials() -> dict[str, tuple[str, str]]:
+    """The (steel/brass, wood) material of each category, as picked in the count dialog."""
+    return {
+        category: (["Steel", "Brass"][i % 2], WOOD_MATERIALS[i % len(WOOD_MATERIALS)])
+        for i, category in enumerate(CATEGORIES)
+    }
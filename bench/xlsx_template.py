@@ -0,0 +1,73 @@
+"""Writes a minimal workbook with the LinkFusion sheet and its tables, for timing the xlsx backend."""
+import zipfile
+
+from pathlib import Path
+
+TABLES = {
+    "IndividualParts": ("A", "C", ["Name", "Count", "Material"]),
+    "ModulesParts": ("E", "I", ["Category", "Id", "Module", "Name", "Count"]),
+}
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/tables/table1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.table+xml"/>
+<Override PartName="/xl/tables/table2.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.table+xml"/>
+</Types>"""
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="LinkFusion" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+</Relationships>"""
+
+SHEET_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/table" Target="../tables/table1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/table" Target="../tables/table2.xml"/>
+</Relationships>"""
+
+
+def write_template(path: str | Path):
+    """Writes a workbook with empty IndividualParts and ModulesParts tables on a LinkFusion sheet."""
+    headers = "".join(
+        f'<c r="{chr(ord(first) + i)}1" t="inlineStr"><is><t>{header}</t></is></c>'
+        for first, _, columns in TABLES.values()
+        for i, header in enumerate(columns)
+    )
+    sheet = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<dimension ref="A1:I2"/><sheetData><row r="1">{headers}</row></sheetData>'
+        '<tableParts count="2"><tablePart r:id="rId1"/><tablePart r:id="rId2"/></tableParts></worksheet>'
+    )
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("[Content_Types].xml", CONTENT_TYPES)
+        zip_file.writestr("_rels/.rels", ROOT_RELS)
+        zip_file.writestr("xl/workbook.xml", WORKBOOK)
+        zip_file.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS)
+        zip_file.writestr("xl/worksheets/sheet1.xml", sheet)
+        zip_file.writestr("xl/worksheets/_rels/sheet1.xml.rels", SHEET_RELS)
+        for i, (name, (first, last, columns)) in enumerate(TABLES.items()):
+            table_columns = "".join(f'<tableColumn id="{j + 1}" name="{column}"/>' for j, column in enumerate(columns))
+            zip_file.writestr(f"xl/tables/table{i + 1}.xml", (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<table xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" id="{i + 1}" '
+                f'name="{name}" displayName="{name}" ref="{first}1:{last}2">'
+                f'<autoFilter ref="{first}1:{last}2"/><tableColumns count="{len(columns)}">{table_columns}</tableColumns>'
+                '<tableStyleInfo name="TableStyleMedium2" showRowStripes="1"/></table>'
+            ))
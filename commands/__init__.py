@@ -5,12 +5,18 @@
 from .show_ungrouped import entry as show_ungrouped
 from .count_bodies import entry as count_bodies
 from .settings import entry as settings
+from .record_design import entry as record_design
+from .batch_count import entry as batch_count
+from .show_groups import entry as show_groups
 
 # Fusion will automatically call the start() and stop() functions.
 commands = [
     show_ungrouped,
     count_bodies,
-    settings
+    settings,
+    record_design,
+    batch_count,
+    show_groups,
 ]
 
 
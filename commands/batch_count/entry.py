@@ -0,0 +1,299 @@
+import adsk.core
+import adsk.fusion
+import functools
+import os
+import time
+import traceback
+
+from dataclasses import dataclass
+from collections.abc import Callable
+
+from ...lib import fusionAddInUtils as futil
+from ...lib import counting_lib, export_lib, settings_lib
+from ... import config
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_ID = f"{config.COMPANY_NAME}_{config.ADDIN_NAME}_batch_count"
+CMD_NAME = "Batch Count"
+CMD_DESCRIPTION = "Count the bodies of several designs and export each of them with its own settings"
+
+IS_PROMOTED = False
+
+WORKSPACE_ID = "FusionSolidEnvironment"
+PANEL_ID = "BodyCount"
+
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "")
+
+SOURCE_OPEN_DOCUMENTS = "Open documents"
+SOURCE_ACTIVE_FOLDER = "Designs in the active Data Panel folder"
+
+
+@dataclass
+class DesignSource:
+    """A design to count, opened when its turn comes."""
+    name: str
+    # Returns the design, and a function that closes it again if it was opened for the batch
+    open: Callable[[], tuple[adsk.fusion.Design, Callable[[], None] | None]]
+
+
+@dataclass
+class DesignResult:
+    name: str
+    status: str = "waiting"
+    count_seconds: float | None = None
+    job: export_lib.ExportJob | None = None
+
+
+# The designs of the running batch, and its progress dialog
+results: list[DesignResult] = []
+progress_dialog: adsk.core.ProgressDialog | None = None
+
+
+def start():
+    futil.log("Hello from batch_count")
+
+    cmd_def = ui.commandDefinitions.addButtonDefinition(
+        CMD_ID, CMD_NAME, CMD_DESCRIPTION, ICON_FOLDER
+    )
+
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+    # Create panel if it doesn't already exist
+    if (panel := workspace.toolbarPanels.itemById(PANEL_ID)) is None:
+        panel = workspace.toolbarPanels.add(PANEL_ID, "BodyCount")
+
+    control = panel.controls.addCommand(cmd_def)
+    control.isPromoted = IS_PROMOTED
+
+
+def stop():
+    futil.log("Goodbye from batch_count")
+
+    cmd_def = ui.commandDefinitions.itemById(CMD_ID)
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.itemById(CMD_ID)
+
+    if cmd_def:
+        cmd_def.deleteMe()
+
+    if control:
+        control.deleteMe()
+
+    # Delete panel if this was the last command
+    if panel and len(panel.controls) == 0:
+        panel.deleteMe()
+
+
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log("Creating batch_count")
+
+    inputs = args.command.commandInputs
+    inputs.addTextBoxCommandInput(
+        '', '',
+        'Counts the bodies of each design and exports them like Count Bodies would, with the '
+        'materials, export format and file last used for that design. Designs that have never '
+        'been exported with Count Bodies are skipped.',
+        3, True
+    )
+    source_dropdown = inputs.addDropDownCommandInput('source', 'Designs', adsk.core.DropDownStyles.TextListDropDownStyle)
+    source_dropdown.listItems.add(SOURCE_OPEN_DOCUMENTS, True)
+    source_dropdown.listItems.add(SOURCE_ACTIVE_FOLDER, False)
+
+    futil.add_handler(args.command.execute, command_execute)
+
+
+def open_document_sources() -> list[DesignSource]:
+    sources = []
+    for document in app.documents:
+        design = adsk.fusion.Design.cast(document.products.itemByProductType('DesignProductType'))
+        if design is not None:
+            sources.append(DesignSource(document.name, lambda design=design: (design, None)))
+    return sources
+
+
+def open_data_file(data_file: adsk.core.DataFile) -> tuple[adsk.fusion.Design, Callable[[], None] | None]:
+    # Designs that are open already are used as they are, and left open
+    for document in app.documents:
+        if document.isSaved and document.dataFile.id == data_file.id:
+            return adsk.fusion.Design.cast(document.products.itemByProductType('DesignProductType')), None
+
+    document = app.documents.open(data_file, False)
+    design = adsk.fusion.Design.cast(document.products.itemByProductType('DesignProductType'))
+    return design, lambda: document.close(False)
+
+
+def active_folder_sources() -> list[DesignSource]:
+    folder = app.data.activeFolder
+    return [
+        DesignSource(data_file.name, functools.partial(open_data_file, data_file))
+        for data_file in folder.dataFiles
+        if data_file.fileExtension == "f3d"
+    ]
+
+
+def create_export_job(
+    design: adsk.fusion.Design,
+    renamer: counting_lib.DetailRenamer,
+) -> export_lib.ExportJob:
+    """Counts the modules of the design and creates the export job for them, with the
+    settings stored in the design.
+
+    @note Raises ValueError with the reason if the design can't be exported.
+    """
+    file_data = settings_lib.load_file_data(design)
+    if file_data.excel_path is None:
+        raise ValueError("never exported with Count Bodies")
+
+    exporter = export_lib.get_exporter(file_data.export_format)
+    if not exporter.is_valid_path(file_data.excel_path):
+        raise ValueError(f"can't export to {file_data.excel_path}")
+
+    # Storing the counted modules would mark the document as modified, so they're only
+    # stored in documents that already are
+    modules = counting_lib.count_modules(design, save_cache=design.parentDocument.isModified)
+
+    module_materials = {
+        category: (module.detail_material, module.wood_material)
+        for category, module in file_data.modules.items()
+        if module.detail_material is not None and module.wood_material is not None
+    }
+    if missing := sorted({module.category for module in modules} - module_materials.keys()):
+        raise ValueError(f"no materials selected for {', '.join(missing)}")
+
+    return export_lib.ExportJob(
+        exporter,
+        str(file_data.excel_path),
+        modules,
+        functools.partial(counting_lib.collect_bodies, modules, module_materials, renamer),
+        on_event=export_event_received,
+        is_cancelled=batch_cancelled,
+    )
+
+
+@futil.profiled
+def command_execute(args: adsk.core.CommandEventArgs):
+    global results, progress_dialog
+    inputs = args.command.commandInputs
+    source = adsk.core.DropDownCommandInput.cast(inputs.itemById('source')).selectedItem.name
+
+    sources = open_document_sources() if source == SOURCE_OPEN_DOCUMENTS else active_folder_sources()
+    if not sources:
+        ui.messageBox("There are no designs to count.", CMD_NAME)
+        return
+
+    with futil.profile("load_settings"):
+        shared_data = settings_lib.load_shared_data()
+    # Shared by every design, so each detail part name is only renamed once per batch
+    renamer = counting_lib.DetailRenamer(shared_data.steel_to_brass, shared_data.brass_to_steel)
+
+    # Every design is counted, and then exported
+    results = [DesignResult(design_source.name) for design_source in sources]
+    progress_dialog = ui.createProgressDialog()
+    progress_dialog.isCancelButtonShown = True
+    progress_dialog.show(CMD_NAME, "Counting %v of %m", 0, 2 * len(sources), 0)
+
+    worker = export_lib.get_export_worker()
+    for i, (design_source, result) in enumerate(zip(sources, results)):
+        # Lets the dialog redraw and notice the cancel button between designs
+        adsk.doEvents()
+        if progress_dialog.wasCancelled:
+            cancel_batch()
+            break
+
+        progress_dialog.message = f"Counting {design_source.name}"
+        start = time.perf_counter()
+        close = None
+        try:
+            with futil.profile("count_design"):
+                design, close = design_source.open()
+                result.job = create_export_job(design, renamer)
+        except ValueError as e:
+            result.status = f"skipped, {e}"
+        except Exception:
+            futil.log(f"Failed to count {design_source.name}\n{traceback.format_exc()}", adsk.core.LogLevels.ErrorLogLevel)
+            result.status = "failed to count"
+        finally:
+            result.count_seconds = time.perf_counter() - start
+            if close is not None:
+                close()
+
+        if result.job is not None:
+            result.status = "exporting"
+            worker.submit(result.job)
+        progress_dialog.progressValue = 2 * i + 1
+
+    update_progress()
+
+
+def cancel_batch():
+    for result in results:
+        if result.job is not None and result.job.seconds is None:
+            result.job.cancel()
+        elif result.status == "waiting":
+            result.status = "cancelled"
+
+
+def batch_cancelled() -> bool:
+    """Polled by the export worker, so that exports stuck in Excel are cancelled too."""
+    return progress_dialog is not None and progress_dialog.wasCancelled
+
+
+def export_event_received(event: export_lib.ExportEvent):
+    if event.kind == "file_locked":
+        button = ui.messageBox(
+            f"{event.message} is probably already open. Please close the file and try again.",
+            "Failed to open file",
+            adsk.core.MessageBoxButtonTypes.RetryCancelButtonType,
+        )
+        event.job.answer_file_locked(button != adsk.core.DialogResults.DialogCancel)
+        return
+    if event.kind == "progress":
+        return
+
+    result = next((result for result in results if result.job is event.job), None)
+    if result is None:
+        return
+    result.status = {"done": "exported", "cancelled": "cancelled"}.get(event.kind, "failed to export")
+    if event.kind == "failed":
+        futil.log(f"Export to {event.job.path} failed\n{event.message}", adsk.core.LogLevels.ErrorLogLevel)
+    update_progress()
+
+
+def update_progress():
+    """Shows how many designs are finished, and the summary once every design is."""
+    global progress_dialog
+    if progress_dialog is None:
+        return
+
+    n_finished = sum(result.status not in ("waiting", "exporting") for result in results)
+    progress_dialog.progressValue = len(results) + n_finished
+    progress_dialog.message = f"Exported {n_finished} of {len(results)} designs"
+    if n_finished < len(results):
+        return
+
+    progress_dialog.hide()
+    progress_dialog = None
+    summary = format_summary(results)
+    futil.log(summary)
+    ui.messageBox(summary, CMD_NAME)
+
+
+def format_summary(results: list[DesignResult]) -> str:
+    def seconds(value: float | None) -> str:
+        return "-" if value is None else f"{value:.1f} s"
+
+    lines = [f"{'Design':<32} {'Count':>8} {'Export':>8}  Status"]
+    for result in results:
+        lines.append(
+            f"{result.name[:32]:<32} {seconds(result.count_seconds):>8} "
+            f"{seconds(result.job.seconds if result.job else None):>8}  {result.status}"
+        )
+    total = sum(result.count_seconds or 0 for result in results)
+    lines.append(f"Counted {len(results)} designs in {total:.1f} s")
+    return '\n'.join(lines)
@@ -1,16 +1,13 @@
 import adsk.core
 import adsk.fusion
 import os
-import re
 
 from ...lib import fusionAddInUtils as futil
-from ...lib import counting_lib, excel_lib, settings_lib
+from ...lib import counting_lib, export_lib, settings_lib
 from ... import config
 
 from pathlib import Path
 
-from exceltypes import Workbook
-
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -27,6 +24,15 @@ ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resource
 
 ATTR_GRP = f"{config.COMPANY_NAME}_{config.ADDIN_NAME}"
 
+# Commands that finish without changing the design, so they don't invalidate the cached
+# modules. Any other command might have changed it.
+READ_ONLY_COMMAND_IDS = {
+    "SelectCommand", "PanCommand", "OrbitCommand", "FreeOrbitCommand", "ZoomCommand", "FitCommand",
+}
+
+# The progress dialog of each running export, by id of its job
+export_dialogs: dict[int, adsk.core.ProgressDialog] = {}
+
 
 def start():
     futil.log("Hello from count_bodies")
@@ -42,6 +48,8 @@ def start():
         root.customGraphicsGroups.item(0).deleteMe()
 
     futil.add_handler(cmd_def.commandCreated, command_created)
+    futil.add_handler(ui.commandTerminated, command_terminated)
+    futil.add_handler(app.documentClosing, document_closing)
 
     workspace = ui.workspaces.itemById(WORKSPACE_ID)
 
@@ -82,20 +90,40 @@ def get_input_file_path() -> Path | None:
         return Path(open_dialog.filename)
 
 
+def command_terminated(args: adsk.core.ApplicationCommandEventArgs):
+    if args.terminationReason != adsk.core.CommandTerminationReason.CompletedTerminationReason:
+        return
+    if args.commandId.startswith(ATTR_GRP) or args.commandId in READ_ONLY_COMMAND_IDS:
+        return
+    if (design := adsk.fusion.Design.cast(app.activeProduct)) is not None:
+        counting_lib.mark_design_modified(design)
+
+
+def document_closing(args: adsk.core.DocumentEventArgs):
+    counting_lib.forget_document(args.document.creationId)
+
+
+@futil.profiled
 def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.log("Creating count_bodies")
 
     product = app.activeProduct
     design = adsk.fusion.Design.cast(product)
-    rootComp = design.rootComponent
 
     args.command.setDialogMinimumSize(600, 100)
 
     inputs = args.command.commandInputs
 
-    shared_data = settings_lib.load_shared_data()
-    file_data = settings_lib.load_file_data()
-    modules = counting_lib.collect_modules_under(rootComp)
+    with futil.profile("load_settings"):
+        shared_data = settings_lib.load_shared_data()
+        file_data = settings_lib.load_file_data()
+    # Only the categories are needed for the dialog, the bodies are counted on execute
+    categories = counting_lib.collect_categories_under(futil.trace_api(design.rootComponent))
+
+    format_dropdown = inputs.addDropDownCommandInput('export_format', 'Export format', adsk.core.DropDownStyles.TextListDropDownStyle)
+    selected_format = export_lib.get_exporter(file_data.export_format).name
+    for export_format in export_lib.EXPORTERS:
+        format_dropdown.listItems.add(export_format, export_format == selected_format)
 
     path_table = inputs.addTableCommandInput('', '', 3, '3:6:2')
     excel_file_path = inputs.addStringValueInput('excel_path', '', str(file_data.excel_path))
@@ -112,8 +140,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     module_table.addCommandInput(inputs.addTextBoxCommandInput('', '', '<b>Steel/Brass</b>', 1, True), 0, 1)
     module_table.addCommandInput(inputs.addTextBoxCommandInput('', '', '<b>Wood material</b>', 1, True), 0, 2)
 
-    groups = {module.category for module in modules}
-    for i, group in enumerate(groups):
+    for i, group in enumerate(categories):
         name_inp = inputs.addTextBoxCommandInput('', '', group, 1, True)
         detail_dropdown = inputs.addDropDownCommandInput('', '', adsk.core.DropDownStyles.TextListDropDownStyle)
         wood_dropdown = inputs.addDropDownCommandInput('', '', adsk.core.DropDownStyles.TextListDropDownStyle)
@@ -154,7 +181,7 @@ def validate_inputs(args: adsk.core.ValidateInputsEventArgs):
 
     excel_path_inp = adsk.core.StringValueCommandInput.cast(inputs.itemById('excel_path'))
     excel_path = Path(excel_path_inp.value)
-    is_valid_excel_path = excel_path.is_absolute() and excel_path.is_file()
+    is_valid_excel_path = get_exporter(inputs).is_valid_path(excel_path)
 
     args.areInputsValid = dropdowns_filled and is_valid_excel_path
 
@@ -184,6 +211,7 @@ def update_file_data(inputs: adsk.core.CommandInputs):
 
     excel_path_inp = adsk.core.StringValueCommandInput.cast(inputs.itemById('excel_path'))
     file_data.excel_path = Path(excel_path_inp.value)
+    file_data.export_format = get_exporter(inputs).name
     settings_lib.save_file_data(file_data)
 
 
@@ -199,31 +227,8 @@ def input_changed(args: adsk.core.InputChangedEventArgs):
         excel_path_input.value = str(new_path)
 
 
-def fix_detail_number(body: counting_lib.Body, material: str) -> counting_lib.Body:
-    shared_data = settings_lib.load_shared_data()
-    EXTRACT_SUB_NUMBER_PATTERN = re.compile(r"^((?:9[7-9]\..*? )?10\.)(\d+)")
-
-    if (match := EXTRACT_SUB_NUMBER_PATTERN.match(body.name)) is None:
-        return body
-    
-    sub_num = int(match.group(2))
-
-    new_num = sub_num
-    for (steel_num, brass_num) in shared_data.steel_brass_numbers:
-        if material == "Steel" and brass_num == sub_num:
-            new_num = steel_num
-        elif material == "Brass" and steel_num == sub_num:
-            new_num = brass_num
-
-    if new_num == sub_num:
-        return body
-
-    body.name = re.sub(EXTRACT_SUB_NUMBER_PATTERN, rf"\g<1>{new_num}", body.name)
-    body.name = re.sub(r"(Brass|Steel)", material, body.name)
-    return body
-
-
-def collect_bodies(inputs: adsk.core.CommandInputs, modules: list[counting_lib.Module]) -> list[counting_lib.Body]:
+def get_module_materials(inputs: adsk.core.CommandInputs) -> dict[str, tuple[str, str]]:
+    """Reads the (steel/brass, wood) material selected for each category in the dialog."""
     modules_dict: dict[str, tuple[str, str]] = {}
     modules_table = adsk.core.TableCommandInput.cast(inputs.itemById("modules"))
     for i in range(1, modules_table.rowCount):
@@ -234,49 +239,42 @@ def collect_bodies(inputs: adsk.core.CommandInputs, modules: list[counting_lib.M
             detail_dropdown.selectedItem.name,
             wood_dropdown.selectedItem.name
         )
-
-    MATCH_WOOD_PATTERN = re.compile(r"^(9[7-9]\..*?[ _])?([1-9]|12|1[4-6])\.")
-    MATCH_DETAIL_PATTERN = re.compile(r"^(9[7-9]\..*?[ _])?10\.")
-
-    bodies_dict: dict[tuple[str, str], counting_lib.Body] = {}
-    for module in modules:
-        detail_type, wood_type = modules_dict[module.category]
-
-        for body in module.bodies:
-            material = body.material
-
-            if MATCH_WOOD_PATTERN.match(body.name):
-                material = wood_type
-            elif MATCH_DETAIL_PATTERN.match(body.name):
-                material = detail_type
-                body = fix_detail_number(body, material)
-
-            key = (body.name, material)
-
-            if key not in bodies_dict:
-                bodies_dict[key] = counting_lib.Body(
-                    name=body.name,
-                    count=0,
-                    material=material,
-                )
-            bodies_dict[key].count += body.count
-    
-    bodies = list(bodies_dict.values())
-    counting_lib.human_sort(bodies, key=lambda x: x.name)
-    return bodies
+    return modules_dict
+
+
+def get_exporter(inputs: adsk.core.CommandInputs) -> export_lib.Exporter:
+    """The exporter of the format selected in the dialog."""
+    format_dropdown = adsk.core.DropDownCommandInput.cast(inputs.itemById('export_format'))
+    selected = format_dropdown.selectedItem
+    return export_lib.get_exporter(selected.name if selected is not None else None)
+
+
+def create_export_job(inputs: adsk.core.CommandInputs, modules: list[counting_lib.Module], excel_path: str) -> export_lib.ExportJob:
+    """Reads everything the export needs from the dialog and the settings, so that the
+    export doesn't have to touch the Fusion API."""
+    with futil.profile("load_settings"):
+        shared_data = settings_lib.load_shared_data()
+    module_materials = get_module_materials(inputs)
+    renamer = counting_lib.DetailRenamer(shared_data.steel_to_brass, shared_data.brass_to_steel)
+
+    return export_lib.ExportJob(
+        get_exporter(inputs),
+        excel_path,
+        modules,
+        lambda: counting_lib.collect_bodies(modules, module_materials, renamer),
+        on_event=export_event_received,
+    )
 
 
+@futil.profiled
 def command_execute(args: adsk.core.CommandEventArgs):
     product = app.activeProduct
     design = adsk.fusion.Design.cast(product)
-    rootComp = design.rootComponent
 
     inputs = args.command.commandInputs
-    
-    update_file_data(inputs)
 
-    modules = counting_lib.collect_modules_under(rootComp)
-    bodies = collect_bodies(inputs, modules)
+    with futil.profile("update_file_data"):
+        update_file_data(inputs)
 
     excel_path_input = adsk.core.StringValueCommandInput.cast(inputs.itemById('excel_path'))
     excel_path = excel_path_input.value
@@ -284,16 +282,49 @@ def command_execute(args: adsk.core.CommandEventArgs):
     if excel_path == "":
         return
 
-    try:
-        workbook = excel_lib.open_excel_doc(excel_path)
-    except Exception as e:
-        if adsk.core.DialogResults.DialogCancel in e.args:
-            return
-        raise
-
-    try:
-        excel_lib.write_bodies_to_table(workbook, bodies)
-        excel_lib.write_modules_to_table(workbook, modules)
-        excel_lib.save(workbook, excel_path)
-    finally:
-        excel_lib.close(workbook)
\ No newline at end of file
+    # The modules are cached before collect_bodies renames some of their bodies
+    modules = counting_lib.count_modules(design)
+    job = create_export_job(inputs, modules, excel_path)
+
+    dialog = ui.createProgressDialog()
+    dialog.isCancelButtonShown = True
+    dialog.cancelButtonText = "Cancel"
+    dialog.show(CMD_NAME, f"Exporting to {job.exporter.name}", 0, job.n_steps, 0)
+    export_dialogs[id(job)] = dialog
+    # Polled by the export worker, so that the export is cancelled even while it's stuck
+    job.is_cancelled = lambda: dialog.wasCancelled
+
+    export_lib.get_export_worker().submit(job)
+
+
+def ask_to_close_file(event: export_lib.ExportEvent):
+    """Answers a "file_locked" event by asking the user to close the file."""
+    button = ui.messageBox(
+        f"{event.message} is probably already open. Please close the file and try again.",
+        "Failed to open file",
+        adsk.core.MessageBoxButtonTypes.RetryCancelButtonType,
+    )
+    event.job.answer_file_locked(button != adsk.core.DialogResults.DialogCancel)
+
+
+def export_event_received(event: export_lib.ExportEvent):
+    """Shows the progress of the export and asks the user to close locked files."""
+    job = event.job
+    dialog = export_dialogs.get(id(job))
+
+    if event.kind == "progress":
+        if dialog is not None:
+            dialog.message = event.message
+            dialog.progressValue = event.step
+    elif event.kind == "file_locked":
+        ask_to_close_file(event)
+    else:
+        if dialog is not None:
+            dialog.hide()
+        export_dialogs.pop(id(job), None)
+
+        if event.kind == "failed":
+            futil.log(f"Export to {job.path} failed\n{event.message}", adsk.core.LogLevels.ErrorLogLevel)
+            ui.messageBox(f"Failed to export to {job.path}\n{event.message}", CMD_NAME)
+        elif event.kind == "cancelled":
+            futil.log(f"Export to {job.path} cancelled")
@@ -0,0 +1,118 @@
+import adsk.core
+import adsk.fusion
+import os
+import time
+
+from pathlib import Path
+
+from ...lib import fusionAddInUtils as futil
+from ...lib import counting_lib, settings_lib
+from ... import config
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_ID = f"{config.COMPANY_NAME}_{config.ADDIN_NAME}_record_design"
+CMD_NAME = "Record Design"
+CMD_DESCRIPTION = "Record the structure of the design to a fixture file, for profiling BodyCount without Fusion"
+
+IS_PROMOTED = False
+
+WORKSPACE_ID = "FusionSolidEnvironment"
+PANEL_ID = "BodyCount"
+
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "")
+
+
+def start():
+    futil.log("Hello from record_design")
+
+    cmd_def = ui.commandDefinitions.addButtonDefinition(
+        CMD_ID, CMD_NAME, CMD_DESCRIPTION, ICON_FOLDER
+    )
+
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+    # Create panel if it doesn't already exist
+    if (panel := workspace.toolbarPanels.itemById(PANEL_ID)) is None:
+        panel = workspace.toolbarPanels.add(PANEL_ID, "BodyCount")
+
+    control = panel.controls.addCommand(cmd_def)
+    control.isPromoted = IS_PROMOTED
+
+
+def stop():
+    futil.log("Goodbye from record_design")
+
+    cmd_def = ui.commandDefinitions.itemById(CMD_ID)
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.itemById(CMD_ID)
+
+    if cmd_def:
+        cmd_def.deleteMe()
+
+    if control:
+        control.deleteMe()
+
+    # Delete panel if this was the last command
+    if panel and len(panel.controls) == 0:
+        panel.deleteMe()
+
+
+def get_output_file_path(design: adsk.fusion.Design) -> Path | None:
+    save_dialog = ui.createFileDialog()
+    save_dialog.title = "Save design fixture"
+    save_dialog.filter = "Design fixture (*.json.gz);;All files (*)"
+    save_dialog.initialFilename = f"{design.parentDocument.name}.json.gz"
+    if save_dialog.showSave() == adsk.core.DialogResults.DialogOK:
+        return Path(save_dialog.filename)
+
+
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log("Creating record_design")
+
+    inputs = args.command.commandInputs
+    inputs.addTextBoxCommandInput(
+        '', '',
+        'Records the names, materials and visibility of every component and body in the design. '
+        'The fixture can be used to profile BodyCount on this design without Fusion.',
+        3, True
+    )
+    inputs.addBoolValueInput('include_meshes', 'Include mesh sizes', True, '', False)
+
+    futil.add_handler(args.command.execute, command_execute)
+
+
+def command_execute(args: adsk.core.CommandEventArgs):
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    inputs = args.command.commandInputs
+    include_meshes = adsk.core.BoolValueCommandInput.cast(inputs.itemById('include_meshes')).value
+
+    if (path := get_output_file_path(design)) is None:
+        return
+
+    # The material settings are recorded as well, so collect_bodies can be replayed
+    file_data = settings_lib.load_file_data()
+    module_materials = {
+        category: (module.detail_material, module.wood_material)
+        for category, module in file_data.modules.items()
+        if module.detail_material is not None and module.wood_material is not None
+    }
+    try:
+        steel_brass_numbers = settings_lib.load_shared_data().steel_brass_numbers
+    except RuntimeError:
+        # Shared data path isn't set
+        steel_brass_numbers = []
+
+    start = time.perf_counter()
+    fixture = counting_lib.record_design(design, module_materials, steel_brass_numbers, include_meshes)
+    counting_lib.save_fixture(fixture, path)
+
+    futil.log(
+        f"Recorded {len(fixture['components'])} components to {path} "
+        f"({path.stat().st_size // 1024} kB) in {time.perf_counter() - start:.1f} s"
+    )
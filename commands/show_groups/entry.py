@@ -0,0 +1,151 @@
+import adsk.core
+import adsk.fusion
+import os
+
+from ...lib import fusionAddInUtils as futil
+from ...lib import counting_lib
+from ...lib import custom_graphics_lib
+from ... import config
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_show_groups'
+CMD_NAME = "Show Groups"
+CMD_DESCRIPTION = "Color the bodies of every G_ group, or of every module, to check the grouping before exporting"
+
+IS_PROMOTED = False
+
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'BodyCount'
+
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+selection_graphics = custom_graphics_lib.SelectionGraphicsGroups()
+
+# Snapshot of the groups and modules taken when the dialog is created, so switching
+# between coloring groups and modules doesn't walk the design again
+design_snapshot: counting_lib.DesignSnapshot | None = None
+
+def start():
+    futil.log("Hello from show_groups")
+
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_DESCRIPTION, ICON_FOLDER)
+
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+    # Create panel if it doesn't already exist
+    if (panel := workspace.toolbarPanels.itemById(PANEL_ID)) is None:
+        panel = workspace.toolbarPanels.add(PANEL_ID, "BodyCount")
+
+    control = panel.controls.addCommand(cmd_def)
+    control.isPromoted = IS_PROMOTED
+
+def stop():
+    futil.log("Goodbye from show_groups")
+
+    cmd_def = ui.commandDefinitions.itemById(CMD_ID)
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.itemById(CMD_ID)
+
+    if cmd_def:
+        cmd_def.deleteMe()
+
+    if control:
+        control.deleteMe()
+
+    # Delete panel if this was the last command
+    if panel and len(panel.controls) == 0:
+        panel.deleteMe()
+
+@futil.profiled
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    global design_snapshot
+    futil.log("Creating show_groups")
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    root = futil.trace_api(design.rootComponent)
+
+    # Ungrouped occurrences are never colored, so don't spend time walking them
+    design_snapshot = counting_lib.DesignSnapshot(
+        root,
+        expand=lambda occ, depth: depth > 0 or counting_lib.GRP_PATTERN.match(counting_lib.filter_name(occ.name)) is not None,
+    )
+
+    inputs = args.command.commandInputs
+    inputs.addBoolValueInput('per_module', 'Color each module', True, '', False)
+    table = inputs.addTableCommandInput('table', 'Groups', 3, '3:1:1')
+    table.addCommandInput(inputs.addTextBoxCommandInput('', '', '<b>Group</b>', 1, True), 0, 0)
+    table.addCommandInput(inputs.addTextBoxCommandInput('', '', '<b>Modules</b>', 1, True), 0, 1)
+    table.addCommandInput(inputs.addTextBoxCommandInput('', '', '<b>Bodies</b>', 1, True), 0, 2)
+
+    overlay = show_overlay(design_snapshot, per_module=False)
+    for row, (name, (n_modules, n_bodies)) in enumerate(overlay.items(), start=1):
+        table.addCommandInput(inputs.addTextBoxCommandInput('', '', name, 1, True), row, 0)
+        table.addCommandInput(inputs.addTextBoxCommandInput('', '', str(n_modules), 1, True), row, 1)
+        table.addCommandInput(inputs.addTextBoxCommandInput('', '', str(n_bodies), 1, True), row, 2)
+
+    futil.add_handler(args.command.execute, command_execute)
+    futil.add_handler(args.command.inputChanged, input_changed)
+    futil.add_handler(args.command.destroy, command_destroy)
+
+@futil.profiled
+def show_overlay(snapshot: counting_lib.DesignSnapshot, per_module: bool) -> dict[str, tuple[int, int]]:
+    """Colors the bodies of every G_ group, or of every module, each in its own color.
+
+    Every overlay is filled in one pass over the snapshot, and their meshes are built
+    afterwards with one level of detail for all of them, each as a single mesh.
+
+    @param snapshot A snapshot covering the G_ groups and everything under them.
+    @param per_module Color each module instead of each group.
+
+    @return The number of modules and bodies of each group, by category.
+    """
+    selection_graphics.clear()
+
+    counts: dict[str, tuple[int, int]] = {}
+    for top_lvl_occ in snapshot.children(snapshot.root):
+        if not (match := counting_lib.GRP_PATTERN.match(counting_lib.filter_name(top_lvl_occ.name))):
+            continue
+
+        category = match.group(1)
+        n_group_modules, n_group_bodies = counts.get(category, (0, 0))
+        for module_occ in snapshot.children(top_lvl_occ):
+            name = f"{category} / {counting_lib.filter_name(module_occ.name)}" if per_module else category
+            if (graphics := selection_graphics.get(name)) is None:
+                graphics = selection_graphics.create(name)
+
+            bodies = [body.body for body in snapshot.bodies_under(module_occ)]
+            graphics.add_occ(module_occ.occurrence, bodies)
+            n_group_modules += 1
+            n_group_bodies += len(bodies)
+        counts[category] = (n_group_modules, n_group_bodies)
+
+    # The budget is for everything shown, not for each overlay
+    level_of_detail = custom_graphics_lib.pick_level_of_detail(
+        lambda level: sum(graphics.count_triangles(level) for graphics in selection_graphics.values()),
+        config.HIGHLIGHT_TRIANGLE_BUDGET,
+    )
+    for graphics in selection_graphics.values():
+        graphics.level_of_detail = level_of_detail
+        graphics.show()
+    futil.log(f"Colored {selection_graphics.ngroups} overlays with level of detail: {level_of_detail}")
+
+    return counts
+
+def input_changed(args: adsk.core.InputChangedEventArgs):
+    changed_input = args.input
+
+    if changed_input.id == 'per_module' and design_snapshot is not None:
+        show_overlay(design_snapshot, adsk.core.BoolValueCommandInput.cast(changed_input).value)
+
+def command_execute(args: adsk.core.CommandEventArgs):
+    selection_graphics.clear()
+
+def command_destroy(args: adsk.core.CommandEventArgs):
+    global design_snapshot
+    selection_graphics.clear()
+    design_snapshot = None
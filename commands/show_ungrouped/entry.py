@@ -2,6 +2,8 @@ import adsk.core
 import adsk.fusion
 import os
 
+from dataclasses import dataclass
+
 from ...lib import fusionAddInUtils as futil
 from ...lib import counting_lib
 from ...lib import custom_graphics_lib
@@ -21,14 +23,30 @@ PANEL_ID = 'BodyCount'
 
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
+# Rows of the ungrouped items table. Only one page of inputs exists, the rows are filled
+# from the filtered items whenever the filter or the page changes.
+PAGE_SIZE = 50
+
 selection_graphics = custom_graphics_lib.SelectionGraphicsGroups()
 
+@dataclass
+class UngroupedItem:
+    """Ungrouped occurrences or root bodies with the same name."""
+    name: str
+    count: int
+
+# Every ungrouped item of the design, and the ones matching the filter, and the page shown
+ungrouped_items: list[UngroupedItem] = []
+filtered_items: list[UngroupedItem] = []
+page = 0
+
 def start():
     futil.log("Hello from show_ungrouped")
 
     cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_DESCRIPTION, ICON_FOLDER)
 
     futil.add_handler(cmd_def.commandCreated, command_created)
+    futil.add_handler(app.documentClosing, document_closing)
 
     workspace = ui.workspaces.itemById(WORKSPACE_ID)
 
@@ -58,47 +76,128 @@ def stop():
     if panel and len(panel.controls) == 0:
         panel.deleteMe()
 
+def document_closing(args: adsk.core.DocumentEventArgs):
+    if (mesh_cache := custom_graphics_lib.get_mesh_cache()) is not None:
+        mesh_cache.forget_document(args.document.creationId)
+
+@futil.profiled
 def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.log("Creating show_ungrouped!")
     design = adsk.fusion.Design.cast(app.activeProduct)
-    root = design.rootComponent
+    root = futil.trace_api(design.rootComponent)
 
     selection_graphics.clear()
     g = selection_graphics.create('ungrouped')
     g.set_color(adsk.core.Color.create(255, 0, 0, 100))
 
-    inputs = args.command.commandInputs
-    table = inputs.addTableCommandInput('table', 'Ungrouped Items', 1, '1')
-    i_tbox = 0
+    # Grouped occurrences are never highlighted, so don't spend time walking them
+    snapshot = counting_lib.DesignSnapshot(root, expand=lambda occ, depth: depth > 0 or not occ.name.startswith('G_'))
 
-    for top_lvl_occ in counting_lib.traverse_occurrences(root, depth=0):
+    for top_lvl_occ in snapshot.children(snapshot.root):
         if top_lvl_occ.name.startswith('G_'):
             continue
 
-        g.add_occ(top_lvl_occ)
+        g.add_occ(top_lvl_occ.occurrence, [body.body for body in snapshot.bodies_under(top_lvl_occ)])
 
-        str_inp = inputs.addStringValueInput(f"tbox{i_tbox}", "Tbox", top_lvl_occ.name)
-        str_inp.isReadOnly = True
-        table.addCommandInput(str_inp, i_tbox, 0)
-        i_tbox += 1
+    root_bodies = snapshot.bodies_of(snapshot.root)
+    if len(root_bodies) > 0:
+        g.add_objs(*[body.body for body in root_bodies])
 
-            
-    if len(root.bRepBodies) > 0:
-        visible_bodies = [body for body in root.bRepBodies if body.isVisible]
+    level_of_detail = g.show()
+    futil.log(f"Highlighted ungrouped bodies with level of detail: {level_of_detail}")
 
-        g.add_objs(*visible_bodies)
+    global ungrouped_items
+    ungrouped_items = collect_ungrouped_items(snapshot)
 
-        for obj in visible_bodies:
-            str_inp = inputs.addStringValueInput(f"tbox{i_tbox}", "Tbox", obj.name)
-            str_inp.isReadOnly = True
-            table.addCommandInput(str_inp, i_tbox, 0)
-            i_tbox += 1
+    inputs = args.command.commandInputs
+    inputs.addStringValueInput('filter', 'Filter', '')
+
+    table = inputs.addTableCommandInput('table', 'Ungrouped Items', 2, '4:1')
+    table.maximumVisibleRows = min(PAGE_SIZE, 20)
+    for row in range(PAGE_SIZE):
+        name_inp = inputs.addStringValueInput(f"name{row}", "Name", '')
+        name_inp.isReadOnly = True
+        count_inp = inputs.addStringValueInput(f"count{row}", "Count", '')
+        count_inp.isReadOnly = True
+        table.addCommandInput(name_inp, row, 0)
+        table.addCommandInput(count_inp, row, 1)
+
+    page_table = inputs.addTableCommandInput('', '', 3, '1:3:1')
+    page_table.addCommandInput(inputs.addBoolValueInput('previous_page', 'Previous', False), 0, 0)
+    page_table.addCommandInput(inputs.addTextBoxCommandInput('page', '', '', 1, True), 0, 1)
+    page_table.addCommandInput(inputs.addBoolValueInput('next_page', 'Next', False), 0, 2)
+    page_table.tablePresentationStyle = adsk.core.TablePresentationStyles.transparentBackgroundTablePresentationStyle
+    page_table.minimumVisibleRows = 1
+    page_table.maximumVisibleRows = 1
+
+    apply_filter(inputs, '')
 
     futil.add_handler(args.command.execute, command_execute)
+    futil.add_handler(args.command.inputChanged, input_changed)
     futil.add_handler(args.command.destroy, command_destroy)
 
+def collect_ungrouped_items(snapshot: counting_lib.DesignSnapshot) -> list[UngroupedItem]:
+    """Counts the ungrouped occurrences and root bodies by name, in the order they are found."""
+    items: dict[str, UngroupedItem] = {}
+
+    def add(name: str):
+        if name not in items:
+            items[name] = UngroupedItem(name, 0)
+        items[name].count += 1
+
+    for top_lvl_occ in snapshot.children(snapshot.root):
+        if not top_lvl_occ.name.startswith('G_'):
+            add(counting_lib.filter_name(top_lvl_occ.name))
+    for body in snapshot.bodies_of(snapshot.root):
+        add(body.name)
+    return list(items.values())
+
+def apply_filter(inputs: adsk.core.CommandInputs, text: str):
+    """Shows the first page of the items whose name contains `text`, ignoring case."""
+    global filtered_items, page
+    text = text.casefold()
+    filtered_items = [item for item in ungrouped_items if text in item.name.casefold()]
+    page = 0
+    show_page(inputs)
+
+def show_page(inputs: adsk.core.CommandInputs):
+    """Fills the rows of the table with the filtered items of the current page."""
+    n_pages = max(1, -(-len(filtered_items) // PAGE_SIZE))
+    items = filtered_items[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+
+    for row in range(PAGE_SIZE):
+        name_inp = adsk.core.StringValueCommandInput.cast(inputs.itemById(f"name{row}"))
+        count_inp = adsk.core.StringValueCommandInput.cast(inputs.itemById(f"count{row}"))
+        is_used = row < len(items)
+        name_inp.isVisible = count_inp.isVisible = is_used
+        name_inp.value = items[row].name if is_used else ''
+        count_inp.value = str(items[row].count) if is_used else ''
+
+    page_text = adsk.core.TextBoxCommandInput.cast(inputs.itemById('page'))
+    page_text.text = f"Page {page + 1} of {n_pages}, {len(filtered_items)} of {len(ungrouped_items)} names"
+    inputs.itemById('previous_page').isEnabled = page > 0
+    inputs.itemById('next_page').isEnabled = page < n_pages - 1
+
+def input_changed(args: adsk.core.InputChangedEventArgs):
+    global page
+    inputs = args.inputs
+    changed_input = args.input
+
+    # The highlight stays as it is, only the rows of the table change
+    if changed_input.id == 'filter':
+        apply_filter(inputs, adsk.core.StringValueCommandInput.cast(changed_input).value)
+    elif changed_input.id == 'previous_page' and page > 0:
+        page -= 1
+        show_page(inputs)
+    elif changed_input.id == 'next_page' and (page + 1) * PAGE_SIZE < len(filtered_items):
+        page += 1
+        show_page(inputs)
+
 def command_execute(args: adsk.core.CommandEventArgs):
     selection_graphics.clear()
 
 def command_destroy(args: adsk.core.CommandEventArgs):
-    selection_graphics.clear()
\ No newline at end of file
+    global ungrouped_items, filtered_items
+    selection_graphics.clear()
+    ungrouped_items = []
+    filtered_items = []
\ No newline at end of file
@@ -9,4 +9,75 @@
 DEBUG = True
 
 ADDIN_NAME = "BodyCount"
-COMPANY_NAME = 'Vermland'
\ No newline at end of file
+COMPANY_NAME = 'Vermland'
+
+# Count the bodies of each unique component once and multiply by its number of
+# instances, instead of visiting every occurrence. Much faster on designs that reuse
+# the same components many times. Light bulbs changed in a single instance are only
+# seen on the occurrences directly in a module, and below those that were changed
+# themselves, see counting_lib.ComponentCounter.
+COUNT_UNIQUE_COMPONENTS = False
+
+# Keep the bodies counted in each module of the open designs, and only count the modules
+# under components that changed since the last count, see counting_lib.ModuleCache.
+COUNT_CHANGED_MODULES_ONLY = True
+
+# Time the phases of every command run. A summary is written to the log and a JSON
+# report to PROFILE_REPORT_DIR, or to a BodyCount/profiles folder in the temp folder
+# if it is None.
+PROFILE = False
+PROFILE_REPORT_DIR = None
+
+# Count and time every Fusion API property read and call made by the commands, per
+# profiling phase. Makes the commands a lot slower, only meant for finding out where
+# the API is used. Reported with the profiling summary and report, see PROFILE.
+TRACE_API = False
+
+# How count_bodies writes the Excel file. "com" opens the file in Excel through COM
+# automation, "xlsx" rewrites the tables in .xlsx and .xlsm files directly, without
+# starting Excel. Other files, like .xls, are always written through Excel.
+EXCEL_BACKEND = "com"
+
+# Keep Excel running between exports, so that exporting again doesn't have to start it.
+# Each workbook is still closed once it's saved, see EXCEL_KEEP_WORKBOOKS_OPEN.
+EXCEL_KEEP_ALIVE = True
+
+# Also keep the exported workbooks open between exports, so that exporting the same
+# design again doesn't have to open the file. The file stays locked for other programs
+# until the add-in is stopped. Only used with EXCEL_KEEP_ALIVE.
+EXCEL_KEEP_WORKBOOKS_OPEN = False
+
+# Only write the rows of the Excel tables that changed since the last export, instead
+# of rewriting the tables, so that Excel only recalculates the formulas depending on
+# those rows. Only used with the "com" backend.
+EXCEL_INCREMENTAL_UPDATE = True
+
+# Tables with more rows than this are rewritten instead of updated incrementally, since
+# that needs the old and the new rows in memory at once.
+EXCEL_INCREMENTAL_MAX_ROWS = 100_000
+
+# Rows passed to Excel per call when a table is rewritten. Bigger blocks need fewer
+# calls, smaller ones less memory.
+EXCEL_WRITE_BLOCK_ROWS = 10_000
+
+# Threads writing the exports that don't go through Excel, like CSV, at the same time.
+# Exports through Excel always run one at a time.
+EXPORT_POOL_SIZE = 4
+
+# How often the main thread checks whether running exports were cancelled in their
+# progress dialogs. Exports can report nothing for a long time, e.g. while Excel opens a
+# large workbook, so the check doesn't wait for them.
+EXPORT_CANCEL_POLL_SECONDS = 0.25
+
+# Memory the display meshes of highlighted bodies may use, so showing the same bodies
+# again doesn't fetch their meshes from Fusion. The least recently used meshes are
+# dropped first. 0 turns the cache off.
+MESH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Triangles the highlights of Show Ungrouped Components may draw. With more bodies than
+# fit, they are drawn with coarser meshes, their bounding boxes or the bounding boxes of
+# their occurrences, whichever is the most detailed that fits, so the viewport stays
+# interactive. Bodies with a cached mesh count with its triangles, the others are
+# estimated at 2000 triangles, or 200 for coarse meshes. See
+# custom_graphics_lib.pick_level_of_detail and TRIANGLES_PER_BODY.
+HIGHLIGHT_TRIANGLE_BUDGET = 2_000_000
@@ -1,2 +1,10 @@
 from .traverse import *
-from .human_sort import human_sort
\ No newline at end of file
+from .human_sort import human_sort, human_merge
+from .snapshot import DesignSnapshot, OccurrenceRecord, BodyRecord
+from .component_counts import ComponentCounter
+from .module_cache import ModuleCache
+from .naming import classify_name, filter_name, NameInfo
+from .materials import collect_bodies, fix_detail_number, DetailRenamer
+from .fixture import record_design, save_fixture, load_fixture
+from .result_cache import load_cached_modules, save_cached_modules, mark_design_modified, design_fingerprint, cache_variant
+from .cached_count import count_modules, forget_document
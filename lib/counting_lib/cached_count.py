@@ -0,0 +1,50 @@
+import adsk.fusion
+
+from ... import config
+from .component_counts import ComponentCounter
+from .module_cache import ModuleCache
+from .traverse import collect_modules_under
+from .result_cache import load_cached_modules, save_cached_modules, cache_variant
+from ..excel_lib import Module
+from .. import fusionAddInUtils as futil
+
+# The bodies counted in each module of the designs counted so far, by creationId of their
+# document, see config.COUNT_CHANGED_MODULES_ONLY
+_module_caches: dict[str, ModuleCache] = {}
+
+
+def count_modules(design: adsk.fusion.Design, save_cache: bool = True) -> list[Module]:
+    """Loads the modules cached in the design, or counts them if the design has changed.
+
+    @note Must be called before collect_bodies, which renames some of the bodies.
+
+    @param design The design to count.
+    @param save_cache Store the counted modules in the design, see save_cached_modules.
+                      Storing them changes the design, so the document is marked as modified.
+
+    @return The modules, as returned by collect_modules_under.
+    """
+    modules = load_cached_modules(design, cache_variant())
+    if modules is not None:
+        return modules
+
+    root = futil.trace_api(design.rootComponent)
+    counter = ComponentCounter() if config.COUNT_UNIQUE_COMPONENTS else None
+    if config.COUNT_CHANGED_MODULES_ONLY:
+        document_id = design.parentDocument.creationId
+        if (cache := _module_caches.get(document_id)) is None:
+            cache = _module_caches[document_id] = ModuleCache()
+        modules = collect_modules_under(root, None, counter, cache)
+        futil.log(f"Counted {cache.n_counted} modules, {cache.n_reused} unchanged since the last count")
+    else:
+        modules = collect_modules_under(root, None, counter)
+
+    if save_cache:
+        with futil.profile("save_cached_modules"):
+            save_cached_modules(design, modules, cache_variant())
+    return modules
+
+
+def forget_document(document_id: str):
+    """Drops the modules counted in a document, e.g. when it is closed."""
+    _module_caches.pop(document_id, None)
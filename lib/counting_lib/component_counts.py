@@ -0,0 +1,191 @@
+import adsk.fusion
+
+from dataclasses import dataclass, field
+
+from .human_sort import human_sort, human_merge
+from .naming import classify_name
+from .walk import walk_occurrences
+from ..excel_lib import Body
+
+
+@dataclass
+class ComponentCounts:
+    """Body histogram of everything visible in one component.
+
+    Keys are kept in the order they are first seen by `traverse_brepbodies` and
+    `traverse_occurrences`, so merging histograms gives the same order as a full traversal.
+    """
+    bodies: dict[tuple[str, str], int] = field(default_factory=dict)
+    fsas: dict[str, int] = field(default_factory=dict)
+
+
+class ComponentCounter:
+    """Counts bodies once per unique component and multiplies by the number of instances.
+
+    The histogram of each component is counted from its native bodies and occurrences,
+    once, and cached by its entity token. An instance whose light bulb was changed in its
+    own context, i.e. differs from its native occurrence, is counted from its own bodies
+    and occurrences instead, which are checked the same way. So is a module with such an
+    instance directly in it. Anything else changed in context, below an instance that
+    wasn't changed itself, is counted as it is in the native component.
+
+    A counter should be reused for every module in a design, but not across edits.
+    """
+
+    def __init__(self):
+        # Histograms of the native components, by entity token. The ones counted as the
+        # root have the bodies of the component before those of its occurrences.
+        self._cache: dict[str, ComponentCounts] = {}
+        self._root_cache: dict[str, ComponentCounts] = {}
+
+    def _add_bodies(self, counts: ComponentCounts, bodies: list[adsk.fusion.BRepBody]):
+        for body in bodies:
+            info = classify_name(body.name)
+            if info.is_ignored:
+                continue
+            material = body.material.name if hasattr(body, "material") else ""
+            key = (info.name, material)
+            counts.bodies[key] = counts.bodies.get(key, 0) + 1
+
+    def _add_occurrences(
+        self,
+        counts: ComponentCounts,
+        occurrences: list[tuple[adsk.fusion.Occurrence, ComponentCounts]],
+    ):
+        instances: dict[int, list] = {}
+        for occ, child_counts in occurrences:
+            # Reserve the keys of the child in traversal order. The actual counts are
+            # added once per unique histogram below.
+            if id(child_counts) not in instances:
+                instances[id(child_counts)] = [child_counts, 0]
+                for key in child_counts.bodies:
+                    counts.bodies.setdefault(key, 0)
+                for key in child_counts.fsas:
+                    counts.fsas.setdefault(key, 0)
+            instances[id(child_counts)][1] += 1
+
+            if classify_name(occ.name).is_fsa:
+                info = classify_name(occ.component.name)
+                if not info.is_ignored:
+                    counts.fsas[info.name] = counts.fsas.get(info.name, 0) + 1
+
+        for child_counts, n_instances in instances.values():
+            for key, count in child_counts.bodies.items():
+                counts.bodies[key] += count * n_instances
+            for key, count in child_counts.fsas.items():
+                counts.fsas[key] += count * n_instances
+
+    def _is_changed_in_context(self, occ: adsk.fusion.Occurrence, depth: int) -> bool:
+        native = occ.nativeObject
+        return native is not None and occ.isLightBulbOn != native.isLightBulbOn
+
+    def _count_component(self, component: adsk.fusion.Component) -> ComponentCounts:
+        """Counts the native bodies and occurrences of a component, and every component
+        under it, in post-order using an explicit stack."""
+        if (counts := self._cache.get(component.entityToken)) is not None:
+            return counts
+
+        # Each component with its visible occurrences, or None until its children are pushed
+        stack: list[tuple[adsk.fusion.Component, list[adsk.fusion.Occurrence] | None]] = [(component, None)]
+        while stack:
+            current, occurrences = stack[-1]
+            if occurrences is None:
+                occurrences = (
+                    [occ for occ in current.occurrences if occ.isLightBulbOn]
+                    if current.isOccurrencesFolderLightBulbOn
+                    else []
+                )
+                stack[-1] = (current, occurrences)
+                for occ in reversed(occurrences):
+                    if occ.component.entityToken not in self._cache:
+                        stack.append((occ.component, None))
+                continue
+
+            stack.pop()
+            key = current.entityToken
+            if key in self._cache:
+                continue
+
+            # Like traverse_occurrences, the children come before the component's own bodies
+            counts = ComponentCounts()
+            self._add_occurrences(counts, [(occ, self._cache[occ.component.entityToken]) for occ in occurrences])
+            if current.isBodiesFolderLightBulbOn:
+                self._add_bodies(counts, [body for body in current.bRepBodies if body.isLightBulbOn])
+            self._cache[key] = counts
+
+        return self._cache[component.entityToken]
+
+    def _count_native_root(self, component: adsk.fusion.Component) -> ComponentCounts:
+        if (counts := self._root_cache.get(component.entityToken)) is None:
+            counts = self._root_cache[component.entityToken] = ComponentCounts()
+            if component.isBodiesFolderLightBulbOn:
+                self._add_bodies(counts, [body for body in component.bRepBodies if body.isLightBulbOn])
+            if component.isOccurrencesFolderLightBulbOn:
+                self._add_occurrences(counts, [
+                    (occ, self._count_component(occ.component))
+                    for occ in component.occurrences
+                    if occ.isLightBulbOn
+                ])
+        return counts
+
+    def _count_root(self, root: adsk.fusion.Occurrence | adsk.fusion.Component) -> ComponentCounts:
+        if isinstance(root, adsk.fusion.Occurrence) and not (
+            self._is_changed_in_context(root, 0) or
+            any(self._is_changed_in_context(occ, 0) for occ in root.childOccurrences)
+        ):
+            # Counted like its native component, which other modules may be instances of too
+            return self._count_native_root(root.component) if root.isVisible else ComponentCounts()
+
+        # The counted occurrences at each depth, until the occurrence above them is walked
+        levels: list[list[tuple[adsk.fusion.Occurrence, ComponentCounts]]] = [[]]
+        for occ, ancestors, is_expanded in walk_occurrences(root, self._is_changed_in_context):
+            depth = len(ancestors)
+            if is_expanded:
+                # Counted like the native component, but with the light bulbs of this instance
+                children = levels[depth + 1] if len(levels) > depth + 1 else []
+                del levels[depth + 1:]
+                occ_counts = ComponentCounts()
+                self._add_occurrences(occ_counts, children)
+                if occ.component.isBodiesFolderLightBulbOn:
+                    self._add_bodies(occ_counts, [body for body in occ.bRepBodies if body.isLightBulbOn])
+            else:
+                occ_counts = self._count_component(occ.component)
+
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append((occ, occ_counts))
+
+        counts = ComponentCounts()
+        self._add_bodies(counts, [body for body in root.bRepBodies if body.isVisible])
+        self._add_occurrences(counts, levels[0])
+        return counts
+
+    def collect_bodies_under(self, root: adsk.fusion.Occurrence | adsk.fusion.Component) -> list[Body]:
+        """Counts every visible body under root, grouped by name and material.
+
+        Gives the same result as `counting_lib.collect_bodies_under`, as long as nothing
+        was changed in context below an instance that wasn't changed itself, but only
+        visits each unique component once.
+
+        @param root The root component or occurrence to count under.
+
+        @return A list of bodies sorted by name.
+        """
+        counts = self._count_root(root)
+
+        bodies_dict: dict[tuple[str, str], Body] = {}
+        for (name, material), count in counts.bodies.items():
+            bodies_dict[(name, material)] = Body(name, count, material)
+
+        fsas_list: list[Body] = []
+        for name, count in counts.fsas.items():
+            if (name, "") in bodies_dict:
+                bodies_dict[(name, "")].count += count
+            else:
+                fsas_list.append(Body(name, count, ""))
+
+        # Sort Body list based on the name
+        bodies_list = list(bodies_dict.values())
+        human_sort(bodies_list, key=lambda x: x.name)
+        human_sort(fsas_list, key=lambda x: x.name)
+        return list(human_merge([bodies_list, fsas_list], key=lambda x: x.name))
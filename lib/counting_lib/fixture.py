@@ -0,0 +1,115 @@
+import adsk.fusion
+import gzip
+import json
+
+from pathlib import Path
+
+from .traverse import traverse_occurrences
+
+FIXTURE_VERSION = 1
+
+
+def record_design(
+    design: adsk.fusion.Design,
+    module_materials: dict[str, tuple[str, str]] | None = None,
+    steel_brass_numbers: list[tuple[int, int]] | None = None,
+    include_meshes: bool = False,
+) -> dict:
+    """Records the parts of a design that the counting pipeline reads, so it can be replayed
+    without Fusion, see bench/replay.py.
+
+    Every component is recorded once with its bodies and occurrences, so the fixture stays
+    small for designs that reuse components. Light bulbs that are turned on or off in only
+    some instances of a component are recorded separately, by the path of the instance.
+
+    @param design The design to record.
+    @param module_materials The (steel/brass, wood) material of each module category.
+    @param steel_brass_numbers Pairs of matching (steel, brass) sub-numbers for detail parts.
+    @param include_meshes Also record the triangle count of the display mesh of every body.
+                          This makes Fusion tessellate bodies that haven't been displayed yet.
+
+    @return The fixture, a dict that can be saved as JSON.
+    """
+    root = design.rootComponent
+
+    components: list[dict | None] = []
+    component_indices: dict[str, int] = {}
+    pending: list[tuple[int, adsk.fusion.Component]] = []
+
+    def index_of(component: adsk.fusion.Component) -> int:
+        token = component.entityToken
+        if (index := component_indices.get(token)) is None:
+            index = component_indices[token] = len(components)
+            components.append(None)
+            pending.append((index, component))
+        return index
+
+    index_of(root)
+    while pending:
+        index, component = pending.pop()
+
+        bodies = []
+        for body in component.bRepBodies:
+            # Like the counting, bodies without a material are recorded with an empty one
+            material = body.material if hasattr(body, "material") else None
+            recorded_body = [body.name, material.name if material is not None else "", body.isLightBulbOn]
+            if include_meshes:
+                recorded_body.append(body.meshManager.displayMeshes.bestMesh.triangleCount)
+            bodies.append(recorded_body)
+
+        components[index] = {
+            "name": component.name,
+            "bodies_folder": component.isBodiesFolderLightBulbOn,
+            "occurrences_folder": component.isOccurrencesFolderLightBulbOn,
+            "bodies": bodies,
+            "occurrences": [
+                [occ.name, index_of(occ.component), occ.isLightBulbOn]
+                for occ in component.occurrences
+            ],
+        }
+
+    # Occurrences and bodies under hidden occurrences are never counted, so only the light
+    # bulbs in visible occurrences matter.
+    occurrence_overrides: dict[str, bool] = {}
+    body_overrides: dict[str, bool] = {}
+    for occ in traverse_occurrences(root):
+        for child in occ.childOccurrences:
+            if child.isLightBulbOn != child.nativeObject.isLightBulbOn:
+                occurrence_overrides[child.fullPathName] = child.isLightBulbOn
+
+        path = None
+        for i, body in enumerate(occ.bRepBodies):
+            if body.isLightBulbOn != body.nativeObject.isLightBulbOn:
+                path = path or occ.fullPathName
+                body_overrides[f"{path}/{i}"] = body.isLightBulbOn
+
+    return {
+        "version": FIXTURE_VERSION,
+        "name": design.parentDocument.name,
+        "root": 0,
+        "components": components,
+        "occurrence_overrides": occurrence_overrides,
+        "body_overrides": body_overrides,
+        "module_materials": module_materials or {},
+        "steel_brass_numbers": steel_brass_numbers or [],
+        "has_meshes": include_meshes,
+    }
+
+
+def save_fixture(fixture: dict, path: str | Path):
+    """Saves a fixture as gzipped JSON."""
+    with gzip.open(path, 'wt', encoding='utf-8') as fd:
+        json.dump(fixture, fd, separators=(',', ':'))
+
+
+def load_fixture(path: str | Path) -> dict:
+    """Loads a fixture saved with save_fixture.
+
+    @note Raises ValueError if the fixture was saved by an incompatible version.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as fd:
+        fixture = json.load(fd)
+
+    if fixture.get("version") != FIXTURE_VERSION:
+        raise ValueError(f"Unsupported fixture version: {fixture.get('version')}")
+    return fixture
@@ -1,34 +1,47 @@
+import heapq
 import re
 
+from functools import lru_cache
 from typing import TypeVar
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator
 
+# Sort keys are computed once per distinct name and kept here, since the same
+# names are sorted over and over.
+SORT_KEY_CACHE_SIZE = 16384
 
-def tryfloat(s: str) -> str | float:
-    """
-    Return an float if possible, or `s` unchanged.
-    """
-    try:
-        return float(s)
-    except ValueError:
-        return s
+DIGITS_PATTERN = re.compile("([0-9]+)")
+
+
+@lru_cache(maxsize=SORT_KEY_CACHE_SIZE)
+def _string_key(s: str) -> tuple[str | int, ...]:
+    chunks: list = DIGITS_PATTERN.split(s)
 
+    # Splitting on a capture group always alternates text and digits, starting and ending with a
+    # (possibly empty) text chunk. So every key has text at even and ints at odd positions, and
+    # any two keys can be compared without mixing types.
+    chunks[1::2] = [int(c) for c in chunks[1::2]]
+    return tuple(chunks)
 
-def alphanum_key(s: str) -> list[str | float]:
+
+def alphanum_key(s: str) -> tuple:
     """
-    Turn a string into a list of string and number chunks.
+    Turn a string into a tuple of string and number chunks.
 
     >>> alphanum_key("z23a")
-    ["z", 23, "a"]
+    ("z", 23, "a")
 
     """
+    if isinstance(s, str):
+        return _string_key(s)
+
     if isinstance(s, list) or isinstance(s, tuple):
-        return [alphanum_key(x) for x in s]
-    
+        return tuple(alphanum_key(x) for x in s)
+
     if isinstance(s, int) or isinstance(s, float):
-        return s
+        # Sort numbers like the string of digits they would be written as
+        return ("", s)
 
-    return [tryfloat(c) for c in re.split("([0-9]+)", s)]
+    return _string_key(str(s))
 
 
 T = TypeVar('T')
@@ -40,3 +53,15 @@ def human_sort(l: list[T], key: Callable[[T], str] | None = None):
         l.sort(key=alphanum_key)
     else:
         l.sort(key=lambda x: alphanum_key(key(x)))
+
+
+def human_merge(lists: Iterable[Iterable[T]], key: Callable[[T], str] | None = None) -> Iterator[T]:
+    """
+    Merge lists that are already sorted the way `human_sort` sorts them into one sorted stream.
+
+    Equal items keep the order of the lists they come from, so the result is the same as
+    concatenating the lists and calling `human_sort`, without sorting everything again.
+    """
+    if not key:
+        return heapq.merge(*lists, key=alphanum_key)
+    return heapq.merge(*lists, key=lambda x: alphanum_key(key(x)))
@@ -0,0 +1,131 @@
+from .human_sort import human_sort, human_merge
+from .naming import classify_name, MATERIAL_NAME_PATTERN
+from ..excel_lib import Body, Module
+from .. import fusionAddInUtils as futil
+
+
+class DetailRenamer:
+    """Renames detail parts to the sub-number of the matching part in another material.
+
+    The new name of each distinct name and material is only worked out once.
+    """
+
+    def __init__(self, steel_to_brass: dict[int, int], brass_to_steel: dict[int, int]):
+        """
+        @param steel_to_brass The brass sub-number of each steel sub-number.
+        @param brass_to_steel The steel sub-number of each brass sub-number.
+        """
+        self._numbers = {"Steel": brass_to_steel, "Brass": steel_to_brass}
+        self._names: dict[tuple[str, str], str] = {}
+
+    @classmethod
+    def from_pairs(cls, steel_brass_numbers: list[tuple[int, int]]) -> "DetailRenamer":
+        """Creates a renamer from pairs of matching (steel, brass) sub-numbers.
+
+        Like SharedData.steel_to_brass, the last pair wins if a number is in several pairs.
+        """
+        return cls(
+            {steel: brass for steel, brass in steel_brass_numbers},
+            {brass: steel for steel, brass in steel_brass_numbers},
+        )
+
+    def rename(self, name: str, material: str) -> str:
+        """Returns the name of the detail part `name` in `material`, either "Steel" or "Brass".
+
+        Names that aren't detail parts with a known sub-number are returned as they are.
+        """
+        key = (name, material)
+        if (new_name := self._names.get(key)) is not None:
+            return new_name
+
+        new_name = name
+        info = classify_name(name)
+        if info.detail_number is not None and material in self._numbers:
+            new_num = self._numbers[material].get(info.detail_number, info.detail_number)
+            if new_num != info.detail_number:
+                new_name = MATERIAL_NAME_PATTERN.sub(
+                    material, f"{info.detail_prefix}{new_num}{info.detail_suffix}"
+                )
+
+        self._names[key] = new_name
+        return new_name
+
+
+def fix_detail_number(
+    body: Body,
+    material: str,
+    steel_brass_numbers: list[tuple[int, int]] | DetailRenamer,
+) -> Body:
+    """Swaps the sub-number of a detail part to the number of the part in the given material.
+
+    @param body The body to rename. It is renamed in place.
+    @param material Either "Steel" or "Brass".
+    @param steel_brass_numbers Pairs of matching (steel, brass) sub-numbers, or a renamer
+                               made from them.
+
+    @return The renamed body.
+    """
+    if not isinstance(steel_brass_numbers, DetailRenamer):
+        steel_brass_numbers = DetailRenamer.from_pairs(steel_brass_numbers)
+    body.name = steel_brass_numbers.rename(body.name, material)
+    return body
+
+
+@futil.profiled
+def collect_bodies(
+    modules: list[Module],
+    module_materials: dict[str, tuple[str, str]],
+    steel_brass_numbers: list[tuple[int, int]] | DetailRenamer,
+) -> list[Body]:
+    """Maps the bodies of every module to their materials and counts them across modules.
+
+    @param modules The modules to collect bodies from, with bodies sorted by name.
+    @param module_materials The (steel/brass, wood) material of each module category.
+    @param steel_brass_numbers Pairs of matching (steel, brass) sub-numbers for detail parts,
+                               or a renamer made from them.
+
+    @return A list of bodies sorted by name.
+    """
+    if not isinstance(steel_brass_numbers, DetailRenamer):
+        steel_brass_numbers = DetailRenamer.from_pairs(steel_brass_numbers)
+
+    # Bodies of each module are already sorted by name, so the modules can be merged
+    # instead of sorting all bodies again. Only modules with renamed detail parts need
+    # to be sorted again.
+    module_bodies: list[list[Body]] = []
+    for module in modules:
+        detail_type, wood_type = module_materials[module.category]
+
+        mapped_bodies: list[Body] = []
+        is_renamed = False
+        for body in module.bodies:
+            material = body.material
+            info = classify_name(body.name)
+
+            if info.is_wood:
+                material = wood_type
+            elif info.is_detail:
+                material = detail_type
+                name = body.name
+                body.name = steel_brass_numbers.rename(name, material)
+                is_renamed = is_renamed or body.name != name
+
+            mapped_bodies.append(Body(body.name, body.count, material))
+
+        if is_renamed:
+            human_sort(mapped_bodies, key=lambda x: x.name)
+        module_bodies.append(mapped_bodies)
+
+    bodies_dict: dict[tuple[str, str], Body] = {}
+    for body in human_merge(module_bodies, key=lambda x: x.name):
+        key = (body.name, body.material)
+
+        if key not in bodies_dict:
+            bodies_dict[key] = Body(
+                name=body.name,
+                count=0,
+                material=body.material,
+            )
+        bodies_dict[key].count += body.count
+
+    return list(bodies_dict.values())
@@ -0,0 +1,109 @@
+import adsk.fusion
+import hashlib
+
+from collections.abc import Callable
+
+from .snapshot import OccurrenceRecord
+from ..excel_lib import Body
+
+
+class ModuleCache:
+    """Keeps the bodies counted in each module between counts of a design, so a recount
+    only counts the modules that changed since.
+
+    A module is counted again when its name, or the revision ID of any component under it,
+    changes. A component's revision ID changes with the names, materials and light bulbs of
+    its own bodies and occurrences. Light bulbs can also be changed in the context of a
+    single module, which only the root component's revision ID shows, so instead of that,
+    the light bulbs of the bodies and occurrences directly in the module are compared.
+    Light bulbs changed in context deeper in a module aren't noticed.
+
+    Modules are kept by the full path name of their occurrence, since entity tokens can
+    change while the occurrence stays the same. A renamed module or group is counted again,
+    which its name in the fingerprint would cause anyway.
+
+    A cache belongs to one design, and is passed to `collect_modules_under`.
+    """
+
+    def __init__(self):
+        # Fingerprint and bodies of each module, by full path name of its occurrence
+        self._modules: dict[str, tuple[str, list[Body]]] = {}
+        # Digests of the components seen in the current count, by entity token
+        self._digests: dict[str, str] = {}
+        self._seen: set[str] = set()
+
+        # Number of modules counted, and reused, by the last count
+        self.n_counted = 0
+        self.n_reused = 0
+
+    def start(self):
+        """Starts a count of the modules."""
+        self._digests = {}
+        self._seen = set()
+        self.n_counted = 0
+        self.n_reused = 0
+
+    def _component_digest(self, component: adsk.fusion.Component) -> str:
+        """Digests the revision IDs of a component and every component under it, in
+        post-order using an explicit stack."""
+        if (digest := self._digests.get(component.entityToken)) is not None:
+            return digest
+
+        # Each component with the components of its occurrences, or None until they're pushed.
+        # Hidden occurrences are included too, turning them on changes nothing else.
+        stack: list[tuple[adsk.fusion.Component, list[adsk.fusion.Component] | None]] = [(component, None)]
+        while stack:
+            current, children = stack[-1]
+            if children is None:
+                children = [occ.component for occ in current.occurrences]
+                stack[-1] = (current, children)
+                for child in reversed(children):
+                    if child.entityToken not in self._digests:
+                        stack.append((child, None))
+                continue
+
+            stack.pop()
+            key = current.entityToken
+            if key in self._digests:
+                continue
+            parts = [current.revisionId, *(self._digests[child.entityToken] for child in children)]
+            self._digests[key] = hashlib.sha1(';'.join(parts).encode('utf-8')).hexdigest()
+
+        return self._digests[component.entityToken]
+
+    def _context_state(self, occ: adsk.fusion.Occurrence) -> str:
+        """The light bulbs of the bodies and occurrences directly in a module, as read in
+        its context."""
+        bodies = "".join("1" if body.isLightBulbOn else "0" for body in occ.bRepBodies)
+        occurrences = "".join("1" if child.isLightBulbOn else "0" for child in occ.childOccurrences)
+        return f"{bodies}/{occurrences}"
+
+    def bodies(self, record: OccurrenceRecord, count: Callable[[], list[Body]]) -> list[Body]:
+        """Returns the bodies of a module, counted with `count` if the module has changed.
+
+        @param record The record of the module's occurrence.
+        @param count Counts the bodies of the module.
+
+        @return New body objects, which the caller may change.
+        """
+        occ = record.occurrence
+        key = occ.fullPathName
+        fingerprint = f"{record.name}|{self._context_state(occ)}|{self._component_digest(occ.component)}"
+        self._seen.add(key)
+
+        cached = self._modules.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            self.n_reused += 1
+            bodies = cached[1]
+        else:
+            self.n_counted += 1
+            bodies = count()
+            self._modules[key] = (fingerprint, [Body(body.name, body.count, body.material) for body in bodies])
+            return bodies
+
+        return [Body(body.name, body.count, body.material) for body in bodies]
+
+    def finish(self):
+        """Forgets the modules that weren't in the count, e.g. deleted ones."""
+        for key in self._modules.keys() - self._seen:
+            del self._modules[key]
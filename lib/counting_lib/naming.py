@@ -0,0 +1,72 @@
+import re
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Designs repeat the same few thousand names over and over, so a few times
+# that is plenty to keep every name in the design cached.
+NAME_CACHE_SIZE = 16384
+
+OCC_NAME_FILTERS = [
+    (re.compile(r"^(.*):\d+$"), r"\1"),
+    (re.compile(r"^(.*) v\d+$"), r"\1"),
+]
+BODY_NAME_IGNORE_FILTERS = [
+    re.compile(r'^Body\d+$'),
+    re.compile(r'^delete', re.IGNORECASE),
+]
+FSA_PATTERN = re.compile(r"^(9[7-9]\..*?[ _])?9\.")
+WOOD_PATTERN = re.compile(r"^(9[7-9]\..*?[ _])?([1-9]|12|1[4-6])\.")
+DETAIL_PATTERN = re.compile(r"^(9[7-9]\..*?[ _])?10\.")
+DETAIL_NUMBER_PATTERN = re.compile(r"^((?:9[7-9]\..*? )?10\.)(\d+)")
+MATERIAL_NAME_PATTERN = re.compile(r"(Brass|Steel)")
+
+
+@dataclass(frozen=True)
+class NameInfo:
+    """Result of running every naming rule on a single name.
+
+    The ignore filters are matched against the filtered name, since that is what ends up in
+    the tables. Every other rule is matched against the name as given, like the counting
+    pipeline does.
+    """
+    name: str
+    is_ignored: bool
+    is_fsa: bool
+    is_wood: bool
+    is_detail: bool
+    # For detail parts with a sub-number, e.g. "10.12 Steel hinge" is split into
+    # "10.", 12 and " Steel hinge".
+    detail_prefix: str | None = None
+    detail_number: int | None = None
+    detail_suffix: str | None = None
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def classify_name(raw: str) -> NameInfo:
+    """Runs all naming rules on `raw`. Results are cached, so repeated names are free."""
+    name = raw
+    for pat, repl in OCC_NAME_FILTERS:
+        name = pat.sub(repl, name)
+
+    detail_prefix = detail_number = detail_suffix = None
+    if (match := DETAIL_NUMBER_PATTERN.match(raw)):
+        detail_prefix = match.group(1)
+        detail_number = int(match.group(2))
+        detail_suffix = raw[match.end():]
+
+    return NameInfo(
+        name=name,
+        is_ignored=any([pattern.match(name) for pattern in BODY_NAME_IGNORE_FILTERS]),
+        is_fsa=FSA_PATTERN.match(raw) is not None,
+        is_wood=WOOD_PATTERN.match(raw) is not None,
+        is_detail=DETAIL_PATTERN.match(raw) is not None,
+        detail_prefix=detail_prefix,
+        detail_number=detail_number,
+        detail_suffix=detail_suffix,
+    )
+
+
+def filter_name(name: str) -> str:
+    """Strips instance and version suffixes like ":1" and " v2" from a name."""
+    return classify_name(name).name
@@ -0,0 +1,99 @@
+import adsk.fusion
+import base64
+import hashlib
+import json
+import zlib
+
+from ... import config
+from ..excel_lib import Body, Module
+from .. import fusionAddInUtils as futil
+
+# Stored next to the file_data of settings_lib, in the same attribute group
+ATTR_GRP = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}'
+ATTR_NAME = "count_cache"
+CACHE_VERSION = 1
+
+# Designs modified since they were last counted, by creationId of their document. The
+# fingerprint should change with every modification, this catches the ones it might not.
+_modified_documents: set[str] = set()
+
+
+def design_fingerprint(design: adsk.fusion.Design) -> str:
+    """A fingerprint of everything the counting reads, which changes when the design does.
+
+    Every component has a revision ID that changes whenever anything in the component
+    does, like the name, material or light bulb of one of its bodies or occurrences, so
+    only the components have to be read, not every occurrence of them.
+    """
+    digest = hashlib.sha1()
+    for component in design.allComponents:
+        digest.update(f"{component.id}:{component.revisionId};".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def cache_variant() -> str:
+    """Everything besides the design the counted modules depend on, i.e. the counting
+    options. Pass it to load_cached_modules and save_cached_modules."""
+    return f"unique_components={config.COUNT_UNIQUE_COMPONENTS}"
+
+
+def mark_design_modified(design: adsk.fusion.Design):
+    """Invalidates the cached modules of the design, e.g. after a command changed it."""
+    _modified_documents.add(design.parentDocument.creationId)
+
+
+@futil.profiled
+def load_cached_modules(design: adsk.fusion.Design, variant: str = "") -> list[Module] | None:
+    """Loads the modules saved with save_cached_modules, if the design hasn't changed since.
+
+    @param design The design to load the modules of.
+    @param variant The variant passed to save_cached_modules, e.g. the counting options.
+
+    @return New module objects each call, or None if there are no valid cached modules.
+    """
+    if design.parentDocument.creationId in _modified_documents:
+        return None
+    if (attr := design.attributes.itemByName(ATTR_GRP, ATTR_NAME)) is None:
+        return None
+
+    try:
+        cache = json.loads(zlib.decompress(base64.b64decode(attr.value)))
+    except (ValueError, zlib.error):
+        return None
+
+    if (
+        cache.get("version") != CACHE_VERSION or
+        cache.get("variant") != variant or
+        cache.get("fingerprint") != design_fingerprint(design)
+    ):
+        return None
+
+    return [
+        Module(category, name, [Body(*body) for body in bodies])
+        for category, name, bodies in cache["modules"]
+    ]
+
+
+@futil.profiled
+def save_cached_modules(design: adsk.fusion.Design, modules: list[Module], variant: str = ""):
+    """Stores counted modules in the design, so they don't have to be counted again until
+    the design changes.
+
+    @note Must be called before collect_bodies, which renames some of the bodies.
+
+    @param design The design the modules were counted in.
+    @param modules The modules, as returned by collect_modules_under.
+    @param variant Anything besides the design the modules depend on, e.g. the counting options.
+    """
+    cache = {
+        "version": CACHE_VERSION,
+        "variant": variant,
+        "fingerprint": design_fingerprint(design),
+        "modules": [
+            [module.category, module.name, [[body.name, body.count, body.material] for body in module.bodies]]
+            for module in modules
+        ],
+    }
+    value = base64.b64encode(zlib.compress(json.dumps(cache, separators=(',', ':')).encode('utf-8')))
+    design.attributes.add(ATTR_GRP, ATTR_NAME, value.decode('ascii'))
+    _modified_documents.discard(design.parentDocument.creationId)
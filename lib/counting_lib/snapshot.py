@@ -0,0 +1,147 @@
+import adsk.fusion
+
+from dataclasses import dataclass, field
+from collections.abc import Callable
+
+from .walk import walk_occurrences
+
+
+@dataclass
+class BodyRecord:
+    body: adsk.fusion.BRepBody
+    name: str
+    material: str
+    owner: int
+
+
+@dataclass
+class OccurrenceRecord:
+    occurrence: adsk.fusion.Occurrence | adsk.fusion.Component
+    name: str
+    component_name: str
+    index: int
+    parent: int | None = None
+    children: list[int] = field(default_factory=list)
+    # False if the snapshot didn't descend into the occurrence, see DesignSnapshot's expand
+    is_expanded: bool = True
+
+    # Bodies are stored in the same post-order as the occurrences, so the bodies of a
+    # record's subtree are bodies[subtree_bodies_start:bodies_end], with the record's
+    # own bodies at the end of that range in bodies[bodies_start:bodies_end].
+    subtree_start: int = 0
+    subtree_bodies_start: int = 0
+    bodies_start: int = 0
+    bodies_end: int = 0
+
+
+class DesignSnapshot:
+    """Flat index of every visible occurrence and bRepBody under a root, built in one traversal.
+
+    Occurrences are stored in post-order, i.e. the same order `traverse_occurrences` yields them,
+    followed by a record for the root itself. The subtree of a record is therefore the contiguous
+    slice occurrences[record.subtree_start:record.index], which makes subtree queries cheap.
+
+    Hidden occurrences (and everything under them) and hidden bodies are left out, exactly as
+    `traverse_occurrences` and `traverse_brepbodies` do.
+    """
+
+    def __init__(
+        self,
+        root: adsk.fusion.Occurrence | adsk.fusion.Component,
+        expand: Callable[[adsk.fusion.Occurrence, int], bool] | None = None,
+    ):
+        """Takes a snapshot of everything visible under root.
+
+        @param root The root component or occurrence, from which to start traversing.
+        @param expand Only descends into occurrences for which expand(occurrence, depth) returns True,
+                      where depth is 0 for the occurrences directly under root. The occurrences
+                      themselves are still recorded, just without children or bodies.
+        """
+        self.occurrences: list[OccurrenceRecord] = []
+        self.bodies: list[BodyRecord] = []
+        self._expand = expand
+        self._build(root)
+
+    @property
+    def root(self) -> OccurrenceRecord:
+        return self.occurrences[-1]
+
+    def _add_bodies(self, owner: adsk.fusion.Occurrence | adsk.fusion.Component, index: int):
+        for body in owner.bRepBodies:
+            if not body.isVisible:
+                continue
+            material = body.material.name if hasattr(body, "material") else ""
+            self.bodies.append(BodyRecord(body, body.name, material, index))
+
+    def _add_record(
+        self,
+        occurrence: adsk.fusion.Occurrence | adsk.fusion.Component,
+        children: list[int],
+        is_expanded: bool,
+    ) -> int:
+        index = len(self.occurrences)
+        bodies_start = len(self.bodies)
+        if is_expanded:
+            self._add_bodies(occurrence, index)
+
+        is_occurrence = isinstance(occurrence, adsk.fusion.Occurrence)
+        first_child = self.occurrences[children[0]] if children else None
+        self.occurrences.append(OccurrenceRecord(
+            occurrence=occurrence,
+            name=occurrence.name,
+            component_name=occurrence.component.name if is_occurrence else occurrence.name,
+            index=index,
+            children=children,
+            is_expanded=is_expanded,
+            subtree_start=first_child.subtree_start if first_child else index,
+            subtree_bodies_start=first_child.subtree_bodies_start if first_child else bodies_start,
+            bodies_start=bodies_start,
+            bodies_end=len(self.bodies),
+        ))
+        for child in children:
+            self.occurrences[child].parent = index
+
+        return index
+
+    def _build(self, root: adsk.fusion.Occurrence | adsk.fusion.Component):
+        # pending[depth] holds the finished occurrences at that depth whose parent hasn't
+        # been finished yet. Since the walk is post-order, those are exactly the children
+        # of the next occurrence finished at depth - 1.
+        pending: list[list[int]] = [[]]
+        for occ, ancestors, is_expanded in walk_occurrences(root, self._expand):
+            depth = len(ancestors)
+            while len(pending) <= depth + 1:
+                pending.append([])
+
+            children = pending[depth + 1]
+            pending[depth + 1] = []
+            pending[depth].append(self._add_record(occ, children, is_expanded))
+
+        self._add_record(root, pending[0], True)
+
+    def children(self, record: OccurrenceRecord) -> list[OccurrenceRecord]:
+        """Returns the visible child occurrences of `record`, in tree order."""
+        return [self.occurrences[i] for i in record.children]
+
+    def occurrences_under(self, record: OccurrenceRecord) -> list[OccurrenceRecord]:
+        """Returns every visible occurrence under `record`, in the order `traverse_occurrences` yields them."""
+        return self.occurrences[record.subtree_start:record.index]
+
+    def bodies_of(self, record: OccurrenceRecord) -> list[BodyRecord]:
+        """Returns the visible bodies directly in `record`."""
+        return self.bodies[record.bodies_start:record.bodies_end]
+
+    def bodies_under(self, record: OccurrenceRecord) -> list[BodyRecord]:
+        """Returns every visible body under `record`, in the order `traverse_brepbodies` yields them."""
+        return (
+            self.bodies_of(record) +
+            self.bodies[record.subtree_bodies_start:record.bodies_start]
+        )
+
+    def parents(self, record: OccurrenceRecord) -> list[OccurrenceRecord]:
+        """Returns the chain of parent records of `record`, nearest first."""
+        parents = []
+        while record.parent is not None:
+            record = self.occurrences[record.parent]
+            parents.append(record)
+        return parents
@@ -4,8 +4,16 @@ import re
 from typing import Generator
 from collections.abc import Callable
 
-from .human_sort import human_sort
+from .human_sort import human_sort, human_merge
+from .walk import walk_occurrences
+from .naming import classify_name, filter_name
+from .snapshot import DesignSnapshot, OccurrenceRecord
+from .component_counts import ComponentCounter
+from .module_cache import ModuleCache
 from ..excel_lib import Body, Module
+from .. import fusionAddInUtils as futil
+
+GRP_PATTERN = re.compile(r'^G_(.*)$')
 
 def traverse_occurrences(
     root: adsk.fusion.Occurrence | adsk.fusion.Component,
@@ -19,22 +27,10 @@ def traverse_occurrences(
     @param depth Maximum depth of recursion. If not given, function will recurse as deep as possible.
 
     @return A generator yielding all visible Occurences under `root` for which `predicate` returns true,
-            up to a recursion depth of `depth`.
+            up to a recursion depth of `depth`. Every occurrence is yielded after the occurrences under it.
     """
-    iter = (
-        root.childOccurrences
-        if isinstance(root, adsk.fusion.Occurrence)
-        else root.occurrences
-    )
-    for occ in iter:
-        if not occ.isVisible:
-            continue
-
-        if depth is None:
-            yield from traverse_occurrences(occ, predicate=predicate, depth=None)
-        elif depth > 0:
-            yield from traverse_occurrences(occ, predicate=predicate, depth=depth - 1)
-
+    expand = None if depth is None else lambda occ, level: level < depth
+    for occ, _, _ in walk_occurrences(root, expand):
         if predicate is None or predicate(occ):
             yield occ
 
@@ -46,12 +42,41 @@ def traverse_brepbodies(
     
     @param root The root component or occurrence, from which to start traversing.
 
-    @return A generator yielding tuples of all visible bRepBodies under root, and it's path
-            in the component tree.
+    @return A generator yielding all visible bRepBodies under root.
+    """
+    for body in root.bRepBodies:
+        if body.isVisible:
+            yield body
+    for occ, _, _ in walk_occurrences(root):
+        for body in occ.bRepBodies:
+            if body.isVisible:
+                yield body
+
+
+def traverse_brepbodies_with_paths(
+    root: adsk.fusion.Occurrence | adsk.fusion.Component,
+) -> Generator[tuple[adsk.fusion.BRepBody, tuple[adsk.fusion.Occurrence, ...]], None, None]:
+    """Traverses and yields every visible bRepBody under root, together with its path.
+
+    Bodies are yielded in the same order as `traverse_brepbodies`, as they are found.
+
+    @param root The root component or occurrence, from which to start traversing.
+
+    @return A generator yielding tuples of all visible bRepBodies under root, and their path
+            in the component tree as a tuple of occurrences from root down to the body's
+            occurrence. Bodies directly in root have an empty path.
     """
-    yield from [body for body in root.bRepBodies if body.isVisible]
-    for occ in traverse_occurrences(root):
-        yield from [body for body in occ.bRepBodies if body.isVisible]
+    for body in root.bRepBodies:
+        if body.isVisible:
+            yield body, ()
+    for occ, ancestors, _ in walk_occurrences(root):
+        path = None
+        for body in occ.bRepBodies:
+            if not body.isVisible:
+                continue
+            if path is None:
+                path = (*ancestors, occ)
+            yield body, path
 
 def traverse_parents(
     root: adsk.fusion.Occurrence
@@ -60,75 +85,149 @@ def traverse_parents(
     while (occ := occ.assemblyContext):
         yield occ
 
-def filter_name(name: str) -> str:
-    OCC_NAME_FILTERS = [
-        (r"^(.*):\d+$", r"\1"),
-        (r"^(.*) v\d+$", r"\1"),
-    ]
-    for pat, repl in OCC_NAME_FILTERS:
-        name = re.sub(pat, repl, name)
-    return name
-
-def collect_bodies_under(root: adsk.fusion.Component | adsk.fusion.Occurrence) -> list[Body]:
-    BODY_NAME_IGNORE_FILTERS = [
-        re.compile(r'^Body\d+$'),
-        re.compile(r'^delete', re.IGNORECASE),
-    ]
+def collect_bodies_under(
+    root: adsk.fusion.Component | adsk.fusion.Occurrence | OccurrenceRecord,
+    snapshot: DesignSnapshot | None = None,
+) -> list[Body]:
+    """Counts every visible body under root, grouped by name and material.
+
+    @param root The root component or occurrence to count under, or a record in `snapshot`.
+    @param snapshot A snapshot containing `root`. If not given, a snapshot of `root` is taken.
+
+    @return A list of bodies sorted by name.
+    """
+    if snapshot is None:
+        snapshot = DesignSnapshot(root)
+        root = snapshot.root
 
     bodies_dict: dict[tuple[str, str], Body] = {}
-    for body in traverse_brepbodies(root):
-        name = filter_name(body.name)
+    for body in snapshot.bodies_under(root):
+        info = classify_name(body.name)
 
-        if any([pattern.match(name) for pattern in BODY_NAME_IGNORE_FILTERS]):
+        if info.is_ignored:
             continue
 
-        if hasattr(body, "material"):
-            material = body.material.name
-        else:
-            material = ""
-        key = (name, material)
+        name = info.name
+        key = (name, body.material)
 
         if key not in bodies_dict:
-            bodies_dict[key] = Body(name, 0, material)
+            bodies_dict[key] = Body(name, 0, body.material)
         bodies_dict[key].count += 1
 
-    # Count FSA's
-    FSA_match_pattern = re.compile(r"^(9[7-9]\..*?[ _])?9\.")
-    for occ in traverse_occurrences(root, predicate=lambda x: FSA_match_pattern.match(x.name)):
-        name = filter_name(occ.component.name)
+    # Count FSA's. They are kept apart from the bodies, so the two already sorted
+    # halves can be merged instead of sorting everything at once.
+    fsas_dict: dict[tuple[str, str], Body] = {}
+    for occ in snapshot.occurrences_under(root):
+        if not classify_name(occ.name).is_fsa:
+            continue
+
+        info = classify_name(occ.component_name)
 
-        if any([pattern.match(name) for pattern in BODY_NAME_IGNORE_FILTERS]):
+        if info.is_ignored:
             continue
 
+        name = info.name
         material = ""
         key = (name, material)
 
-        if key not in bodies_dict:
-            bodies_dict[key] = Body(name, 0, material)
-        bodies_dict[key].count += 1
+        if key in bodies_dict:
+            bodies_dict[key].count += 1
+            continue
+
+        if key not in fsas_dict:
+            fsas_dict[key] = Body(name, 0, material)
+        fsas_dict[key].count += 1
     
     # Sort Body list based on the name
     bodies_list = list(bodies_dict.values())
+    fsas_list = list(fsas_dict.values())
     human_sort(bodies_list, key=lambda x: x.name)
-    return bodies_list
+    human_sort(fsas_list, key=lambda x: x.name)
+    return list(human_merge([bodies_list, fsas_list], key=lambda x: x.name))
+
+
+@futil.profiled
+def collect_modules_under(
+    root: adsk.fusion.Component | adsk.fusion.Occurrence,
+    snapshot: DesignSnapshot | None = None,
+    counter: ComponentCounter | None = None,
+    cache: ModuleCache | None = None,
+) -> list[Module]:
+    """Collects every module in the `G_` groups directly under root.
+
+    @param root The root component or occurrence containing the `G_` groups.
+    @param snapshot A snapshot of `root`. If not given, a snapshot of `root` is taken.
+    @param counter If given, bodies are counted once per unique component with this counter,
+                   and the snapshot only needs to cover the groups and modules.
+    @param cache If given, only the modules that changed since the last call with the same
+                 cache are counted. Like with `counter`, the snapshot only needs to cover the
+                 groups and modules.
+
+    @return A list of modules, each with its bodies counted.
+    """
+    if snapshot is None and (counter is not None or cache is not None):
+        snapshot = DesignSnapshot(root, expand=lambda occ, depth: depth < 1)
+    elif snapshot is None:
+        snapshot = DesignSnapshot(root)
 
+    def count(occ: OccurrenceRecord) -> list[Body]:
+        if counter is not None:
+            return counter.collect_bodies_under(occ.occurrence)
+        if occ.is_expanded:
+            return collect_bodies_under(occ, snapshot)
+        return collect_bodies_under(occ.occurrence)
 
-def collect_modules_under(root: adsk.fusion.Component | adsk.fusion.Occurrence) -> list[Module]:
-    GRP_PATTERN = re.compile(r'^G_(.*)$')
+    if cache is not None:
+        cache.start()
 
     modules: list[Module] = []
 
-    for top_lvl_occ in traverse_occurrences(root, depth=0):
+    for top_lvl_occ in snapshot.children(snapshot.root):
         top_lvl_name = filter_name(top_lvl_occ.name)
         if not (match := GRP_PATTERN.match(top_lvl_name)):
             continue
 
         grp_name = match.group(1)
-        for occ in traverse_occurrences(top_lvl_occ, depth=0):
+        for occ in snapshot.children(top_lvl_occ):
             modules.append(Module(
                 grp_name,
                 filter_name(occ.name),
-                collect_bodies_under(occ)
+                count(occ) if cache is None else cache.bodies(occ, lambda: count(occ)),
             ))
 
+    if cache is not None:
+        cache.finish()
     return modules
+
+
+def collect_module_names_under(
+    root: adsk.fusion.Component | adsk.fusion.Occurrence,
+) -> list[tuple[str, str]]:
+    """Lists the modules in the `G_` groups directly under root, without counting their bodies.
+
+    Only the groups and the occurrences directly in them are read, so this is fast even
+    on large designs.
+
+    @param root The root component or occurrence containing the `G_` groups.
+
+    @return The category and name of each module, in the same order as `collect_modules_under`.
+    """
+    def is_group(occ: adsk.fusion.Occurrence, depth: int) -> bool:
+        return depth == 0 and GRP_PATTERN.match(filter_name(occ.name)) is not None
+
+    names: list[tuple[str, str]] = []
+    for occ, ancestors, _ in walk_occurrences(root, is_group):
+        if len(ancestors) == 1:
+            category = GRP_PATTERN.match(filter_name(ancestors[0].name)).group(1)
+            names.append((category, filter_name(occ.name)))
+    return names
+
+
+def collect_categories_under(root: adsk.fusion.Component | adsk.fusion.Occurrence) -> list[str]:
+    """Lists the categories of the modules under root, like `collect_module_names_under`.
+
+    @param root The root component or occurrence containing the `G_` groups.
+
+    @return The distinct categories, in the order their first module is found.
+    """
+    return list(dict.fromkeys(category for category, _ in collect_module_names_under(root)))
@@ -0,0 +1,49 @@
+import adsk.fusion
+
+from typing import Generator
+from collections.abc import Callable
+
+
+def walk_occurrences(
+    root: adsk.fusion.Occurrence | adsk.fusion.Component,
+    expand: Callable[[adsk.fusion.Occurrence, int], bool] | None = None,
+) -> Generator[tuple[adsk.fusion.Occurrence, list[adsk.fusion.Occurrence], bool], None, None]:
+    """Walks every visible occurrence under root in post-order, using an explicit stack.
+
+    Each occurrence is yielded after everything under it, so the order is the same as a
+    recursive traversal that yields on the way back up. Since nothing recurses, the depth of
+    the tree is not limited by Python's recursion limit.
+
+    @param root The root component or occurrence, from which to start walking.
+    @param expand Only descends into occurrences for which expand(occurrence, depth) returns True,
+                  where depth is 0 for the occurrences directly under root. If not given, the
+                  walk descends as deep as possible.
+
+    @return A generator yielding tuples of each visible occurrence, the list of its ancestors
+            below root (nearest last), and whether its children were walked. The ancestor
+            list is reused between iterations, so copy it if it needs to be kept.
+    """
+    path: list[adsk.fusion.Occurrence] = []
+    stack = [iter(
+        root.childOccurrences
+        if isinstance(root, adsk.fusion.Occurrence)
+        else root.occurrences
+    )]
+
+    while stack:
+        for occ in stack[-1]:
+            if not occ.isVisible:
+                continue
+
+            if expand is None or expand(occ, len(path)):
+                # Descend, the occurrence is yielded once its children are exhausted
+                path.append(occ)
+                stack.append(iter(occ.childOccurrences))
+                break
+
+            yield occ, path, False
+        else:
+            stack.pop()
+            if path:
+                occ = path.pop()
+                yield occ, path, True
@@ -1 +1,4 @@
-from .selection_graphics import SelectionGraphics, SelectionGraphicsGroups
\ No newline at end of file
+from .selection_graphics import SelectionGraphics, SelectionGraphicsGroups
+from .mesh_buffer import MeshBuffer
+from .mesh_cache import MeshCache, CachedMesh, get_mesh_cache
+from .level_of_detail import LOD_FULL, LOD_COARSE, LOD_ORIENTED_BOXES, LOD_OCCURRENCE_BOXES, LEVELS_OF_DETAIL, pick_level_of_detail
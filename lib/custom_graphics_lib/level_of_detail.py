@@ -0,0 +1,43 @@
+import adsk.fusion
+
+from collections.abc import Callable
+
+# How highlighted bodies are drawn, from the most to the least detailed
+LOD_FULL = "full"
+LOD_COARSE = "coarse"
+LOD_ORIENTED_BOXES = "oriented boxes"
+LOD_OCCURRENCE_BOXES = "occurrence boxes"
+LEVELS_OF_DETAIL = [LOD_FULL, LOD_COARSE, LOD_ORIENTED_BOXES, LOD_OCCURRENCE_BOXES]
+
+# Mesh quality of LOD_COARSE
+COARSE_MESH_QUALITY = adsk.fusion.TriangleMeshQualityOptions.LowQualityTriangleMesh
+
+# Rough number of triangles drawn per body at each level of detail, for the bodies whose
+# mesh isn't cached yet. Their meshes are only known once fetched, after picking the level.
+TRIANGLES_PER_BODY = {
+    LOD_FULL: 2000,
+    LOD_COARSE: 200,
+    LOD_ORIENTED_BOXES: 12,
+}
+
+
+def mesh_quality(level_of_detail: str) -> int | None:
+    """The adsk.fusion.TriangleMeshQualityOptions value the meshes of a level are calculated
+    with, or None for the display meshes."""
+    return COARSE_MESH_QUALITY if level_of_detail == LOD_COARSE else None
+
+
+def pick_level_of_detail(count_triangles: Callable[[str], int], triangle_budget: int) -> str:
+    """Picks the most detailed level that draws the bodies in at most `triangle_budget` triangles.
+
+    @param count_triangles Returns the number of triangles the bodies are drawn with at a
+                           level of detail, e.g. SelectionGraphics.count_triangles.
+    @param triangle_budget The number of triangles that can be drawn while the viewport
+                           stays interactive.
+
+    @return One of LEVELS_OF_DETAIL. LOD_OCCURRENCE_BOXES if nothing else fits.
+    """
+    for level in TRIANGLES_PER_BODY:
+        if count_triangles(level) <= triangle_budget:
+            return level
+    return LOD_OCCURRENCE_BOXES
@@ -0,0 +1,102 @@
+import adsk.core
+import adsk.fusion
+
+from array import array
+from collections.abc import Sequence
+
+# NumPy isn't bundled with Fusion, it only speeds up offsetting the indices when installed
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The corners of a box as signs of its three half-axes, and its 12 triangles
+BOX_CORNERS = [(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)]
+BOX_INDICES = [
+    0, 1, 3, 0, 3, 2,  # -x
+    4, 6, 7, 4, 7, 5,  # +x
+    0, 4, 5, 0, 5, 1,  # -y
+    2, 3, 7, 2, 7, 6,  # +y
+    0, 2, 6, 0, 6, 4,  # -z
+    1, 5, 7, 1, 7, 3,  # +z
+]
+
+
+class MeshBuffer:
+    """Collects the triangles of many meshes into one vertex and one index buffer.
+
+    The buffers are arrays, so appending is amortized constant time per value, and the
+    combined mesh is only converted for the Fusion API once, when it is added to a group.
+    """
+
+    def __init__(self):
+        self.coordinates = array('f')
+        self.indices = array('i')
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.coordinates) // 3
+
+    def add(self, coordinates: Sequence[float], indices: Sequence[int]):
+        """Appends a mesh.
+
+        @param coordinates The x, y and z of each vertex of the mesh.
+        @param indices Three indices into the mesh's own vertices for each triangle.
+        """
+        offset = self.vertex_count
+        self.coordinates.extend(coordinates)
+        if offset == 0:
+            self.indices.extend(indices)
+        elif numpy is not None:
+            # numpy.intc is the C int of array('i')
+            self.indices.frombytes((numpy.asarray(indices, dtype=numpy.intc) + offset).tobytes())
+        else:
+            self.indices.extend(map(offset.__add__, indices))
+
+    def add_body(self, body: adsk.fusion.BRepBody):
+        """Appends the display mesh of a body."""
+        mesh = body.meshManager.displayMeshes.bestMesh
+        self.add(mesh.nodeCoordinatesAsFloat, mesh.nodeIndices)
+
+    def add_box(self, center: Sequence[float], half_axes: Sequence[Sequence[float]]):
+        """Appends a box.
+
+        @param center The x, y and z of the center of the box.
+        @param half_axes Three perpendicular vectors from the center to the middle of a face.
+        """
+        (ax, ay, az), (bx, by, bz), (cx, cy, cz) = half_axes
+        coordinates = []
+        for i, j, k in BOX_CORNERS:
+            coordinates += [
+                center[0] + i*ax + j*bx + k*cx,
+                center[1] + i*ay + j*by + k*cy,
+                center[2] + i*az + j*bz + k*cz,
+            ]
+        self.add(coordinates, BOX_INDICES)
+
+    def add_bounding_box(self, box: adsk.core.BoundingBox3D):
+        """Appends an axis-aligned bounding box, e.g. of an occurrence."""
+        low, high = box.minPoint.asArray(), box.maxPoint.asArray()
+        center = [(l + h) / 2 for l, h in zip(low, high)]
+        x, y, z = [(h - l) / 2 for l, h in zip(low, high)]
+        self.add_box(center, [(x, 0, 0), (0, y, 0), (0, 0, z)])
+
+    def add_oriented_box(self, box: adsk.core.OrientedBoundingBox3D):
+        """Appends an oriented bounding box, e.g. the minimum box of a body."""
+        half_axes = [
+            [value * size / 2 for value in direction.asArray()]
+            for direction, size in [
+                (box.lengthDirection, box.length),
+                (box.widthDirection, box.width),
+                (box.heightDirection, box.height),
+            ]
+        ]
+        self.add_box(box.centerPoint.asArray(), half_axes)
+
+    def add_to(self, group: adsk.fusion.CustomGraphicsGroup) -> adsk.fusion.CustomGraphicsMesh:
+        """Adds everything appended so far to `group` as a single mesh."""
+        return group.addMesh(
+            adsk.fusion.CustomGraphicsCoordinates.create(self.coordinates.tolist()),
+            self.indices.tolist(),
+            [], []
+        )
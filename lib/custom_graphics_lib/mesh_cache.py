@@ -0,0 +1,141 @@
+import adsk.fusion
+
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ... import config
+
+# Rough size of a cache entry besides its arrays, i.e. the key, the entry and the arrays
+MESH_OVERHEAD_BYTES = 400
+
+
+@dataclass
+class CachedMesh:
+    """The display mesh of a body, in the coordinates of the root component."""
+    revision_id: str
+    # Transform of the occurrence the body is in, None for bodies of the root component
+    transform: tuple[float, ...] | None
+    coordinates: array
+    indices: array
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.indices) // 3
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.coordinates.itemsize * len(self.coordinates) +
+            self.indices.itemsize * len(self.indices) +
+            MESH_OVERHEAD_BYTES
+        )
+
+
+def _transform(body: adsk.fusion.BRepBody) -> tuple[float, ...] | None:
+    if (occ := body.assemblyContext) is None:
+        return None
+    return tuple(occ.transform2.asArray())
+
+
+class MeshCache:
+    """Meshes of bodies by document, entity token and quality, so highlighting the same
+    bodies again doesn't fetch their meshes from Fusion.
+
+    A mesh is fetched again when the revision ID of its body, or the transform of the
+    occurrence it is in, changes. The least recently used meshes are evicted once the
+    meshes take more than `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._meshes: OrderedDict[tuple[str, str, int | None], CachedMesh] = OrderedDict()
+
+        # Number of meshes found in the cache, and fetched from Fusion
+        self.n_hits = 0
+        self.n_misses = 0
+
+    def __len__(self) -> int:
+        return len(self._meshes)
+
+    def get(self, document_id: str, body: adsk.fusion.BRepBody, quality: int | None = None) -> CachedMesh:
+        """Returns a mesh of a body, fetching it if it isn't cached or has changed.
+
+        @param document_id The creationId of the document the body is in.
+        @param body The body, or a proxy of it.
+        @param quality A adsk.fusion.TriangleMeshQualityOptions value to calculate the mesh
+                       with. If not given, the display mesh is used.
+        """
+        key = (document_id, body.entityToken, quality)
+        revision_id = body.revisionId
+        transform = _transform(body)
+
+        mesh = self._meshes.get(key)
+        if mesh is not None and mesh.revision_id == revision_id and mesh.transform == transform:
+            self._meshes.move_to_end(key)
+            self.n_hits += 1
+            return mesh
+
+        self.n_misses += 1
+        if quality is None:
+            triangle_mesh = body.meshManager.displayMeshes.bestMesh
+        else:
+            calculator = body.meshManager.createMeshCalculator()
+            calculator.setQuality(quality)
+            triangle_mesh = calculator.calculate()
+        new_mesh = CachedMesh(
+            revision_id,
+            transform,
+            array('f', triangle_mesh.nodeCoordinatesAsFloat),
+            array('i', triangle_mesh.nodeIndices),
+        )
+        self._store(key, new_mesh)
+        return new_mesh
+
+    def triangle_count(self, document_id: str, body: adsk.fusion.BRepBody, quality: int | None = None) -> int | None:
+        """Returns the number of triangles of the cached mesh of a body, or None if it isn't
+        cached. Doesn't check if the body changed since, so it's only an estimate.
+
+        @param document_id The creationId of the document the body is in.
+        @param body The body, or a proxy of it.
+        @param quality The quality passed to get.
+        """
+        mesh = self._meshes.get((document_id, body.entityToken, quality))
+        return None if mesh is None else mesh.triangle_count
+
+    def _store(self, key: tuple[str, str, int | None], mesh: CachedMesh):
+        if (old := self._meshes.pop(key, None)) is not None:
+            self.nbytes -= old.nbytes
+        if mesh.nbytes > self.max_bytes:
+            return
+
+        self._meshes[key] = mesh
+        self.nbytes += mesh.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._meshes.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def forget_document(self, document_id: str):
+        """Drops the meshes of a document, e.g. when it is closed."""
+        for key in [key for key in self._meshes if key[0] == document_id]:
+            self.nbytes -= self._meshes.pop(key).nbytes
+
+    def clear(self):
+        self._meshes.clear()
+        self.nbytes = 0
+
+
+# Shared by every command that highlights bodies
+_mesh_cache: MeshCache | None = None
+
+
+def get_mesh_cache() -> MeshCache | None:
+    """Returns the mesh cache, or None if it is turned off with config.MESH_CACHE_MAX_BYTES."""
+    global _mesh_cache
+    if config.MESH_CACHE_MAX_BYTES <= 0:
+        return None
+    if _mesh_cache is None:
+        _mesh_cache = MeshCache(config.MESH_CACHE_MAX_BYTES)
+    _mesh_cache.max_bytes = config.MESH_CACHE_MAX_BYTES
+    return _mesh_cache
@@ -1,22 +1,18 @@
 import adsk.fusion
 import adsk.core
 
-from dataclasses import dataclass
-
+from ... import config
 from .. import counting_lib
+from .mesh_buffer import MeshBuffer
+from .mesh_cache import get_mesh_cache
+from .level_of_detail import (
+    LOD_FULL, LOD_COARSE, LOD_ORIENTED_BOXES, LOD_OCCURRENCE_BOXES, TRIANGLES_PER_BODY,
+    mesh_quality, pick_level_of_detail,
+)
 
 
 app = adsk.core.Application.get()
 
-@dataclass
-class Mesh:
-    vertices: list[float]
-    indices: list[int]
-
-    def add_mesh(self, other: "Mesh"):
-        self.indices += list([i + len(self.vertices) // 3 for i in other.indices])
-        self.vertices += other.vertices
-
 
 # fmt: off
 COLOR_OPACITY = 100
@@ -45,6 +41,13 @@ COLORS = [
 
 
 class SelectionGraphics:
+    """Highlights bodies with one show-through color.
+
+    Bodies added with add_occ and add_objs are collected, and only shown once `show` is
+    called, as one mesh. How detailed the mesh is depends on how many triangles the bodies
+    have, see config.HIGHLIGHT_TRIANGLE_BUDGET, unless `level_of_detail` is set.
+    """
+
     def __init__(self, color: adsk.core.Color):
         product = app.activeProduct
         design = adsk.fusion.Design.cast(product)
@@ -52,49 +55,102 @@ class SelectionGraphics:
 
         self._cgGroup = rootComp.customGraphicsGroups.add()
         self._mesh: adsk.fusion.CustomGraphicsMesh | None = None
+        # The bodies to show, with the occurrence they were added with
+        self._items: list[tuple[adsk.fusion.Occurrence | None, list[adsk.fusion.BRepBody]]] = []
+        self._n_bodies = 0
+        self._document_id = design.parentDocument.creationId
         self._colorEffect = adsk.fusion.CustomGraphicsShowThroughColorEffect.create(color, 0.4)
 
         self._cgGroup.isSelectable = False
 
+        # One of the LOD_ constants, or None to pick one from the number of bodies
+        self.level_of_detail: str | None = None
+
     def __del__(self):
         self.deleteMe()
 
     def deleteMe(self):
         if self._cgGroup:
             self._cgGroup.deleteMe()
+            self._cgGroup = None
+
+    def add_occ(self, occ: adsk.fusion.Occurrence, bodies: list[adsk.fusion.BRepBody] | None = None):
+        """Adds the visible bodies under an occurrence.
 
-    def add_occ(self, occ: adsk.fusion.Occurrence):
-        self.add_objs(*counting_lib.traverse_brepbodies(occ))
+        @param occ The occurrence, which is drawn as one box at LOD_OCCURRENCE_BOXES.
+        @param bodies The visible bodies under occ, if they are known already.
+        """
+        if bodies is None:
+            bodies = list(counting_lib.traverse_brepbodies(occ))
+        self._items.append((occ, bodies))
+        self._n_bodies += len(bodies)
 
     def add_objs(self, *objs: adsk.fusion.BRepBody):
-        added_geometry = Mesh([], [])
-
-        for obj in objs:
-            obj_mesh = obj.meshManager.displayMeshes.bestMesh
-            
-            added_geometry.add_mesh(
-                Mesh(
-                    obj_mesh.nodeCoordinatesAsFloat,
-                    obj_mesh.nodeIndices,
-                )
-            )
+        self._items.append((None, list(objs)))
+        self._n_bodies += len(objs)
+
+    def _add_body(self, buffer: MeshBuffer, body: adsk.fusion.BRepBody, level_of_detail: str):
+        if level_of_detail in (LOD_ORIENTED_BOXES, LOD_OCCURRENCE_BOXES):
+            buffer.add_oriented_box(body.orientedMinimumBoundingBox)
+            return
+
+        quality = mesh_quality(level_of_detail)
+        if (mesh_cache := get_mesh_cache()) is not None:
+            mesh = mesh_cache.get(self._document_id, body, quality)
+            buffer.add(mesh.coordinates, mesh.indices)
+        elif quality is None:
+            buffer.add_body(body)
+        else:
+            calculator = body.meshManager.createMeshCalculator()
+            calculator.setQuality(quality)
+            mesh = calculator.calculate()
+            buffer.add(mesh.nodeCoordinatesAsFloat, mesh.nodeIndices)
+
+    def count_triangles(self, level_of_detail: str) -> int:
+        """Returns about how many triangles `show` draws at a level of detail.
+
+        Bodies with a cached mesh at that level count with the triangles of that mesh, the
+        others with TRIANGLES_PER_BODY.
+
+        @param level_of_detail One of LEVELS_OF_DETAIL except LOD_OCCURRENCE_BOXES.
+        """
+        estimate = TRIANGLES_PER_BODY[level_of_detail]
+        mesh_cache = get_mesh_cache()
+        if level_of_detail not in (LOD_FULL, LOD_COARSE) or mesh_cache is None or len(mesh_cache) == 0:
+            return self._n_bodies * estimate
+
+        quality = mesh_quality(level_of_detail)
+        n_triangles = 0
+        for _, bodies in self._items:
+            for body in bodies:
+                n_cached = mesh_cache.triangle_count(self._document_id, body, quality)
+                n_triangles += estimate if n_cached is None else n_cached
+        return n_triangles
+
+    def show(self) -> str:
+        """Shows every body added so far, replacing what was shown before.
+
+        @return The level of detail the bodies are shown with.
+        """
+        level_of_detail = self.level_of_detail or pick_level_of_detail(
+            self.count_triangles, config.HIGHLIGHT_TRIANGLE_BUDGET
+        )
+
+        buffer = MeshBuffer()
+        for occ, bodies in self._items:
+            if level_of_detail == LOD_OCCURRENCE_BOXES and occ is not None:
+                buffer.add_bounding_box(occ.boundingBox)
+                continue
+            for body in bodies:
+                self._add_body(buffer, body, level_of_detail)
 
         if self._mesh is not None:
-            # We already have a mesh = Append the new mesh data and replace the old one
-            original_mesh = Mesh(
-                list(self._mesh.coordinates.coordinates).copy(),
-                list(self._mesh.vertexIndexList).copy(),
-            )
-            added_geometry.add_mesh(original_mesh)
-
-        # No mesh yet = Create a new one
-        self._mesh = self._cgGroup.addMesh(
-            adsk.fusion.CustomGraphicsCoordinates.create(added_geometry.vertices),
-            added_geometry.indices,
-            [], []
-        )
-        
-        self._mesh.color = self._colorEffect
+            self._mesh.deleteMe()
+            self._mesh = None
+        if buffer.vertex_count > 0:
+            self._mesh = buffer.add_to(self._cgGroup)
+            self._mesh.color = self._colorEffect
+        return level_of_detail
 
     def set_color(self, color: adsk.core.Color):
         self._colorEffect = adsk.fusion.CustomGraphicsShowThroughColorEffect.create(color, 0.4)
@@ -125,6 +181,9 @@ class SelectionGraphicsGroups:
     def get(self, group: str) -> SelectionGraphics | None:
         if group in self._groups:
             return self._groups[group]
+
+    def values(self) -> list[SelectionGraphics]:
+        return list(self._groups.values())
     
     def create(self, group: str) -> SelectionGraphics:
         if group in self._groups:
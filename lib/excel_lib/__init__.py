@@ -1,2 +1,5 @@
-from .excel_lib import open_excel_doc, save, close, write_bodies_to_table, write_modules_to_table
+from .excel_lib import open_excel_doc, save, close, write_bodies_to_table, write_modules_to_table, shutdown
+from .excel_lib import BODY_TABLE_NAME, MODULE_TABLE_NAME, BODY_COLUMNS, MODULE_COLUMNS
+from .excel_lib import body_rows, module_rows, count_module_rows, is_excel_file_locked, is_xlsx_backend_used
+from .xlsx_workbook import XlsxWorkbook
 from .fusion_dataclasses import Body, Module
\ No newline at end of file
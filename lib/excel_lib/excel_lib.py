@@ -1,27 +1,59 @@
 import adsk.core
-import win32com.client
-import pythoncom
+import difflib
+import itertools
+import operator
+
+from pathlib import Path
+from typing import Callable
+from collections.abc import Iterable, Iterator, Sequence
 
 from ... import config
+from .. import fusionAddInUtils as futil
+from .excel_session import ExcelSession
 from .fusion_dataclasses import Body, Module
+from .xlsx_workbook import XlsxWorkbook
+
+# Excel automation only works on Windows, the xlsx backend works everywhere
+try:
+    import win32com.client
 
-from exceltypes import Application, Workbook, Worksheet, ListObject, Range
+    from exceltypes import Workbook, Worksheet, ListObject, Range
+except Exception:
+    win32com = None
+    Workbook = Worksheet = ListObject = Range = object
 
 BODY_TABLE_NAME = "IndividualParts"
 MODULE_TABLE_NAME = "ModulesParts"
 SHEET_NAME = "LinkFusion"
 
+# The columns of the tables, with the type of their values
+BODY_COLUMNS = [("Name", str), ("Count", int), ("Material", str)]
+MODULE_COLUMNS = [("Category", str), ("Id", int), ("Module", str), ("Name", str), ("Count", int)]
+
+# Files the xlsx backend can write, others like .xls are always written through Excel
+XLSX_SUFFIXES = {".xlsx", ".xlsm"}
+
+# Excel constants, exceltypes only has them as type hints
+XL_SHIFT_UP = -4162
+XL_SHIFT_DOWN = -4121
+XL_CALCULATION_MANUAL = -4135
+
+# The Excel instance shared by every export, see config.EXCEL_KEEP_ALIVE
+_session = ExcelSession()
+
+def is_excel_file_locked(file_path: str) -> bool:
+    """Whether the file can't be written to, usually because it's open in Excel."""
+    try:
+        with open(file_path, 'a'):
+            return False
+    except IOError:
+        return True
+
 def wait_until_excel_file_closed(file_path: str):
     app = adsk.core.Application.get()
     ui = app.userInterface
 
-    while True:
-        try:
-            with open(file_path, 'a'):
-                break
-        except IOError:
-            pass
-        
+    while is_excel_file_locked(file_path):
         button = ui.messageBox(
             "The file is probably already open. Please close the file and try again.",
             "Failed to open Excel file",
@@ -33,44 +65,226 @@ def wait_until_excel_file_closed(file_path: str):
         if button == adsk.core.DialogResults.DialogCancel:
             raise RuntimeError(adsk.core.DialogResults.DialogCancel)
 
-def open_excel_doc(excel_file_path: str) -> Workbook:
-    """Opens Excel document at given path."""
-    pythoncom.CoInitialize()
-    wait_until_excel_file_closed(excel_file_path)
-    excel: Application = win32com.client.Dispatch('Excel.Application')
-    excel.Visible = config.DEBUG
-    excel.DisplayAlerts = False
-    return excel.Workbooks.Open(excel_file_path, ReadOnly=False, Editable=True)
+def is_xlsx_backend_used(excel_file_path: str) -> bool:
+    """Whether the file at the given path is written directly instead of through Excel."""
+    return (
+        config.EXCEL_BACKEND == "xlsx" and Path(excel_file_path).suffix.lower() in XLSX_SUFFIXES
+        or win32com is None
+    )
+
+@futil.profiled
+def open_excel_doc(
+    excel_file_path: str,
+    wait_until_closed: Callable[[str], None] = wait_until_excel_file_closed,
+) -> Workbook | XlsxWorkbook:
+    """Opens Excel document at given path, see config.EXCEL_BACKEND.
+
+    @param excel_file_path The path of the Excel document.
+    @param wait_until_closed Called with the path before opening the document, returns once
+           the document can be written to. Asks the user to close the document by default,
+           which only works on the main thread.
+    """
+    if is_xlsx_backend_used(excel_file_path):
+        wait_until_closed(excel_file_path)
+        return XlsxWorkbook(excel_file_path)
+
+    # A workbook kept open by the session locks the file, but that lock is our own
+    if not _session.is_open(excel_file_path):
+        wait_until_closed(excel_file_path)
+    return _session.open(excel_file_path)
 
-def save(workbook: Workbook, save_path: str):
+@futil.profiled
+def save(workbook: Workbook | XlsxWorkbook, save_path: str):
     """Saves given Excel workbook at given path."""
+    if isinstance(workbook, XlsxWorkbook):
+        workbook.save(save_path)
+        return
     workbook.SaveAs(save_path, ConflictResolution=2)
+    _session.saved(workbook, save_path)
+
+def close(workbook: Workbook | XlsxWorkbook):
+    """Closes given Excel workbook, or keeps it open for the next export, see config.EXCEL_KEEP_WORKBOOKS_OPEN."""
+    if isinstance(workbook, XlsxWorkbook):
+        workbook.close()
+        return
+    _session.release(workbook)
+
+def shutdown():
+    """Closes the workbooks kept open between exports and quits Excel. Called by the export worker when it stops."""
+    _session.shutdown()
+
+@futil.profiled
+def set_table_data(
+    sheet: Worksheet,
+    table: ListObject,
+    rows: Iterable[Sequence],
+    n_rows: int,
+    key_columns: tuple[int, ...] | None = None,
+):
+    """Replaces the data of the given table.
+
+    @param sheet The sheet the table is on.
+    @param table The table to replace the data of.
+    @param rows The new rows of the table, only iterated once.
+    @param n_rows The number of rows in `rows`.
+    @param key_columns The columns that identify a row, see update_table_data. If None,
+           config.EXCEL_INCREMENTAL_UPDATE isn't set or the table has more than
+           config.EXCEL_INCREMENTAL_MAX_ROWS rows, the whole table is rewritten.
+    """
+    if key_columns is not None and config.EXCEL_INCREMENTAL_UPDATE and n_rows <= config.EXCEL_INCREMENTAL_MAX_ROWS:
+        update_table_data(sheet, table, list(rows), key_columns)
+        return
+
+    n_cols = table.Range.Columns.Count
+
+    if (body := table.DataBodyRange) is not None:
+        body.Clear()
+
+    # Sized once up front, tables always have at least one data row, even if it's empty
+    start_cell: Range = table.Range.Cells(1, 1)
+    table.Resize(sheet.Range(start_cell, table.Range.Cells(max(n_rows, 1) + 1, n_cols)))
+    body = table.DataBodyRange
+
+    # Written in blocks, so that neither the rows nor the arrays passed to Excel have to
+    # be in memory all at once
+    rows = iter(rows)
+    n_written = 0
+    while block := list(itertools.islice(rows, config.EXCEL_WRITE_BLOCK_ROWS)):
+        assert len(block[0]) == n_cols, \
+            f"Mismatched amount of columns in data and table: {len(block[0])=} != {n_cols=}"
+        assert n_written + len(block) <= n_rows, f"More rows than the {n_rows=} given"
+        sheet.Range(body.Cells(n_written + 1, 1), body.Cells(n_written + len(block), n_cols)).Value = block
+        n_written += len(block)
 
-def close(workbook: Workbook):
-    """Closes given Excel workbook."""
+    assert n_written == n_rows, f"Fewer rows than the {n_rows=} given: {n_written=}"
+
+def read_table_data(table: ListObject) -> list[tuple]:
+    """Reads the data of the given table in one call.
+
+    @return The rows of the table, with empty cells as None.
+    """
+    body: Range | None = table.DataBodyRange
+    if body is None:
+        return []
+    values = body.Value
+    if not isinstance(values, tuple):
+        # A single cell is returned as its value
+        return [(values,)]
+    return list(values)
+
+def update_table_data(sheet: Worksheet, table: ListObject, data: list[list], key_columns: tuple[int, ...]):
+    """Updates the data of the given table to match `data`, by writing only the rows that changed.
+
+    Rows are matched by the values in `key_columns`, like the name and material of a body,
+    so that rows added or removed in the middle of the table are inserted or deleted
+    instead of shifting every row below them. Only formulas depending on changed cells
+    are recalculated, as opposed to every formula depending on the table when all of it
+    is rewritten.
+
+    @param sheet The sheet the table is on.
+    @param table The table to update.
+    @param data The new rows of the table.
+    @param key_columns The columns that identify a row.
+    """
+    n_cols = table.Range.Columns.Count
+    assert not data or len(data[0]) == n_cols, \
+        f"Mismatched amount of columns in data and table: {len(data[0])=} != {n_cols=}"
+
+    with futil.profile("read_table_data"):
+        old_rows = [tuple("" if value is None else value for value in row) for row in read_table_data(table)]
+
+    key = operator.itemgetter(*key_columns)
+    with futil.profile("diff"):
+        old_keys = list(map(key, old_rows))
+        new_keys = list(map(key, data))
+        if old_keys == new_keys:
+            # Usually only counts change between exports
+            opcodes = [("equal", 0, len(old_keys), 0, len(new_keys))]
+        else:
+            opcodes = difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_opcodes()
+
+    def rows_range(first: int, n_rows: int) -> Range:
+        body: Range = table.DataBodyRange
+        return sheet.Range(body.Cells(first + 1, 1), body.Cells(first + n_rows, n_cols))
+
+    def write_changed(old_first: int, new_first: int, n_rows: int):
+        # Writes each run of changed rows as a block
+        i = 0
+        while i < n_rows:
+            if tuple(data[new_first + i]) == old_rows[old_first + i]:
+                i += 1
+                continue
+            start = i
+            while i < n_rows and tuple(data[new_first + i]) != old_rows[old_first + i]:
+                i += 1
+            rows_range(old_first + start, i - start).Value = data[new_first + start:new_first + i]
+
+    def insert(old_first: int, new_first: int, n_rows: int):
+        if old_first < len(old_rows):
+            rows_range(old_first, n_rows).Insert(Shift=XL_SHIFT_DOWN)
+        else:
+            # Cells inserted below the last row wouldn't be part of the table
+            table.Resize(sheet.Range(table.Range.Cells(1, 1), table.Range.Cells(old_first + n_rows + 1, n_cols)))
+        rows_range(old_first, n_rows).Value = data[new_first:new_first + n_rows]
+
+    excel = sheet.Application
+    calculation = excel.Calculation
+    excel.Calculation = XL_CALCULATION_MANUAL
     try:
-        workbook.Application.Quit()
+        # Bottom-up, so that inserting and deleting rows doesn't move the rows left to update
+        for tag, old_first, old_end, new_first, new_end in reversed(opcodes):
+            n_old = old_end - old_first
+            n_new = new_end - new_first
+            n_common = min(n_old, n_new)
+            if n_old > n_common:
+                rows_range(old_first + n_common, n_old - n_common).Delete(Shift=XL_SHIFT_UP)
+            elif n_new > n_common:
+                insert(old_first + n_common, new_first + n_common, n_new - n_common)
+            if n_common > 0:
+                write_changed(old_first, new_first, n_common)
     finally:
-        pythoncom.CoUninitialize()
+        # Recalculates the formulas depending on the cells that changed
+        excel.Calculation = calculation
 
-def set_table_data(sheet: Worksheet, table: ListObject, data: list[list]):
-    # TODO: Handle empty data
-    data_n_cols = len(data[0]) if data else 0
-    table_n_cols = table.Range.Columns.Count
+def write_table(
+    workbook: Workbook | XlsxWorkbook,
+    table_name: str,
+    rows: Iterable[Sequence],
+    n_rows: int,
+    key_columns: tuple[int, ...] | None = None,
+):
+    """Replaces the data of the table with the given name on the LinkFusion sheet.
 
-    assert data_n_cols == table_n_cols, \
-        f"Mismatched amount of columns in data and table: {data_n_cols=} != {table_n_cols=}"
+    @param rows The new rows of the table, only iterated once.
+    @param n_rows The number of rows in `rows`.
+    @param key_columns The columns that identify a row, see set_table_data.
+    """
+    if isinstance(workbook, XlsxWorkbook):
+        with futil.profile("set_table_data"):
+            workbook.set_table_data(SHEET_NAME, table_name, rows)
+        return
 
-    table.DataBodyRange.Clear()
+    sheet: Worksheet = workbook.Sheets(SHEET_NAME)
+    table: ListObject = sheet.ListObjects(table_name)
+    set_table_data(sheet, table, rows, n_rows, key_columns)
 
-    start_cell: Range = table.Range.Cells(1, 1)
-    end_cell: Range = start_cell.Offset(len(data)+1, len(data[0]) if data else 0)
-    new_range: Range = sheet.Range(start_cell, end_cell)
+def body_rows(bodies: list[Body]) -> Iterator[list]:
+    """Generates the rows of the Bodies table, see BODY_COLUMNS."""
+    return ([body.name, body.count, body.material] for body in bodies)
 
-    table.Resize(new_range)
-    table.DataBodyRange.Value = data
+def module_rows(modules: list[Module]) -> Iterator[list]:
+    """Generates the rows of the Modules table, one per body of each module, see MODULE_COLUMNS."""
+    return (
+        [module.category, id+1, module.name, body.name, body.count]
+        for id, module in enumerate(modules)
+        for body in module.bodies
+    )
 
-def write_bodies_to_table(workbook: Workbook, bodies: list[Body]):
+def count_module_rows(modules: list[Module]) -> int:
+    """The number of rows module_rows generates."""
+    return sum(len(module.bodies) for module in modules)
+
+def write_bodies_to_table(workbook: Workbook | XlsxWorkbook, bodies: list[Body]):
     """Populates the Bodies table in the given workbook.
 
     @note Raises KeyError if either the expected sheet or the expected
@@ -79,17 +293,10 @@ def write_bodies_to_table(workbook: Workbook, bodies: list[Body]):
     @param workbook The workbook in which to populate the Bodies table.
     @param bodies A list containing the data to populate the table with.
     """
-    # Convert list of bodies to 2d array
-    body_table_data = []
-    for body in bodies:
-        body_table_data.append([body.name, body.count, body.material])
-
-    sheet: Worksheet = workbook.Sheets(SHEET_NAME)
-    table: ListObject = sheet.ListObjects(BODY_TABLE_NAME)
-    set_table_data(sheet, table, body_table_data)
+    write_table(workbook, BODY_TABLE_NAME, body_rows(bodies), len(bodies), key_columns=(0, 2))
 
 
-def write_modules_to_table(workbook: Workbook, modules: list[Module]):
+def write_modules_to_table(workbook: Workbook | XlsxWorkbook, modules: list[Module]):
     """Populates the Modules table in the given workbook.
     
     @note Raises KeyError if either the expected sheet or the expected
@@ -98,12 +305,4 @@ def write_modules_to_table(workbook: Workbook, modules: list[Module]):
     @param workbook The workbook in which to populate the Modules table.
     @param modules A list containing the data to populate the table with.
     """
-    # Convert list of modules to 2d array
-    module_table_data = []
-    for id, module in enumerate(modules):
-        for body in module.bodies:
-            module_table_data.append([module.category, id+1, module.name, body.name, body.count])
-
-    sheet: Worksheet = workbook.Sheets(SHEET_NAME)
-    table: ListObject = sheet.ListObjects(MODULE_TABLE_NAME)
-    set_table_data(sheet, table, module_table_data)
\ No newline at end of file
+    write_table(workbook, MODULE_TABLE_NAME, module_rows(modules), count_module_rows(modules), key_columns=(2, 3))
@@ -0,0 +1,127 @@
+import os
+
+from ... import config
+from .. import fusionAddInUtils as futil
+
+# Excel automation only works on Windows
+try:
+    import win32com.client
+    import pythoncom
+except Exception:
+    win32com = pythoncom = None
+
+
+class ExcelSession:
+    """Keeps one hidden Excel instance running between exports, with the workbooks opened in it.
+
+    Starting Excel takes seconds, so instead of quitting it after every export, the instance
+    is kept until shutdown is called, see config.EXCEL_KEEP_ALIVE. Workbooks are closed when
+    released, unless config.EXCEL_KEEP_WORKBOOKS_OPEN is set. A kept workbook is reused as
+    long as the file hasn't changed on disk since it was opened or saved. Excel is started
+    again if it stopped responding, e.g. because it was closed from the task manager.
+
+    All methods must be called from the same thread, since COM objects can only be used in
+    the apartment they were created in.
+    """
+
+    def __init__(self):
+        self._excel = None
+        self._workbooks: dict[str, tuple[object, float]] = {}
+        self._is_com_initialized = False
+
+    def _key(self, path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def _is_alive(self) -> bool:
+        try:
+            self._excel.Workbooks.Count
+            return True
+        except pythoncom.com_error:
+            return False
+
+    def _application(self):
+        if self._excel is not None and not self._is_alive():
+            futil.log("Excel stopped responding, starting it again")
+            self._excel = None
+            self._workbooks.clear()
+
+        if self._excel is None:
+            if not self._is_com_initialized:
+                pythoncom.CoInitialize()
+                self._is_com_initialized = True
+
+            # DispatchEx starts a new instance, instead of taking over an Excel the user has open
+            self._excel = win32com.client.DispatchEx('Excel.Application')
+            self._excel.Visible = config.DEBUG
+            self._excel.DisplayAlerts = False
+        return self._excel
+
+    def is_open(self, path: str) -> bool:
+        """Whether the workbook at `path` is open in this session and unchanged on disk."""
+        if (cached := self._workbooks.get(self._key(path))) is None:
+            return False
+        try:
+            return os.stat(path).st_mtime == cached[1]
+        except OSError:
+            return False
+
+    def open(self, path: str):
+        """Returns the workbook at `path`, opening it if it isn't open already."""
+        excel = self._application()
+        key = self._key(path)
+
+        if self.is_open(path):
+            return self._workbooks[key][0]
+
+        if (cached := self._workbooks.pop(key, None)) is not None:
+            # The file was changed outside of this session
+            self._close_workbook(cached[0])
+
+        workbook = excel.Workbooks.Open(path, ReadOnly=False, Editable=True)
+        self._workbooks[key] = (workbook, os.stat(path).st_mtime)
+        return workbook
+
+    def saved(self, workbook, path: str):
+        """Records that `workbook` was saved at `path`, so it can be reused for that file."""
+        for key, (cached, _) in list(self._workbooks.items()):
+            if cached is workbook:
+                del self._workbooks[key]
+        self._workbooks[self._key(path)] = (workbook, os.stat(path).st_mtime)
+
+    def release(self, workbook):
+        """Called when an export is done with `workbook`. Shuts down the session unless
+        config.EXCEL_KEEP_ALIVE is set, and closes the workbook unless
+        config.EXCEL_KEEP_WORKBOOKS_OPEN is set as well."""
+        if not config.EXCEL_KEEP_ALIVE:
+            self.shutdown()
+            return
+        if config.EXCEL_KEEP_WORKBOOKS_OPEN:
+            return
+
+        for key, (cached, _) in list(self._workbooks.items()):
+            if cached is workbook:
+                del self._workbooks[key]
+        self._close_workbook(workbook)
+
+    def _close_workbook(self, workbook):
+        try:
+            workbook.Close(SaveChanges=False)
+        except pythoncom.com_error:
+            pass
+
+    def shutdown(self):
+        """Closes every workbook without saving and quits Excel."""
+        try:
+            if self._excel is not None:
+                for workbook, _ in self._workbooks.values():
+                    self._close_workbook(workbook)
+                try:
+                    self._excel.Quit()
+                except pythoncom.com_error:
+                    pass
+        finally:
+            self._excel = None
+            self._workbooks.clear()
+            if self._is_com_initialized:
+                pythoncom.CoUninitialize()
+                self._is_com_initialized = False
@@ -0,0 +1,440 @@
+import io
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+
+TABLE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/table"
+
+WORKBOOK_PATH = "xl/workbook.xml"
+CONTENT_TYPES_PATH = "[Content_Types].xml"
+CALC_CHAIN_PATH = "xl/calcChain.xml"
+
+# Elements that come before calcPr in workbook.xml
+WORKBOOK_ELEMENTS_BEFORE_CALC_PR = [
+    "fileVersion", "fileSharing", "workbookPr", "workbookProtection", "bookViews", "sheets",
+    "functionGroups", "externalReferences", "definedNames",
+]
+
+# Row attributes that Excel writes on every row
+PLAIN_ROW_ATTRIBUTES = {"r", "spans", "{http://schemas.microsoft.com/office/spreadsheetml/2009/9/ac}dyDescent"}
+
+CELL_REF_PATTERN = re.compile(r"^\$?([A-Z]+)\$?(\d+)$")
+XMLNS_PATTERN = re.compile(r' xmlns(?::[\w.-]+)?="[^"]*"')
+INVALID_XML_CHARS_PATTERN = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Stands in for the rows while the rest of a sheet is serialized
+ROWS_MARKER = "BODYCOUNT_ROWS"
+
+
+def _q(tag: str, ns: str = MAIN_NS) -> str:
+    return f"{{{ns}}}{tag}"
+
+
+def column_index(letters: str) -> int:
+    """Converts column letters to a 1-based index, e.g. "A" to 1 and "AA" to 27."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index
+
+
+def column_letters(index: int) -> str:
+    """Converts a 1-based column index to letters, e.g. 1 to "A" and 27 to "AA"."""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def parse_ref(ref: str) -> tuple[int, int, int, int]:
+    """Parses a range like "B2:D10" into (first column, first row, last column, last row)."""
+    first, _, last = ref.partition(':')
+    first_match = CELL_REF_PATTERN.match(first)
+    last_match = CELL_REF_PATTERN.match(last or first)
+    if first_match is None or last_match is None:
+        raise ValueError(f"Invalid range: {ref}")
+    return (
+        column_index(first_match.group(1)), int(first_match.group(2)),
+        column_index(last_match.group(1)), int(last_match.group(2)),
+    )
+
+
+def format_ref(first_col: int, first_row: int, last_col: int, last_row: int) -> str:
+    return f"{column_letters(first_col)}{first_row}:{column_letters(last_col)}{last_row}"
+
+
+class _XmlPart:
+    """A parsed XML part, serialized with the same namespace prefixes as it was read with."""
+
+    def __init__(self, data: bytes):
+        parser = ET.iterparse(io.BytesIO(data), events=('start-ns',))
+        self.namespaces: list[tuple[str, str]] = [ns for _, ns in parser]
+        self.root: ET.Element = parser.root
+
+    def to_bytes(self) -> bytes:
+        for prefix, uri in self.namespaces:
+            ET.register_namespace(prefix, uri)
+        data = ET.tostring(self.root, encoding='UTF-8', xml_declaration=True)
+
+        # ElementTree drops declarations of prefixes that are only used in attribute values,
+        # like mc:Ignorable="x14ac xr", which makes Excel refuse to open the file.
+        start = data.index(b'<', data.index(b'?>'))
+        end = data.index(b'>', start)
+        root_tag = data[start:end]
+        missing = b"".join(
+            f' xmlns:{prefix}="{uri}"'.encode()
+            for prefix, uri in self.namespaces
+            if prefix and f'xmlns:{prefix}='.encode() not in root_tag
+        )
+        if root_tag.endswith(b'/'):
+            end -= 1
+        return data[:end] + missing + data[end:]
+
+
+class _Row:
+    """A row of a sheet that has been changed, with its cells by column. New cells are kept
+    as XML text, since building elements for them is what takes time with big tables."""
+    __slots__ = ('attrib', 'cells')
+
+    def __init__(self, attrib: dict[str, str], cells: dict[int, ET.Element | str]):
+        self.attrib = attrib
+        self.cells = cells
+
+
+class _SheetPart(_XmlPart):
+    """A worksheet part, with its rows kept by row number so cells can be replaced quickly."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.sheet_data = self.root.find(_q("sheetData"))
+        self.rows: dict[int, ET.Element | _Row] = {int(row.get("r")): row for row in self.sheet_data}
+        self.sheet_data[:] = []
+        self.prefix = next((f"{prefix}:" for prefix, uri in self.namespaces if uri == MAIN_NS and prefix), "")
+
+    def _editable_row(self, r: int) -> _Row:
+        row = self.rows.get(r)
+        if isinstance(row, _Row):
+            return row
+
+        if row is None:
+            row = self.rows[r] = _Row({"r": str(r)}, {})
+        else:
+            # The spans are only an optimization hint, and might not cover the new cells
+            attrib = {key: value for key, value in row.attrib.items() if key != "spans"}
+            row = self.rows[r] = _Row(attrib, {_cell_column(cell): cell for cell in row})
+        return row
+
+    def clear_cells(self, first_col: int, first_row: int, last_col: int, last_row: int):
+        """Removes every cell in the given range, and the rows left empty and unformatted."""
+        for r in range(first_row, last_row + 1):
+            if r not in self.rows:
+                continue
+            row = self._editable_row(r)
+            for col in [col for col in row.cells if first_col <= col <= last_col]:
+                del row.cells[col]
+            if not row.cells and all(key in PLAIN_ROW_ATTRIBUTES for key in row.attrib):
+                del self.rows[r]
+
+    def take_cells(self, first_col: int, last_col: int, r: int) -> list[ET.Element]:
+        """Removes the cells of row `r` in the given columns, and returns them.
+
+        Cells written with write_cells since the sheet was read are dropped instead.
+        """
+        if r not in self.rows:
+            return []
+        row = self._editable_row(r)
+        cells = []
+        for col in [col for col in row.cells if first_col <= col <= last_col]:
+            if not isinstance(cell := row.cells.pop(col), str):
+                cells.append(cell)
+        return cells
+
+    def put_cells(self, r: int, cells: list[ET.Element]):
+        """Places cells taken with take_cells in row `r`, keeping their columns."""
+        if not cells:
+            return
+        row = self._editable_row(r)
+        for cell in cells:
+            col = _cell_column(cell)
+            cell.set("r", f"{column_letters(col)}{r}")
+            row.cells[col] = cell
+
+    def write_cells(self, first_col: int, first_row: int, n_cols: int, rows: Iterable[Sequence]) -> int:
+        """Writes values to the cells starting at the given column and row.
+
+        @return The number of rows written.
+        """
+        letters = [column_letters(first_col + j) for j in range(n_cols)]
+        n_rows = 0
+        for i, values in enumerate(rows):
+            assert len(values) == n_cols, \
+                f"Mismatched amount of columns in data and table: {len(values)=} != {n_cols=}"
+            r = first_row + i
+            cells = self._editable_row(r).cells
+            for j, value in enumerate(values):
+                if value is not None:
+                    cells[first_col + j] = _cell_xml(self.prefix, f"{letters[j]}{r}", value)
+            n_rows = i + 1
+        return n_rows
+
+    def to_bytes(self) -> bytes:
+        self.sheet_data.text = ROWS_MARKER
+        try:
+            data = super().to_bytes()
+        finally:
+            self.sheet_data.text = None
+        return data.replace(ROWS_MARKER.encode(), self._rows_xml().encode('utf-8'), 1)
+
+    def _rows_xml(self) -> str:
+        prefixes = {uri: prefix for prefix, uri in self.namespaces}
+        prefixes[XML_NS] = "xml"
+        declarations = {
+            f' xmlns:{prefix}="{uri}"' if prefix else f' xmlns="{uri}"'
+            for prefix, uri in self.namespaces
+        }
+
+        def fragment(element: ET.Element) -> str:
+            # Elements serialized on their own declare their namespaces again
+            text = ET.tostring(element, encoding='unicode')
+            end = text.index('>')
+            start_tag = XMLNS_PATTERN.sub(lambda m: "" if m.group(0) in declarations else m.group(0), text[:end])
+            return start_tag + text[end:]
+
+        def attribute_name(key: str) -> str:
+            if not key.startswith('{'):
+                return key
+            uri, name = key[1:].split('}')
+            return f"{prefixes[uri]}:{name}"
+
+        p = self.prefix
+        parts = []
+        for r in sorted(self.rows):
+            row = self.rows[r]
+            if not isinstance(row, _Row):
+                parts.append(fragment(row))
+                continue
+
+            attributes = "".join(
+                f' {attribute_name(key)}="{escape(value, {chr(34): "&quot;"})}"'
+                for key, value in row.attrib.items()
+            )
+            parts.append(f"<{p}row{attributes}>")
+            for col in sorted(row.cells):
+                cell = row.cells[col]
+                parts.append(cell if isinstance(cell, str) else fragment(cell))
+            parts.append(f"</{p}row>")
+        return "".join(parts)
+
+
+class XlsxWorkbook:
+    """A workbook read directly from an .xlsx or .xlsm file, without starting Excel.
+
+    Only the parts that are changed are rewritten, every other part of the file is copied as
+    is when saving. Values are written as numbers and inline strings, which Excel turns into
+    shared strings the next time the file is saved in Excel.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._infos: list[zipfile.ZipInfo] = []
+        self._data: dict[str, bytes] = {}
+        self._parts: dict[str, _XmlPart] = {}
+        self._modified: set[str] = set()
+        self._deleted: set[str] = set()
+
+        with zipfile.ZipFile(self.path) as zip_file:
+            for info in zip_file.infolist():
+                self._infos.append(info)
+                self._data[info.filename] = zip_file.read(info)
+
+    def _part(self, path: str) -> _XmlPart:
+        if (part := self._parts.get(path)) is None:
+            if path not in self._data:
+                raise KeyError(path)
+            part = self._parts[path] = _XmlPart(self._data[path])
+        return part
+
+    def _sheet_part(self, path: str) -> "_SheetPart":
+        if (part := self._parts.get(path)) is None:
+            part = self._parts[path] = _SheetPart(self._data[path])
+        return part
+
+    def _relationships(self, path: str) -> list[ET.Element]:
+        directory, name = posixpath.split(path)
+        rels_path = posixpath.join(directory, "_rels", f"{name}.rels")
+        if rels_path not in self._data:
+            return []
+        return list(self._part(rels_path).root)
+
+    def _resolve(self, path: str, target: str) -> str:
+        if target.startswith('/'):
+            return target[1:]
+        return posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+
+    def _sheet_path(self, sheet_name: str) -> str:
+        workbook = self._part(WORKBOOK_PATH).root
+        for sheet in workbook.iter(_q("sheet")):
+            if sheet.get("name") == sheet_name:
+                rel_id = sheet.get(_q("id", REL_NS))
+                break
+        else:
+            raise KeyError(sheet_name)
+
+        for rel in self._relationships(WORKBOOK_PATH):
+            if rel.get("Id") == rel_id:
+                return self._resolve(WORKBOOK_PATH, rel.get("Target"))
+        raise KeyError(sheet_name)
+
+    def _table_path(self, sheet_path: str, table_name: str) -> str:
+        for rel in self._relationships(sheet_path):
+            if rel.get("Type") != TABLE_REL_TYPE:
+                continue
+            table_path = self._resolve(sheet_path, rel.get("Target"))
+            table = self._part(table_path).root
+            if table_name in (table.get("displayName"), table.get("name")):
+                return table_path
+        raise KeyError(table_name)
+
+    def set_table_data(self, sheet_name: str, table_name: str, rows: Iterable[Sequence]):
+        """Replaces the data rows of a table, and resizes the table to fit them.
+
+        Like writing the table through Excel, the cells of the old data rows are cleared,
+        and cells outside the table are left untouched. A totals row is moved to below the
+        new last data row.
+
+        @note Raises KeyError if either the sheet or the table cannot be found.
+
+        @param sheet_name The name of the sheet with the table.
+        @param table_name The name of the table.
+        @param rows The rows to write, with one value for each column of the table.
+        """
+        sheet_path = self._sheet_path(sheet_name)
+        table_path = self._table_path(sheet_path, table_name)
+        sheet_part = self._sheet_part(sheet_path)
+        sheet = sheet_part.root
+        table = self._part(table_path).root
+
+        first_col, header_row, last_col, last_row = parse_ref(table.get("ref"))
+        n_totals_rows = int(table.get("totalsRowCount", "0"))
+
+        totals_rows = [
+            sheet_part.take_cells(first_col, last_col, r)
+            for r in range(last_row - n_totals_rows + 1, last_row + 1)
+        ]
+        sheet_part.clear_cells(first_col, header_row + 1, last_col, last_row)
+        n_rows = sheet_part.write_cells(first_col, header_row + 1, last_col - first_col + 1, rows)
+
+        # Tables always have at least one data row, even if it's empty
+        last_data_row = header_row + max(n_rows, 1)
+        for i, cells in enumerate(totals_rows):
+            sheet_part.put_cells(last_data_row + 1 + i, cells)
+        new_last_row = last_data_row + n_totals_rows
+
+        self._modified.update((sheet_path, table_path))
+
+        table.set("ref", format_ref(first_col, header_row, last_col, new_last_row))
+        if (auto_filter := table.find(_q("autoFilter"))) is not None:
+            # The filter only covers the header and data rows
+            auto_filter.set("ref", format_ref(first_col, header_row, last_col, last_data_row))
+            # The remembered sort refers to the old rows
+            if (sort_state := auto_filter.find(_q("sortState"))) is not None:
+                auto_filter.remove(sort_state)
+        if (sort_state := table.find(_q("sortState"))) is not None:
+            table.remove(sort_state)
+
+        if (dimension := sheet.find(_q("dimension"))) is not None:
+            min_col, min_row, max_col, max_row = parse_ref(dimension.get("ref"))
+            dimension.set("ref", format_ref(
+                min(min_col, first_col), min(min_row, header_row),
+                max(max_col, last_col), max(max_row, new_last_row),
+            ))
+
+        self._mark_for_recalculation()
+
+    def _mark_for_recalculation(self):
+        """Makes Excel recalculate every formula when the file is opened, since formulas
+        that depend on the tables still hold the values they had before."""
+        workbook = self._part(WORKBOOK_PATH).root
+        if (calc_pr := workbook.find(_q("calcPr"))) is None:
+            index = 0
+            for i, element in enumerate(workbook):
+                if element.tag in [_q(tag) for tag in WORKBOOK_ELEMENTS_BEFORE_CALC_PR]:
+                    index = i + 1
+            calc_pr = ET.Element(_q("calcPr"))
+            workbook.insert(index, calc_pr)
+        calc_pr.set("fullCalcOnLoad", "1")
+        self._modified.add(WORKBOOK_PATH)
+
+        # The calculation chain may refer to cleared formulas, Excel rebuilds it if missing
+        if CALC_CHAIN_PATH in self._data and CALC_CHAIN_PATH not in self._deleted:
+            self._deleted.add(CALC_CHAIN_PATH)
+
+            rels = self._part("xl/_rels/workbook.xml.rels").root
+            for rel in list(rels):
+                if self._resolve(WORKBOOK_PATH, rel.get("Target")) == CALC_CHAIN_PATH:
+                    rels.remove(rel)
+            self._modified.add("xl/_rels/workbook.xml.rels")
+
+            content_types = self._part(CONTENT_TYPES_PATH).root
+            for override in list(content_types):
+                if override.get("PartName") == f"/{CALC_CHAIN_PATH}":
+                    content_types.remove(override)
+            self._modified.add(CONTENT_TYPES_PATH)
+
+    def save(self, path: str | Path):
+        """Saves the workbook at the given path, replacing any file there."""
+        path = Path(path)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=path.suffix)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                for info in self._infos:
+                    if info.filename in self._deleted:
+                        continue
+                    if info.filename in self._modified:
+                        data = self._parts[info.filename].to_bytes()
+                        zip_file.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+                    else:
+                        zip_file.writestr(info, self._data[info.filename])
+            os.replace(temp_path, path)
+        except:
+            os.remove(temp_path)
+            raise
+
+    def close(self):
+        self._infos = []
+        self._data = {}
+        self._parts = {}
+        self._modified = set()
+
+
+def _cell_column(cell: ET.Element) -> int:
+    return column_index(CELL_REF_PATTERN.match(cell.get("r")).group(1))
+
+
+def _cell_xml(prefix: str, ref: str, value) -> str:
+    if isinstance(value, bool):
+        return f'<{prefix}c r="{ref}" t="b"><{prefix}v>{int(value)}</{prefix}v></{prefix}c>'
+    if isinstance(value, (int, float)):
+        return f'<{prefix}c r="{ref}"><{prefix}v>{value!r}</{prefix}v></{prefix}c>'
+
+    text = escape(INVALID_XML_CHARS_PATTERN.sub("", str(value)))
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return (
+        f'<{prefix}c r="{ref}" t="inlineStr"><{prefix}is><{prefix}t{space}>{text}'
+        f'</{prefix}t></{prefix}is></{prefix}c>'
+    )
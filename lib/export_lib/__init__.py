@@ -0,0 +1,7 @@
+from .exporter import Exporter, ExportContext, ExportCancelled
+from .exporters import EXPORTERS, DEFAULT_EXPORTER, get_exporter
+from .excel_exporter import ExcelExporter
+from .flat_exporters import CsvExporter, JsonLinesExporter
+from .columnar import ColumnarExporter, write_columnar, read_columnar
+from .export_worker import ExportWorker, ExportJob, ExportEvent
+from .shared_worker import get_export_worker, stop_export_worker
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""A compact columnar file format for the tables, in the spirit of Parquet, that can be
+written and read without any packages.
+
+A file holds one table:
+
+- The magic bytes b"BCOLUMN1".
+- A little-endian u32 with the length of the header, followed by the header as UTF-8
+  JSON: {"table": name, "n_rows": n, "columns": [{"name", "type", "size"}, ...]}.
+- The data of each column, in the order of the header, zlib-compressed. `size` is the
+  compressed size in bytes. The data of an "int64" column is n little-endian i64.
+  A "string" column is dictionary encoded: a u32 number of distinct values, a u32 byte
+  length for each of them, the values as UTF-8 and then n u32 indices into them.
+"""
+import json
+import struct
+import sys
+import zlib
+
+from array import array
+from pathlib import Path
+from collections.abc import Iterable, Sequence
+
+from .. import fusionAddInUtils as futil
+from ..excel_lib import Body, Module
+from .exporter import Exporter, ExportContext, tables, table_path, open_replacing
+
+MAGIC = b"BCOLUMN1"
+TYPE_NAMES = {int: "int64", str: "string"}
+
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class _StringColumn:
+    def __init__(self):
+        self.indices = array('I')
+        self.dictionary: dict[str, int] = {}
+
+    def append(self, value: str):
+        if (index := self.dictionary.get(value)) is None:
+            index = self.dictionary[value] = len(self.dictionary)
+        self.indices.append(index)
+
+    def to_bytes(self) -> bytes:
+        encoded = [value.encode('utf-8') for value in self.dictionary]
+        lengths = array('I', map(len, encoded))
+        return b"".join([
+            struct.pack('<I', len(encoded)),
+            _to_little_endian(lengths),
+            *encoded,
+            _to_little_endian(self.indices),
+        ])
+
+
+class _IntColumn:
+    def __init__(self):
+        self.values = array('q')
+        self.append = self.values.append
+
+    def to_bytes(self) -> bytes:
+        return _to_little_endian(self.values)
+
+
+def write_columnar(path: Path, table_name: str, columns: list[tuple[str, type]], rows: Iterable[Sequence]):
+    """Writes a table to a columnar file, see the module documentation.
+
+    Only the encoded columns are kept in memory, not the rows.
+
+    @param path The file to write.
+    @param table_name The name of the table, stored in the header.
+    @param columns The name and type (int or str) of each column.
+    @param rows The rows of the table.
+    """
+    column_data = [_IntColumn() if column_type is int else _StringColumn() for _, column_type in columns]
+    appends = [column.append for column in column_data]
+    n_rows = 0
+    for row in rows:
+        for append, value in zip(appends, row):
+            append(value)
+        n_rows += 1
+
+    chunks = [zlib.compress(column.to_bytes()) for column in column_data]
+    header = json.dumps({
+        "table": table_name,
+        "n_rows": n_rows,
+        "columns": [
+            {"name": name, "type": TYPE_NAMES[column_type], "size": len(chunk)}
+            for (name, column_type), chunk in zip(columns, chunks)
+        ],
+    }).encode('utf-8')
+
+    with open_replacing(path, 'wb') as fd:
+        fd.write(MAGIC)
+        fd.write(struct.pack('<I', len(header)))
+        fd.write(header)
+        for chunk in chunks:
+            fd.write(chunk)
+
+
+def read_columnar(path: str | Path) -> tuple[str, dict[str, list]]:
+    """Reads a file written by write_columnar.
+
+    @return The name of the table and the values of each column by column name.
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"Not a columnar table file: {path}")
+
+    offset = len(MAGIC)
+    (header_size,) = struct.unpack_from('<I', data, offset)
+    offset += 4
+    header = json.loads(data[offset:offset + header_size])
+    offset += header_size
+
+    n_rows = header["n_rows"]
+    columns: dict[str, list] = {}
+    for column in header["columns"]:
+        chunk = zlib.decompress(data[offset:offset + column["size"]])
+        offset += column["size"]
+
+        if column["type"] == "int64":
+            columns[column["name"]] = _from_little_endian('q', chunk).tolist()
+            continue
+
+        (n_values,) = struct.unpack_from('<I', chunk, 0)
+        position = 4 + 4 * n_values
+        lengths = _from_little_endian('I', chunk[4:position])
+        values = []
+        for length in lengths:
+            values.append(chunk[position:position + length].decode('utf-8'))
+            position += length
+        indices = _from_little_endian('I', chunk[position:position + 4 * n_rows])
+        columns[column["name"]] = [values[i] for i in indices]
+
+    return header["table"], columns
+
+
+class ColumnarExporter(Exporter):
+    """Writes each table to a columnar .bcol file next to the selected file, see write_columnar."""
+
+    name = "Columnar"
+    steps = ["Writing bodies", "Writing modules"]
+
+    @futil.profiled(name="export_columnar")
+    def export(self, path: str, bodies: list[Body], modules: list[Module], context: ExportContext):
+        for step, (table_name, columns, _, rows) in zip(self.steps, tables(bodies, modules)):
+            context.step(step)
+            columnar_path = table_path(path, table_name, ".bcol")
+            context.wait_until_closed(str(columnar_path))
+            write_columnar(columnar_path, table_name, columns, rows)
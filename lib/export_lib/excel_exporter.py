@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from .. import fusionAddInUtils as futil
+from .. import excel_lib
+from ..excel_lib import Body, Module
+from .exporter import Exporter, ExportContext
+
+
+class ExcelExporter(Exporter):
+    """Fills the tables of an existing Kitchen X workbook, see config.EXCEL_BACKEND."""
+
+    name = "Excel"
+    steps = ["Opening Excel file", "Writing bodies", "Writing modules", "Saving"]
+
+    def needs_excel_thread(self, path: str) -> bool:
+        return not excel_lib.is_xlsx_backend_used(path)
+
+    def is_valid_path(self, path: Path) -> bool:
+        # The tables are written into the workbook, so it has to exist already
+        return path.is_absolute() and path.is_file()
+
+    def export(self, path: str, bodies: list[Body], modules: list[Module], context: ExportContext):
+        context.step(self.steps[0])
+        workbook = excel_lib.open_excel_doc(path, context.wait_until_closed)
+        try:
+            context.step(self.steps[1])
+            excel_lib.write_bodies_to_table(workbook, bodies)
+            context.step(self.steps[2])
+            excel_lib.write_modules_to_table(workbook, modules)
+            context.step(self.steps[3])
+            excel_lib.save(workbook, path)
+        finally:
+            with futil.profile("close"):
+                excel_lib.close(workbook)
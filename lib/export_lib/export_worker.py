@@ -0,0 +1,238 @@
+import adsk.core
+import os
+import queue
+import threading
+import time
+import traceback
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from ... import config
+from .. import fusionAddInUtils as futil
+from .. import excel_lib
+from ..excel_lib import Body, Module
+from .exporter import Exporter, ExportContext, ExportCancelled
+
+
+@dataclass
+class ExportJob:
+    """An export of the counted bodies and modules of a design.
+
+    Everything read from the Fusion API has to be read on the main thread before the job
+    is submitted, the worker only runs `collect_bodies` and the exporter.
+    """
+    exporter: Exporter
+    # The path selected in the dialog, see Exporter.export
+    path: str
+    modules: list[Module]
+    # Maps the modules to the bodies of the Bodies table
+    collect_bodies: Callable[[], list[Body]]
+    # Called on the main thread with each event of the job, see ExportWorker.dispatch_events
+    on_event: Callable[["ExportEvent"], None] | None = None
+    # Called on the main thread while the job is unfinished, the job is cancelled once it
+    # returns True, e.g. when the Cancel button of its progress dialog was clicked
+    is_cancelled: Callable[[], bool] | None = None
+    # How long the worker took to run the job, once it's finished
+    seconds: float | None = None
+    cancel_requested: threading.Event = field(default_factory=threading.Event)
+    _retry_answers: queue.Queue = field(default_factory=queue.Queue)
+
+    @property
+    def n_steps(self) -> int:
+        return len(self.exporter.steps) + 1
+
+    def cancel(self):
+        """Stops the export before its next step."""
+        self.cancel_requested.set()
+        self._retry_answers.put(False)
+
+    def answer_file_locked(self, retry: bool):
+        """Answers a "file_locked" event, see ExportEvent."""
+        self._retry_answers.put(retry)
+
+
+@dataclass
+class ExportEvent:
+    """Something that happened to an export, reported to the main thread.
+
+    kind is one of:
+    - "progress": `step` of `n_steps` started, described by `message`.
+    - "file_locked": The file `message` is open in another program. The export waits
+      until ExportJob.answer_file_locked is called.
+    - "done", "cancelled": The export finished.
+    - "failed": The export failed, `message` is the traceback.
+    - "log": `message` was logged at `level` while running the export. dispatch_events logs
+      it, since the Fusion log can only be written on the main thread.
+    """
+    job: ExportJob
+    kind: str
+    message: str = ""
+    step: int = 0
+    n_steps: int = 0
+    level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel
+
+
+class ExportWorker:
+    """Runs exports in the background, so that Fusion stays responsive.
+
+    Exports through Excel run one at a time on the worker thread, which owns the Excel
+    session kept between exports, see config.EXCEL_KEEP_ALIVE. The other exports run on a
+    pool of config.EXPORT_POOL_SIZE threads. Events are queued and `notify` is called after
+    each one, which can be called from any thread. It should make the main thread call
+    take_events or dispatch_events, e.g. by firing a Fusion custom event.
+
+    While jobs are unfinished, `notify` is also called every
+    config.EXPORT_CANCEL_POLL_SECONDS, so that dispatch_events checks the is_cancelled
+    callback of the jobs even when a job reports nothing for a long time, e.g. while Excel
+    opens a large workbook.
+    """
+
+    def __init__(self, notify: Callable[[], None]):
+        self._notify = notify
+        self._jobs: queue.Queue[ExportJob | None] = queue.Queue()
+        self._events: queue.Queue[ExportEvent] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._pool: ThreadPoolExecutor | None = None
+        # The jobs submitted and not finished yet, by id
+        self._unfinished: dict[int, ExportJob] = {}
+        self._unfinished_lock = threading.Lock()
+        # Calls notify while there are unfinished jobs, guarded by _unfinished_lock
+        self._poll_thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    def submit(self, job: ExportJob) -> ExportJob:
+        """Queues the job, to be run after the ones submitted before it."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="BodyCount export", daemon=True)
+            self._thread.start()
+        with self._unfinished_lock:
+            self._unfinished[id(job)] = job
+            if self._poll_thread is None:
+                self._poll_thread = threading.Thread(target=self._poll, name="BodyCount export poll", daemon=True)
+                self._poll_thread.start()
+        self._jobs.put(job)
+        return job
+
+    def take_events(self) -> list[ExportEvent]:
+        """Returns the events reported since the last call, oldest first."""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def dispatch_events(self):
+        """Logs the "log" events and calls the on_event callback of the job of each other
+        event reported since the last call. Then cancels the unfinished jobs whose
+        is_cancelled callback returns True.
+        """
+        for event in self.take_events():
+            if event.kind == "log":
+                futil.log(event.message, event.level)
+            elif event.job.on_event is not None:
+                event.job.on_event(event)
+
+        with self._unfinished_lock:
+            unfinished = list(self._unfinished.values())
+        for job in unfinished:
+            if job.is_cancelled is not None and not job.cancel_requested.is_set() and job.is_cancelled():
+                job.cancel()
+
+    def stop(self, timeout: float | None = 10.0):
+        """Cancels the unfinished jobs and stops the thread, which then quits Excel.
+
+        Cancelling also answers any "file_locked" event a job is waiting on, since the main
+        thread can't answer it while it waits here.
+        """
+        if self._thread is None:
+            return
+        with self._unfinished_lock:
+            unfinished = list(self._unfinished.values())
+        for job in unfinished:
+            job.cancel()
+        self._stopping.set()
+        self._jobs.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        with self._unfinished_lock:
+            poll_thread = self._poll_thread
+        if poll_thread is not None:
+            poll_thread.join(timeout)
+        self._stopping.clear()
+
+    def _report(self, event: ExportEvent):
+        self._events.put(event)
+        self._notify()
+
+    def _poll(self):
+        while not self._stopping.wait(config.EXPORT_CANCEL_POLL_SECONDS):
+            with self._unfinished_lock:
+                if not self._unfinished:
+                    self._poll_thread = None
+                    return
+            self._notify()
+        with self._unfinished_lock:
+            self._poll_thread = None
+
+    def _run(self):
+        try:
+            while (job := self._jobs.get()) is not None:
+                if job.exporter.needs_excel_thread(job.path):
+                    self._run_job(job)
+                    continue
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(config.EXPORT_POOL_SIZE, thread_name_prefix="BodyCount export")
+                self._pool.submit(self._run_job, job)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            excel_lib.shutdown()
+
+    def _run_job(self, job: ExportJob):
+        start = time.perf_counter()
+        try:
+            with futil.forward_thread_logs(
+                lambda message, level: self._report(ExportEvent(job, "log", message, level=level))
+            ), futil.profile("export"):
+                self._export(job)
+        except ExportCancelled:
+            job.seconds = time.perf_counter() - start
+            self._report(ExportEvent(job, "cancelled"))
+        except Exception:
+            job.seconds = time.perf_counter() - start
+            self._report(ExportEvent(job, "failed", traceback.format_exc()))
+        else:
+            job.seconds = time.perf_counter() - start
+            self._report(ExportEvent(job, "done"))
+        finally:
+            with self._unfinished_lock:
+                self._unfinished.pop(id(job), None)
+
+    def _export(self, job: ExportJob):
+        context = _JobContext(self, job)
+        context.step("Counting bodies")
+        bodies = job.collect_bodies()
+        job.exporter.export(job.path, bodies, job.modules, context)
+
+
+class _JobContext(ExportContext):
+    def __init__(self, worker: ExportWorker, job: ExportJob):
+        self._worker = worker
+        self._job = job
+        self._step = 0
+
+    def step(self, message: str):
+        if self._job.cancel_requested.is_set():
+            raise ExportCancelled()
+        self._worker._report(ExportEvent(self._job, "progress", message, self._step, self._job.n_steps))
+        self._step += 1
+
+    def wait_until_closed(self, path: str):
+        while os.path.exists(path) and excel_lib.is_excel_file_locked(path):
+            self._worker._report(ExportEvent(self._job, "file_locked", path))
+            if not self._job._retry_answers.get():
+                raise ExportCancelled()
@@ -0,0 +1,92 @@
+import os
+
+from contextlib import contextmanager
+from pathlib import Path
+from collections.abc import Iterator
+
+from ..excel_lib import Body, Module
+from .. import excel_lib
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportContext:
+    """Lets an exporter report its progress, see Exporter.export."""
+
+    def step(self, message: str):
+        """Reports that the next step of the export started.
+
+        @note Raises ExportCancelled if the export was cancelled.
+        """
+        raise NotImplementedError()
+
+    def wait_until_closed(self, path: str):
+        """Returns once the file at `path` can be written to.
+
+        @note Raises ExportCancelled if the user gave up on closing the file.
+        """
+        raise NotImplementedError()
+
+
+class Exporter:
+    """Writes the counted bodies and modules somewhere, with the columns of the
+    IndividualParts and ModulesParts tables of Kitchen X, see excel_lib.BODY_COLUMNS
+    and excel_lib.MODULE_COLUMNS."""
+
+    # Shown in the dialog and stored in FileData.export_format
+    name: str = ""
+    # Described to the user by the step that starts them, see ExportContext.step
+    steps: list[str] = []
+
+    def needs_excel_thread(self, path: str) -> bool:
+        """Whether the export uses Excel, and has to run on the thread that owns the Excel
+        session instead of alongside other exports."""
+        return False
+
+    def is_valid_path(self, path: Path) -> bool:
+        """Whether the export can be written to the path selected in the dialog."""
+        return path.is_absolute() and path.parent.is_dir()
+
+    def export(self, path: str, bodies: list[Body], modules: list[Module], context: ExportContext):
+        """Writes the bodies and modules.
+
+        Called on the export worker thread, so it must not use the Fusion API.
+
+        @param path The path selected in the dialog.
+        @param bodies The rows of the IndividualParts table.
+        @param modules The modules, with a row per body in the ModulesParts table.
+        @param context Called with each of `steps`, in order.
+        """
+        raise NotImplementedError()
+
+
+def tables(bodies: list[Body], modules: list[Module]) -> Iterator[tuple[str, list[tuple[str, type]], int, Iterator[list]]]:
+    """Generates the name, columns, number of rows and rows of each table."""
+    yield excel_lib.BODY_TABLE_NAME, excel_lib.BODY_COLUMNS, len(bodies), excel_lib.body_rows(bodies)
+    yield excel_lib.MODULE_TABLE_NAME, excel_lib.MODULE_COLUMNS, excel_lib.count_module_rows(modules), excel_lib.module_rows(modules)
+
+
+def table_path(path: str | Path, table_name: str, suffix: str) -> Path:
+    """The file a table is written to by exporters that write a file per table, next to
+    the selected file and named after it, like "Kitchen_IndividualParts.csv"."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}_{table_name}{suffix}")
+
+
+@contextmanager
+def open_replacing(path: Path, mode: str, **kwargs):
+    """Opens a temporary file that replaces `path` once it's fully written, so that
+    readers never see a partly written file.
+
+    @param path The file to replace.
+    @param mode and kwargs Passed to Path.open.
+    """
+    temp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        with temp_path.open(mode, **kwargs) as fd:
+            yield fd
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
@@ -0,0 +1,16 @@
+from .exporter import Exporter
+from .excel_exporter import ExcelExporter
+from .flat_exporters import CsvExporter, JsonLinesExporter
+from .columnar import ColumnarExporter
+
+# The export formats in the order they're listed in the dialog, by name
+EXPORTERS: dict[str, Exporter] = {
+    exporter.name: exporter
+    for exporter in [ExcelExporter(), CsvExporter(), JsonLinesExporter(), ColumnarExporter()]
+}
+DEFAULT_EXPORTER = ExcelExporter.name
+
+
+def get_exporter(name: str | None) -> Exporter:
+    """Returns the exporter with the given name, or the Excel exporter if there's none."""
+    return EXPORTERS.get(name, EXPORTERS[DEFAULT_EXPORTER])
@@ -0,0 +1,42 @@
+import csv
+import json
+
+from .. import fusionAddInUtils as futil
+from ..excel_lib import Body, Module
+from .exporter import Exporter, ExportContext, tables, table_path, open_replacing
+
+
+class CsvExporter(Exporter):
+    """Writes each table to a CSV file with a header row, next to the selected file."""
+
+    name = "CSV"
+    steps = ["Writing bodies", "Writing modules"]
+
+    @futil.profiled(name="export_csv")
+    def export(self, path: str, bodies: list[Body], modules: list[Module], context: ExportContext):
+        for step, (table_name, columns, _, rows) in zip(self.steps, tables(bodies, modules)):
+            context.step(step)
+            csv_path = table_path(path, table_name, ".csv")
+            context.wait_until_closed(str(csv_path))
+            with open_replacing(csv_path, 'w', encoding='utf-8', newline='') as fd:
+                writer = csv.writer(fd)
+                writer.writerow([name for name, _ in columns])
+                writer.writerows(rows)
+
+
+class JsonLinesExporter(Exporter):
+    """Writes each table to a JSON Lines file next to the selected file, with an object
+    per row that has the columns of the table as keys."""
+
+    name = "JSON Lines"
+    steps = ["Writing bodies", "Writing modules"]
+
+    @futil.profiled(name="export_json_lines")
+    def export(self, path: str, bodies: list[Body], modules: list[Module], context: ExportContext):
+        for step, (table_name, columns, _, rows) in zip(self.steps, tables(bodies, modules)):
+            context.step(step)
+            jsonl_path = table_path(path, table_name, ".jsonl")
+            context.wait_until_closed(str(jsonl_path))
+            names = [name for name, _ in columns]
+            with open_replacing(jsonl_path, 'w', encoding='utf-8', newline='\n') as fd:
+                fd.writelines(json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n' for row in rows)
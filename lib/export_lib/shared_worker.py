@@ -0,0 +1,38 @@
+import adsk.core
+
+from ... import config
+from .. import fusionAddInUtils as futil
+from .export_worker import ExportWorker
+
+app = adsk.core.Application.get()
+
+# Fired by the export worker when it has events for the main thread
+EXPORT_EVENT_ID = f"{config.COMPANY_NAME}_{config.ADDIN_NAME}_export"
+
+_worker: ExportWorker | None = None
+
+
+def _export_event_fired(args: adsk.core.CustomEventArgs):
+    if _worker is not None:
+        _worker.dispatch_events()
+
+
+def get_export_worker() -> ExportWorker:
+    """Returns the export worker shared by every command, so that there's only one Excel
+    session. The events of each job are passed to its ExportJob.on_event on the main thread."""
+    global _worker
+    if _worker is None:
+        export_event = app.registerCustomEvent(EXPORT_EVENT_ID)
+        futil.add_handler(export_event, _export_event_fired, name="export_event")
+        _worker = ExportWorker(lambda: app.fireCustomEvent(EXPORT_EVENT_ID))
+    return _worker
+
+
+def stop_export_worker():
+    """Cancels the unfinished exports and stops the export worker. Called when the add-in stops."""
+    global _worker
+    if _worker is None:
+        return
+    _worker.stop()
+    _worker = None
+    app.unregisterCustomEvent(EXPORT_EVENT_ID)
@@ -1,2 +1,4 @@
 from .general_utils import *
 from .event_utils import *
+from .profiling_utils import *
+from .tracing_utils import *
@@ -10,9 +10,13 @@
 #  UNINTERRUPTED OR ERROR FREE.
 
 import os
+import threading
 import traceback
 import adsk.core
 
+from contextlib import contextmanager
+from typing import Callable
+
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -23,6 +27,9 @@ try:
 except:
     DEBUG = False
 
+# The function each thread other than the main one hands its log messages to, if any
+_thread_logs = threading.local()
+
 
 def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
     """Utility function to easily handle logging in your app.
@@ -31,7 +38,18 @@ def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLe
     message -- The message to log.
     level -- The logging severity level.
     force_console -- Forces the message to be written to the Text Command window. 
+
+    The Fusion API can only be used on the main thread, so on other threads the message
+    is only printed, or handed to the function set with forward_thread_logs.
     """    
+    if threading.current_thread() is not threading.main_thread():
+        forward = getattr(_thread_logs, 'forward', None)
+        if forward is not None:
+            forward(message, level)
+        else:
+            print(message)
+        return
+
     # Always print to console, only seen through IDE.
     print(message)  
 
@@ -46,6 +64,23 @@ def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLe
         app.log(message, level, log_type)
 
 
+@contextmanager
+def forward_thread_logs(forward: Callable[[str, adsk.core.LogLevels], None]):
+    """Hands the messages logged on the current thread to `forward` in the enclosed block.
+
+    `forward` should pass them on to the main thread, which can log them with `log`.
+
+    Arguments:
+    forward -- Called with the message and level of each log call.
+    """
+    previous = getattr(_thread_logs, 'forward', None)
+    _thread_logs.forward = forward
+    try:
+        yield
+    finally:
+        _thread_logs.forward = previous
+
+
 def handle_error(name: str, show_message_box: bool = False):
     """Utility function to simplify error handling.
 
@@ -0,0 +1,184 @@
+import functools
+import json
+import tempfile
+import threading
+import time
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from .general_utils import log
+
+# Attempt to read the PROFILE and TRACE_API settings from parent config.
+try:
+    from ... import config as _config
+except:
+    _config = None
+
+
+@dataclass
+class ProfileNode:
+    """Time spent in one phase, with the phases nested in it."""
+    name: str
+    calls: int = 0
+    seconds: float = 0.0
+    children: dict[str, "ProfileNode"] = field(default_factory=dict)
+
+    @property
+    def self_seconds(self) -> float:
+        """Time spent in this phase outside of any nested phase."""
+        return self.seconds - sum(child.seconds for child in self.children.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "self_seconds": self.self_seconds,
+            "children": [child.to_dict() for child in self.children.values()],
+        }
+
+
+# Each thread times its own phases, so work moved to a worker thread is reported separately.
+_local = threading.local()
+_last_report: dict | None = None
+
+
+def is_profiling_enabled() -> bool:
+    # API traces are reported per phase, so tracing needs the phases as well
+    return _config is not None and (getattr(_config, 'PROFILE', False) or getattr(_config, 'TRACE_API', False))
+
+
+def current_phase() -> str | None:
+    """Returns the path of the innermost active phase, like "command_execute/save", if any."""
+    stack = getattr(_local, 'stack', None)
+    if not stack:
+        return None
+    return '/'.join(node.name for node in stack)
+
+
+def last_profile_report() -> dict | None:
+    """Returns the report of the last finished run, in the same form as the JSON report."""
+    return _last_report
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        if not hasattr(_local, 'stack'):
+            _local.stack = []
+        stack: list[ProfileNode] = _local.stack
+
+        if stack:
+            parent = stack[-1]
+            if (node := parent.children.get(self.name)) is None:
+                node = parent.children[self.name] = ProfileNode(self.name)
+        else:
+            node = ProfileNode(self.name)
+            _local.started = datetime.now()
+
+        stack.append(node)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack: list[ProfileNode] = _local.stack
+        node = stack.pop()
+        node.calls += 1
+        node.seconds += elapsed
+
+        if not stack:
+            _finish_run(node)
+        return False
+
+
+def profile(name: str):
+    """Times the enclosed block as a phase named `name`.
+
+    Phases can be nested. When the outermost phase ends, a summary of the run is logged
+    and a JSON report is written, see config.PROFILE_REPORT_DIR. Phases with the same name
+    and parent are added together.
+
+    When profiling is disabled this returns a shared no-op context manager.
+
+    @param name The name of the phase.
+    """
+    if not is_profiling_enabled():
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def profiled(fn: Callable | None = None, *, name: str | None = None):
+    """Decorator that times every call of the decorated function with `profile`.
+
+    Can be used as `@profiled` or `@profiled(name="phase name")`. The phase is named after
+    the function by default.
+    """
+    def decorator(fn: Callable) -> Callable:
+        phase_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_profiling_enabled():
+                return fn(*args, **kwargs)
+            with _Timer(phase_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator(fn) if fn is not None else decorator
+
+
+def _format_node(node: ProfileNode, depth: int, lines: list[str]):
+    calls = f" ({node.calls} calls)" if node.calls > 1 else ""
+    lines.append(f"{'  ' * depth}{node.name}: {node.seconds * 1000:.1f} ms{calls}")
+    for child in node.children.values():
+        _format_node(child, depth + 1, lines)
+
+
+def _finish_run(root: ProfileNode):
+    global _last_report
+
+    started: datetime = _local.started
+    _last_report = {
+        "started": started.isoformat(timespec='seconds'),
+        **root.to_dict(),
+    }
+
+    lines = ["===== Profile ====="]
+    _format_node(root, 0, lines)
+
+    from .tracing_utils import is_api_tracing_enabled, take_api_trace, format_api_trace
+    if is_api_tracing_enabled():
+        api_trace = take_api_trace()
+        _last_report["api_calls"] = [stats.to_dict() for stats in api_trace]
+        lines.append(format_api_trace(api_trace))
+    log('\n'.join(lines))
+
+    report_dir = getattr(_config, 'PROFILE_REPORT_DIR', None)
+    report_dir = Path(report_dir) if report_dir else Path(tempfile.gettempdir())/'BodyCount'/'profiles'
+    report_path = report_dir/f"{started:%Y%m%d-%H%M%S}-{root.name}.json"
+    try:
+        report_dir.mkdir(parents=True, exist_ok=True)
+        with report_path.open('w') as fd:
+            json.dump(_last_report, fd, indent=4)
+    except OSError:
+        log(f"Failed to write profile report: {report_path}")
@@ -0,0 +1,204 @@
+import threading
+import time
+
+from dataclasses import dataclass
+
+from .profiling_utils import current_phase
+
+# Attempt to read the TRACE_API setting from parent config.
+try:
+    from ... import config as _config
+except:
+    _config = None
+
+# Number of attributes listed in the logged summary, the JSON report has all of them
+TRACE_SUMMARY_LENGTH = 25
+
+
+@dataclass
+class ApiCallStats:
+    """Reads, writes or calls of one attribute of one API type in one phase."""
+    phase: str
+    type_name: str
+    attribute: str
+    count: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "phase": self.phase,
+            "type": self.type_name,
+            "attribute": self.attribute,
+            "count": self.count,
+            "seconds": self.seconds,
+        }
+
+
+_stats: dict[tuple[str, str, str], ApiCallStats] = {}
+# Traced objects are also used by the export threads, and take_api_trace should see their
+# calls too, so the stats are shared and guarded instead of kept per thread
+_stats_lock = threading.Lock()
+
+
+def is_api_tracing_enabled() -> bool:
+    return _config is not None and getattr(_config, 'TRACE_API', False)
+
+
+def trace_api(obj):
+    """Wraps a Fusion API object, so every API object reached through it is traced as well.
+
+    Property reads and writes and method calls on traced objects are counted and timed per
+    attribute and per profiling phase, see take_api_trace. Traced objects pass isinstance
+    checks like the objects they wrap and are unwrapped when passed back to the API.
+
+    Returns `obj` itself when tracing is disabled.
+
+    @param obj The API object to trace, e.g. the root component.
+    """
+    if not is_api_tracing_enabled():
+        return obj
+    return _wrap(obj)
+
+
+def take_api_trace() -> list[ApiCallStats]:
+    """Returns the stats recorded since the last call, most used attributes first."""
+    global _stats
+    with _stats_lock:
+        stats, _stats = _stats, {}
+    return sorted(stats.values(), key=lambda s: (s.count, s.seconds), reverse=True)
+
+
+def format_api_trace(stats: list[ApiCallStats]) -> str:
+    """Formats a summary of `stats` per attribute, summed over all phases."""
+    totals: dict[tuple[str, str], list] = {}
+    for s in stats:
+        total = totals.setdefault((s.type_name, s.attribute), [0, 0.0])
+        total[0] += s.count
+        total[1] += s.seconds
+
+    ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+    lines = [f"API calls: {sum(total[0] for _, total in ranked)}"]
+    for (type_name, attribute), (count, seconds) in ranked[:TRACE_SUMMARY_LENGTH]:
+        lines.append(f"  {type_name}.{attribute}: {count} ({seconds * 1000:.1f} ms)")
+    return '\n'.join(lines)
+
+
+def _record(target, attribute: str, seconds: float):
+    key = (current_phase() or '', type(target).__name__, attribute)
+    with _stats_lock:
+        if (stats := _stats.get(key)) is None:
+            stats = _stats[key] = ApiCallStats(*key)
+        stats.count += 1
+        stats.seconds += seconds
+
+
+def _is_api_object(value) -> bool:
+    return type(value).__module__.startswith('adsk.')
+
+
+def _wrap(value):
+    if type(value) is _Traced or not _is_api_object(value):
+        return value
+    return _Traced(value)
+
+
+def _unwrap(value):
+    if type(value) is _Traced:
+        return object.__getattribute__(value, '_target')
+    if type(value) in (list, tuple):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+class _TracedMethod:
+    __slots__ = ('_target', '_name', '_method')
+
+    def __init__(self, target, name: str, method):
+        self._target = target
+        self._name = name
+        self._method = method
+
+    def __call__(self, *args, **kwargs):
+        args = [_unwrap(arg) for arg in args]
+        kwargs = {key: _unwrap(value) for key, value in kwargs.items()}
+
+        start = time.perf_counter()
+        result = self._method(*args, **kwargs)
+        _record(self._target, f"{self._name}()", time.perf_counter() - start)
+        return _wrap(result)
+
+
+class _Traced:
+    __slots__ = ('_target',)
+
+    def __init__(self, target):
+        object.__setattr__(self, '_target', target)
+
+    # Makes isinstance checks against API types work on traced objects
+    @property
+    def __class__(self):
+        return type(object.__getattribute__(self, '_target'))
+
+    def __getattr__(self, name: str):
+        target = object.__getattribute__(self, '_target')
+
+        start = time.perf_counter()
+        value = getattr(target, name)
+        elapsed = time.perf_counter() - start
+
+        # Looking up a method doesn't call into the API, calling it does
+        if callable(value) and not isinstance(value, type):
+            return _TracedMethod(target, name, value)
+
+        _record(target, name, elapsed)
+        return _wrap(value)
+
+    def __setattr__(self, name: str, value):
+        target = object.__getattribute__(self, '_target')
+
+        start = time.perf_counter()
+        setattr(target, name, _unwrap(value))
+        _record(target, f"{name}=", time.perf_counter() - start)
+
+    def __iter__(self):
+        target = object.__getattribute__(self, '_target')
+        iterator = iter(target)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            _record(target, "[]", time.perf_counter() - start)
+            yield _wrap(item)
+
+    def __len__(self) -> int:
+        target = object.__getattribute__(self, '_target')
+
+        start = time.perf_counter()
+        length = len(target)
+        _record(target, "len()", time.perf_counter() - start)
+        return length
+
+    def __getitem__(self, index):
+        target = object.__getattribute__(self, '_target')
+
+        start = time.perf_counter()
+        item = target[index]
+        _record(target, "[]", time.perf_counter() - start)
+        return _wrap(item)
+
+    def __bool__(self) -> bool:
+        return bool(object.__getattribute__(self, '_target'))
+
+    def __eq__(self, other) -> bool:
+        return object.__getattribute__(self, '_target') == _unwrap(other)
+
+    def __ne__(self, other) -> bool:
+        return object.__getattribute__(self, '_target') != _unwrap(other)
+
+    def __hash__(self) -> int:
+        return hash(object.__getattribute__(self, '_target'))
+
+    def __repr__(self) -> str:
+        return f"traced {object.__getattribute__(self, '_target')!r}"
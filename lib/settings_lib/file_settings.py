@@ -26,10 +26,13 @@ class FileData:
     excel_path: Path | None = None
     is_excel_path_in_dropbox: bool = False
     modules: dict[str, ModuleSettings] = field(default_factory=lambda: dict())
+    # The name of the exporter, see export_lib.EXPORTERS
+    export_format: str | None = None
 
-def load_file_data() -> FileData:
-    product = app.activeProduct
-    design = adsk.fusion.Design.cast(product)
+def load_file_data(design: adsk.fusion.Design | None = None) -> FileData:
+    """Loads the settings stored in the given design, or the active one if None."""
+    if design is None:
+        design = adsk.fusion.Design.cast(app.activeProduct)
 
     if (attr := design.attributes.itemByName(ATTR_GRP, ATTR_NAME)):
         file_data = from_json(FileData, attr.value)
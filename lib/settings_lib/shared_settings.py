@@ -4,6 +4,7 @@ from .user_settings import load_user_data, UserData
 from serde import serde
 from serde.json import to_json, from_json
 from dataclasses import field
+from functools import cached_property
 from pathlib import Path
 
 @serde
@@ -11,6 +12,18 @@ class SharedData:
     wood_materials: list[str] = field(default_factory=lambda: [])
     steel_brass_numbers: list[tuple[int, int]] = field(default_factory=lambda: [])
 
+    # Built once per load, load_shared_data creates a new object whenever the file changes.
+    # If a number is in several pairs, the last pair wins.
+    @cached_property
+    def steel_to_brass(self) -> dict[int, int]:
+        """The brass sub-number of each steel sub-number in steel_brass_numbers."""
+        return {steel: brass for steel, brass in self.steel_brass_numbers}
+
+    @cached_property
+    def brass_to_steel(self) -> dict[int, int]:
+        """The steel sub-number of each brass sub-number in steel_brass_numbers."""
+        return {brass: steel for steel, brass in self.steel_brass_numbers}
+
 cached_shared_data: SharedData | None = None
 cached_shared_data_time: float = 0
 